@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+"""Benchmarks of the job generation, run with 'python3 -m benchmarks'"""
+
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Time func repeat times, then trace its peak memory once"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "max": max(timings),
+        "peak_memory": peak,
+    }
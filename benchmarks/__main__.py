@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import cli, jobs
+from tuxlava import __version__
+
+
+def setup_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m benchmarks", description="TuxLAVA benchmarks"
+    )
+    parser.add_argument(
+        "--repeat",
+        default=5,
+        type=int,
+        help="Number of timed runs of each benchmark. Default is 5",
+    )
+    parser.add_argument(
+        "--suite",
+        default=["jobs", "cli"],
+        choices=["jobs", "cli"],
+        nargs="+",
+        help="Benchmark suites to run. Default is all",
+    )
+    parser.add_argument(
+        "--device",
+        default="*",
+        metavar="PATTERN",
+        help="Only benchmark the jobs of the matching devices",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        type=Path,
+        metavar="FILE",
+        help="Write the JSON results to FILE instead of stdout",
+    )
+    return parser
+
+
+def main() -> int:
+    options = setup_parser().parse_args()
+
+    results = {
+        "tuxlava": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "repeat": options.repeat,
+    }
+    with tempfile.TemporaryDirectory(prefix="tuxlava-benchmarks-") as tmpdir:
+        if "jobs" in options.suite:
+            results["jobs"] = jobs.run(options.repeat, Path(tmpdir), options.device)
+        if "cli" in options.suite:
+            results["cli"] = cli.run(options.repeat, Path(tmpdir))
+
+    data = json.dumps(results, indent=2) + "\n"
+    if options.output:
+        options.output.write_text(data, encoding="utf-8")
+    else:
+        sys.stdout.write(data)
+    return 0 if not any("error" in r for r in results.get("jobs", [])) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import tuxlava
+
+# Command lines started in a new interpreter, to include the imports
+COMMANDS = {
+    "version": ["--version"],
+    "list-devices": ["--list-devices"],
+    "list-tests": ["--list-tests"],
+    "list-tests-device": ["--list-tests", "--device", "qemu-arm64"],
+    "render-boot": ["--device", "qemu-arm64"],
+    "render-kselftest": ["--device", "qemu-x86_64", "--tests", "kselftest-ipc"],
+}
+
+
+# Run tuxlava like 'python3 -m tuxlava' and report the peak resident size
+# of the process: ru_maxrss would include the benchmark process as forked
+# before exec, VmHWM does not.
+WRAPPER = """
+import runpy, sys
+sys.argv[0] = "tuxlava"
+try:
+    runpy.run_module("tuxlava", run_name="__main__", alter_sys=True)
+finally:
+    with open("/proc/self/status") as status:
+        sys.stderr.write("".join(l for l in status if l.startswith("VmHWM:")))
+"""
+
+
+def start(args: List[str], tmpdir: Path) -> Dict[str, Any]:
+    """Wall time and peak resident size (bytes) of a tuxlava process"""
+    # Benchmark the tuxlava imported by the benchmarks, from any directory
+    path = [str(Path(tuxlava.__file__).parent.parent)]
+    if os.environ.get("PYTHONPATH"):
+        path.append(os.environ["PYTHONPATH"])
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(path),
+        "XDG_CACHE_HOME": str(tmpdir / "cache"),
+    }
+    begin = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-c", WRAPPER] + args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=tmpdir,
+        text=True,
+    )
+    elapsed = time.perf_counter() - begin
+    if process.returncode:
+        raise subprocess.CalledProcessError(
+            process.returncode, process.args, stderr=process.stderr
+        )
+    hwm = re.search(r"^VmHWM:\s+(\d+) kB", process.stderr, re.MULTILINE)
+    return {"time": elapsed, "maxrss": int(hwm.group(1)) * 1024 if hwm else None}
+
+
+def run(repeat: int, tmpdir: Path) -> List[Dict[str, Any]]:
+    results = []
+    for name, args in COMMANDS.items():
+        runs = [start(args, tmpdir) for _ in range(repeat)]
+        timings = [r["time"] for r in runs]
+        results.append(
+            {
+                "command": name,
+                "args": args,
+                "repeat": repeat,
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.mean(timings),
+                "max": max(timings),
+                "peak_memory": max((r["maxrss"] or 0) for r in runs) or None,
+            }
+        )
+    return results
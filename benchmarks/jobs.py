@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import fnmatch
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from benchmarks import measure
+from tuxlava.devices import Device
+from tuxlava.jobs import Job
+from tuxlava.tests import Test
+
+BASE = Path(__file__).resolve().parent.parent
+URL = "https://example.com"
+
+# Firmwares required by the fvp-morello devices
+MORELLO = {
+    "ap_romfw": f"{URL}/tf-bl1.bin",
+    "mcp_fw": f"{URL}/mcp_fw.bin",
+    "mcp_romfw": f"{URL}/mcp_romfw.bin",
+    "scp_fw": f"{URL}/scp_fw.bin",
+    "scp_romfw": f"{URL}/scp_romfw.bin",
+    "fip": f"{URL}/fip.bin",
+}
+
+# Arguments required by the devices, the first matching pattern is used
+ARGUMENTS: List[Tuple[str, Dict[str, Any]]] = [
+    (
+        "avh-*",
+        {
+            "secrets": {"avh_api_token": "token"},
+            "kernel": f"{URL}/Image",
+            "dtb": f"{URL}/board.dtb",
+            "rootfs": f"{URL}/rootfs.ext4",
+        },
+    ),
+    (
+        "fastboot-aosp-*",
+        {
+            "parameters": {
+                "TUXSUITE_BAKE_VENDOR_DOWNLOAD_URL": f"{URL}/vendor/",
+                "BUILD_REFERENCE_IMAGE_GZ_URL": f"{URL}/Image.gz",
+                "LKFT_BUILD_CONFIG": "lkft-config",
+            }
+        },
+    ),
+    ("flasher-*", {"rootfs": f"{URL}/rootfs.tar.gz"}),
+    (
+        "fvp-lava",
+        {
+            "job_definition": str(
+                BASE / "test/unit/refs/definitions/fvp-lava-job-definition.yaml"
+            ),
+            "secrets": {"fvp_ubl_license": "license"},
+        },
+    ),
+    ("fvp-morello-ubuntu", MORELLO),
+    ("fvp-morello-*", {**MORELLO, "rootfs": f"{URL}/rootfs.img.xz"}),
+    (
+        "ssh-device",
+        {
+            "ssh_host": "127.0.0.1",
+            "ssh_user": "user",
+            "ssh_prompt": "user",
+            "ssh_identity_file": str(BASE / "test/unit/refs/dummy.pem"),
+        },
+    ),
+]
+
+
+def arguments(device: str) -> Dict[str, Any]:
+    for pattern, kwargs in ARGUMENTS:
+        if fnmatch.fnmatch(device, pattern):
+            return dict(kwargs)
+    return {}
+
+
+def scenarios(device: str) -> Iterator[Tuple[str, List[str]]]:
+    """Representative test combinations supported by the device"""
+    tests = Test.list(device=device)
+    yield "boot", []
+    if "ltp-smoke" in tests:
+        yield "ltp-smoke", ["ltp-smoke"]
+    ltp = [t for t in tests if t.startswith("ltp-")]
+    if ltp:
+        yield "ltp", ltp
+    kselftest = [t for t in tests if t.startswith("kselftest-")]
+    if kselftest:
+        yield "kselftest", kselftest
+
+
+def run(repeat: int, tmpdir: Path, pattern: str = "*") -> List[Dict[str, Any]]:
+    results = []
+    for device in Device.list():
+        if not fnmatch.fnmatch(device.name, pattern):
+            continue
+        for scenario, tests in scenarios(device.name):
+            kwargs = {
+                **arguments(device.name),
+                "device": device.name,
+                "tests": tests,
+                "tmpdir": tmpdir,
+            }
+            result = {"device": device.name, "scenario": scenario, "tests": len(tests)}
+            try:
+                job = Job(**kwargs)
+                job.initialize()
+                job.render()
+            except Exception as exc:
+                results.append({**result, "error": str(exc)})
+                continue
+
+            results.append(
+                {
+                    **result,
+                    "phase": "initialize",
+                    **measure(lambda: Job(**kwargs).initialize(), repeat),
+                }
+            )
+            results.append({**result, "phase": "render", **measure(job.render, repeat)})
+    return results
@@ -7,6 +7,7 @@ import pytest
 def home(monkeypatch, tmp_path):
     home = tmp_path / "home"
     monkeypatch.setenv("HOME", str(home))
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
     return home
 
 
@@ -20,3 +21,48 @@ def get(mocker, response):
     f = mocker.patch("requests.Session.get")
     f.return_value = response
     return f
+
+
+@pytest.fixture(autouse=True)
+def http_responses():
+    from tuxlava.requests import reset
+
+    reset()
+    yield
+    reset()
+
+
+@pytest.fixture
+def read_fat():
+    # Files of the root directory of a FAT16 image, following the clusters
+    import struct
+
+    def read(path):
+        data = path.read_bytes()
+        sector, cluster, reserved, fats, entries = struct.unpack_from(
+            "<HBHBH", data, 11
+        )
+        fat_sectors = struct.unpack_from("<H", data, 22)[0]
+        assert data[54:62] == b"FAT16   " and data[510:512] == b"\x55\xaa"
+        fat = data[reserved * sector :]
+        root = reserved + fats * fat_sectors
+        first = root + entries * 32 // sector
+        files = {}
+        for offset in range(root * sector, first * sector, 32):
+            entry = data[offset : offset + 32]
+            if entry[0] == 0:
+                break
+            base, ext = entry[:8].decode().strip(), entry[8:11].decode().strip()
+            base = base.lower() if entry[12] & 0x08 else base
+            ext = ext.lower() if entry[12] & 0x10 else ext
+            start, size = struct.unpack_from("<HI", entry, 26)
+            content = []
+            n = start
+            while 2 <= n < 0xFFF8:
+                begin = (first + (n - 2) * cluster) * sector
+                content.append(data[begin : begin + cluster * sector])
+                n = struct.unpack_from("<H", fat, n * 2)[0]
+            files[f"{base}.{ext}" if ext else base] = b"".join(content)[:size]
+        return files
+
+    return read
@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import subprocess
+import sys
 from argparse import Namespace
+from pathlib import Path
 
 import pytest
 
+import tuxlava
+from tuxlava.__main__ import main
 from tuxlava.argparse import filter_options, setup_parser
+from tuxlava.tests import Test as TuxLavaTest
 
 
 def test_filter_options():
@@ -24,3 +30,53 @@ def test_timeouts_parser():
 
     with pytest.raises(SystemExit):
         setup_parser().parse_args(["--timeouts", "booting=1"])
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [
+        (["--list-devices"], "qemu-arm64"),
+        (["--list-tests"], "kselftest-arm64"),
+        (["--list-tests", "--device", "qemu-x86_64"], "ltp-smoke"),
+    ],
+)
+def test_list(monkeypatch, capsys, args, expected):
+    monkeypatch.setattr("tuxlava.__main__.sys.argv", ["tuxlava"] + args)
+    try:
+        main()
+    except SystemExit:
+        pass
+    output = capsys.readouterr().out.splitlines()
+    assert expected in output
+    assert output == sorted(output)
+
+
+def test_list_tests_device(monkeypatch, capsys):
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        ["tuxlava", "--list-tests", "--device", "qemu-x86_64"],
+    )
+    main()
+    output = capsys.readouterr().out.splitlines()
+    assert output == TuxLavaTest.list(device="qemu-x86_64")
+    assert "kselftest-arm64" not in output
+
+
+def test_list_imports():
+    script = """
+import sys
+sys.argv = ["tuxlava", "--list-tests", "--device", "qemu-arm64"]
+from tuxlava.__main__ import main
+main()
+print(" ".join(sys.modules), file=sys.stderr)
+"""
+    proc = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(tuxlava.__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = proc.stderr.split()
+    for module in ["jinja2", "requests", "yaml", "tuxlava.devices.qemu"]:
+        assert module not in modules
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+import yaml
+
+from tuxlava.__main__ import main
+from tuxlava.bandwidth import BandwidthModel, deploy_urls, estimate
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.jobs import TEST_DEFINITIONS, Job
+
+MB = 1024 * 1024
+
+
+def test_deploy_timeout():
+    model = BandwidthModel()
+    assert model.deploy_timeout("qemu-arm64", []) == 3
+    assert model.deploy_timeout("qemu-arm64", [600 * MB]) == 4
+    assert model.deploy_timeout("qemu-arm64", [3000 * MB, 3000 * MB]) == 22
+
+    model = BandwidthModel(bandwidth=100, devices={"fastboot-*": {"bandwidth": 5}})
+    assert model.deploy_timeout("qemu-arm64", [3000 * MB]) == 3
+    assert model.deploy_timeout("fastboot-x15", [3000 * MB]) == 22
+
+    with pytest.raises(InvalidArgument):
+        BandwidthModel(speed=10)
+    with pytest.raises(InvalidArgument):
+        BandwidthModel(devices={"fastboot-*": {"speed": 10}})
+
+
+def test_load(tmp_path):
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps({"bandwidth": 1, "devices": {"nfs-*": {"minimum": 10}}}))
+    model = BandwidthModel.load(path)
+    assert model.get("qemu-arm64")["bandwidth"] == 1
+    assert model.get("nfs-x86_64")["minimum"] == 10
+
+    path.write_text("[]")
+    with pytest.raises(InvalidArgument):
+        BandwidthModel.load(path)
+    with pytest.raises(InvalidArgument):
+        BandwidthModel.load(tmp_path / "missing.json")
+
+
+def test_estimate(tmp_path):
+    kernel = tmp_path / "Image"
+    kernel.write_bytes(b"\0" * MB)
+    kwargs = {
+        "device": "qemu-arm64",
+        "kernel": f"file://{kernel}",
+        "rootfs": f"file://{kernel}",
+    }
+    model = BandwidthModel(bandwidth=0.01)
+    assert estimate(model, **kwargs)["timeouts"] == {"deploy": 9}
+    assert estimate(model, timeouts={"deploy": 5}, **kwargs)["timeouts"] == {
+        "deploy": 5
+    }
+    assert estimate(model, **{**kwargs, "kernel": f"file://{tmp_path}/missing"})[
+        "timeouts"
+    ] == {"deploy": 6}
+    assert list(tmp_path.iterdir()) == [kernel]
+
+
+def test_estimate_deploy_artefacts(tmp_path, mocker):
+    kernel = tmp_path / "Image"
+    kernel.write_bytes(b"\0" * MB)
+    initialize = mocker.spy(Job, "initialize")
+    kwargs = {
+        "device": "qemu-arm64",
+        "kernel": f"file://{kernel}",
+        "rootfs": f"file://{kernel}",
+        # Downloaded by the test, not at deploy
+        "parameters": {"DATA": f"file://{kernel}"},
+    }
+    assert deploy_urls(Job(**kwargs)) == [f"file://{kernel}", f"file://{kernel}"]
+    assert deploy_urls(Job(**kwargs, tests=["ltp-smoke"]))[-1] == TEST_DEFINITIONS
+    model = BandwidthModel(bandwidth=0.01)
+    assert estimate(model, **kwargs)["timeouts"] == {"deploy": 9}
+    initialize.assert_not_called()
+
+
+def test_main_deploy_bandwidth(monkeypatch, capsys, tmp_path):
+    kernel = tmp_path / "Image"
+    kernel.write_bytes(b"\0" * MB)
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        ["tuxlava", "--device", "qemu-arm64", "--kernel", str(kernel)]
+        + ["--rootfs", str(kernel), "--deploy-bandwidth", "0.01"],
+    )
+    main()
+    job = yaml.safe_load(capsys.readouterr().out)
+    assert job["actions"][0]["deploy"]["timeout"]["minutes"] == 9
+    assert job["timeouts"]["job"]["minutes"] == 9 + 15
+
+
+def test_main_deploy_bandwidth_patterns(monkeypatch, capsys, tmp_path, mocker):
+    kernel = tmp_path / "Image"
+    kernel.write_bytes(b"\0" * MB)
+    mocker.patch(
+        "requests.Session.head",
+        return_value=mocker.Mock(status_code=200, headers={"Content-Length": "0"}),
+    )
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        ["tuxlava", "--device", "qemu-arm64", "--kernel", str(kernel)]
+        + ["--rootfs", str(kernel), "--tests", "ltp-s*", "--shards", "2"]
+        + ["--deploy-bandwidth", "0.01"],
+    )
+    main()
+    jobs = list(yaml.safe_load_all(capsys.readouterr().out))
+    assert len(jobs) == 2
+    for job in jobs:
+        assert job["actions"][0]["deploy"]["timeout"]["minutes"] == 9
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import lzma
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tuxlava.__main__ import main
+from tuxlava.cache import ArtefactStore, RenderCache, link
+from tuxlava.checksums import sha256
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.jobs import Job
+
+
+def test_render_cache(tmp_path):
+    cache = RenderCache(tmp_path, max_size=10)
+    assert cache.get("a") is None
+    cache.put("a", "12345")
+    assert cache.get("a") == "12345"
+
+    # "a" is older than "b" but was used last
+    os.utime(cache.path("a"), (0, 0))
+    cache.put("b", "12345")
+    os.utime(cache.path("b"), (1, 1))
+    assert cache.get("a") == "12345"
+    cache.put("c", "12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("c") == "12345"
+
+
+def test_render_cache_threads(tmp_path):
+    # Threads of the server share a pid but never a temporary file
+    cache = RenderCache(tmp_path)
+
+    def put(index):
+        for _ in range(50):
+            cache.put("a", "definition")
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(put, range(4)))
+    assert cache.get("a") == "definition"
+    assert os.listdir(tmp_path / "definitions") == ["a.yaml"]
+
+
+def test_fingerprint(tmp_path):
+    job = Job(device="qemu-arm64", tests=["ltp-smoke"])
+    assert (
+        job.fingerprint() == Job(device="qemu-arm64", tests=["ltp-smoke"]).fingerprint()
+    )
+    assert job.fingerprint() != Job(device="qemu-arm64").fingerprint()
+
+    # Initializing the job does not change its fingerprint
+    fingerprint = job.fingerprint()
+    job.initialize()
+    assert job.fingerprint() == fingerprint
+
+
+def test_fingerprint_files(tmp_path):
+    # Files read at initialize() are part of the fingerprint
+    definition = tmp_path / "definition.yaml"
+    definition.write_text("job_name: hello\n", encoding="utf-8")
+    job = Job(device="fvp-lava", job_definition=f"file://{definition}")
+    fingerprint = job.fingerprint()
+    definition.write_text("job_name: hello world\n", encoding="utf-8")
+    assert job.fingerprint() != fingerprint
+
+    build = tmp_path / "build"
+    build.mkdir()
+    (build / "metadata.json").write_text("{}", encoding="utf-8")
+    job = Job(device="qemu-arm64", tuxmake=str(build))
+    fingerprint = job.fingerprint()
+    (build / "metadata.json").write_text('{"a": 1}', encoding="utf-8")
+    assert job.fingerprint() != fingerprint
+
+
+def test_render_cached(tmp_path, mocker):
+    cache = RenderCache(tmp_path / "cache")
+    job = Job(device="qemu-arm64", tests=["ltp-smoke"], tmpdir=tmp_path)
+    definition = job.render_cached(cache)
+    assert cache.get(job.fingerprint()) == definition
+
+    initialize = mocker.patch("tuxlava.jobs.Job.initialize")
+    job = Job(device="qemu-arm64", tests=["ltp-smoke"], tmpdir=tmp_path)
+    assert job.render_cached(cache) == definition
+    initialize.assert_not_called()
+
+
+def test_render_cached_compression(tmp_path):
+    # The compression of local files is detected from their content
+    cache = RenderCache(tmp_path / "cache")
+    rootfs = tmp_path / "rootfs.img"
+    rootfs.write_bytes(gzip.compress(b"rootfs"))
+    (tmp_path / "tmp").mkdir()
+    job = Job(device="qemu-arm64", rootfs=f"file://{rootfs}", tmpdir=tmp_path / "tmp")
+    assert "compression: gz" in job.render_cached(cache)
+    assert cache.get(job.fingerprint()) is not None
+
+    rootfs.write_bytes(lzma.compress(b"rootfs"))
+    job = Job(device="qemu-arm64", rootfs=f"file://{rootfs}", tmpdir=tmp_path / "tmp")
+    assert "compression: xz" in job.render_cached(cache)
+
+
+def test_render_cached_tmpdir(tmp_path):
+    # The definition refers to files generated in the temporary directory
+    cache = RenderCache(tmp_path / "cache")
+    job = Job(device="fvp-aemva", tmpdir=tmp_path)
+    job.render_cached(cache)
+    assert cache.get(job.fingerprint()) is None
+
+
+def test_main_cache_dir(monkeypatch, capsys, tmp_path, mocker):
+    args = ["tuxlava", "--device", "qemu-arm64", "--cache-dir", str(tmp_path)]
+    monkeypatch.setattr("tuxlava.__main__.sys.argv", args)
+    main()
+    output = capsys.readouterr().out
+    assert len(list((tmp_path / "definitions").glob("*.yaml"))) == 1
+
+    initialize = mocker.patch("tuxlava.jobs.Job.initialize")
+    main()
+    assert capsys.readouterr().out == output
+    initialize.assert_not_called()
+
+
+def test_artefact_store(tmp_path):
+    store = ArtefactStore(tmp_path / "cache", max_size=10)
+    first = tmp_path / "build-1" / "modules.tar.xz"
+    second = tmp_path / "build-2" / "modules.tar.xz"
+    for path in [first, second]:
+        path.parent.mkdir()
+        path.write_bytes(b"modules")
+
+    blob = store.add(first)
+    assert blob == store.add(second)
+    assert blob.parent.name == sha256(first)
+    assert blob.read_bytes() == b"modules"
+    assert store.url(f"file://{second}") == f"file://{blob}"
+    assert store.url("https://example.com/modules.tar.xz") == (
+        "https://example.com/modules.tar.xz"
+    )
+
+    # A blob modified in place through its source is replaced
+    first.unlink()
+    blob.write_bytes(b"changed")
+    assert store.add(second).read_bytes() == b"modules"
+
+    # The least recently used blobs are removed
+    other = tmp_path / "overlay.tar.xz"
+    other.write_bytes(b"overlay")
+    os.utime(blob.parent, (0, 0))
+    store.add(other)
+    store.evict()
+    assert not blob.exists()
+    assert store.add(other).exists()
+
+
+def test_link_copy(tmp_path, mocker):
+    mocker.patch("os.link", side_effect=OSError)
+    src = tmp_path / "src"
+    src.write_bytes(b"data")
+    link(src, tmp_path / "dst")
+    assert (tmp_path / "dst").read_bytes() == b"data"
+    assert (tmp_path / "dst").stat().st_ino != src.stat().st_ino
+
+
+def test_job_artefact_store(tmp_path):
+    modules = tmp_path / "modules.tar.xz"
+    modules.write_bytes(b"modules")
+    overlay = tmp_path / "overlay.tar.xz"
+    overlay.write_bytes(b"overlay")
+    job = Job(
+        device="qemu-arm64",
+        modules=f"file://{modules}",
+        overlays=[[f"file://{overlay}", "/"]],
+        parameters={"DATA": f"file://{overlay}"},
+        cache_dir=tmp_path / "cache",
+        artefact_store=True,
+    )
+    job.initialize()
+    store = tmp_path / "cache" / "artefacts"
+    stored = f"file://{store / sha256(overlay) / 'overlay.tar.xz'}"
+    assert job.modules[0] == f"file://{store / sha256(modules) / 'modules.tar.xz'}"
+    assert job.overlays[1] == ("overlay-00", stored, "/")
+    assert job.parameters["DATA"] == stored
+    assert stored in job.extra_assets
+    assert str(tmp_path / "overlay.tar.xz") not in job.render()
+
+    with pytest.raises(InvalidArgument):
+        Job(device="qemu-arm64", artefact_store=True).initialize()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+
+import pytest
+
+from tuxlava import checksums
+from tuxlava.checksums import embed, local_files, sha256
+from tuxlava.jobs import Job
+
+
+@pytest.fixture(autouse=True)
+def digests():
+    checksums.DIGESTS.clear()
+    yield checksums.DIGESTS
+    checksums.DIGESTS.clear()
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "Image"
+    path.write_bytes(os.urandom(3 * checksums.BUFFER_SIZE + 17))
+    return path
+
+
+def test_sha256(image):
+    assert sha256(image) == hashlib.sha256(image.read_bytes()).hexdigest()
+
+
+def test_sha256_cached(mocker, digests, image):
+    compute = mocker.spy(checksums, "compute")
+    digest = sha256(image)
+    assert sha256(image) == digest
+    digests.clear()
+    assert sha256(image) == digest
+    assert compute.call_count == 1
+
+    image.write_bytes(b"changed")
+    assert sha256(image) == hashlib.sha256(b"changed").hexdigest()
+    assert compute.call_count == 2
+    st = image.stat()
+    entries = list(checksums.cache_home().glob(f"checksums/{st.st_dev}-{st.st_ino}/*"))
+    assert [e.name for e in entries] == [f"{st.st_size}-{st.st_mtime_ns}"]
+
+
+def test_sha256_evict(digests, tmp_path):
+    files = []
+    for name in ["a", "b", "c"]:
+        files.append(tmp_path / name)
+        files[-1].write_bytes(name.encode())
+
+    def entry(path):
+        st = path.stat()
+        return checksums.cache_home() / "checksums" / f"{st.st_dev}-{st.st_ino}"
+
+    # Two digests fit
+    sha256(files[0], max_size=128)
+    sha256(files[1], max_size=128)
+    os.utime(entry(files[0]), (1, 1))
+    os.utime(entry(files[1]), (2, 2))
+    # Reading a digest from the disk marks it as used
+    digests.clear()
+    sha256(files[0], max_size=128)
+
+    sha256(files[2], max_size=128)
+    assert entry(files[0]).exists()
+    assert not entry(files[1]).exists()
+    assert entry(files[2]).exists()
+
+
+def test_embed(image):
+    digest = sha256(image)
+    definition = f"""actions:
+- deploy:
+    images:
+      kernel:
+        url: "file://{image}"
+      rootfs:
+        url: "https://example.com/rootfs.ext4"
+    overlays:
+      missing:
+        url: "file://{image}.missing"
+"""
+    assert embed(definition) == definition.replace(
+        f'url: "file://{image}"\n',
+        f'url: "file://{image}"\n        sha256sum: {digest}\n',
+    )
+
+
+def test_local_files(image):
+    st = image.stat()
+    files = local_files(
+        {"kernel": str(image), "overlays": [[f"file://{image}", "/"]], "dtb": None}
+    )
+    assert files == {str(image): [st.st_size, st.st_mtime_ns]}
+
+
+def test_job_checksums(image):
+    job = Job(device="qemu-arm64", kernel=str(image), checksums=True)
+    job.initialize()
+    data = job.render_dict()
+    kernel = data["actions"][0]["deploy"]["images"]["kernel"]
+    assert kernel["sha256sum"] == sha256(image)
+    job = Job(device="qemu-arm64", kernel=str(image))
+    job.initialize()
+    assert "sha256sum" not in job.render()
+
+
+def test_job_fingerprint(image):
+    job = Job(device="qemu-arm64", kernel=str(image), checksums=True)
+    fingerprint = job.fingerprint()
+    unchecked = Job(device="qemu-arm64", kernel=str(image)).fingerprint()
+    image.write_bytes(b"changed")
+    job = Job(device="qemu-arm64", kernel=str(image), checksums=True)
+    assert job.fingerprint() != fingerprint
+    assert Job(device="qemu-arm64", kernel=str(image)).fingerprint() != unchecked
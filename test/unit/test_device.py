@@ -8,11 +8,14 @@ from pathlib import Path
 
 import pytest
 
+import tuxlava.devices.qemu
 from tuxlava.__main__ import main
-from tuxlava.devices import Device
+from tuxlava.devices import DEVICES, Device
 from tuxlava.devices.fvp import FVPLAVA, FVPMorelloAndroid
-from tuxlava.devices.qemu import QemuArmv5
+from tuxlava.devices.qemu import QemuArmv5, QemuDevice
 from tuxlava.exceptions import InvalidArgument
+from tuxlava.tests import COMPATIBILITY, TESTS
+from tuxlava.tests.ltp import LTPTest
 
 BASE = (Path(__file__) / "..").resolve()
 DEVICE_DICTS = BASE / ".." / "device_dicts"
@@ -26,6 +29,38 @@ def test_select():
     with pytest.raises(InvalidArgument):
         Device.select("Hello")
 
+    with pytest.raises(InvalidArgument):
+        QemuDevice.select("fvp-lava")
+
+
+def test_list():
+    devices = Device.list()
+    assert [d.name for d in devices] == sorted(d.name for d in devices)
+    assert QemuArmv5 in devices
+    assert all(d.name.startswith("qemu-") for d in QemuDevice.list())
+    assert Device.select("nfs-juno-r2") not in Device.list(virtual_device=True)
+    assert QemuArmv5 in Device.list(virtual_device=True)
+
+
+def test_registry():
+    class QemuHello(QemuArmv5):
+        name = "qemu-hello"
+
+    class HelloTest(LTPTest):
+        name = "ltp-hello"
+        devices = ["qemu-hello"]
+
+    try:
+        assert Device.select("qemu-hello") == QemuHello
+        assert LTPTest.select("ltp-hello") == HelloTest
+        assert "ltp-hello" in LTPTest.list(device="qemu-hello")
+        assert "ltp-hello" not in LTPTest.list(device="qemu-arm64")
+        assert "ltp-hello" in LTPTest.list(virtual_device=True)
+    finally:
+        del DEVICES["qemu-hello"]
+        del TESTS["ltp-hello"]
+        COMPATIBILITY.clear()
+
 
 ARTEFACTS = [
     "bzImage.gz",
@@ -3567,7 +3602,7 @@ def test_failures(monkeypatch, mocker, capsys, tmpdir, args, error_str):
     assert error_str in error
 
 
-def test_qemu_arm64_extra_assets(tmpdir, mocker):
+def test_qemu_arm64_extra_assets(tmpdir, read_fat):
     device = Device.select("qemu-arm64")()
     tmp = Path(tmpdir)
 
@@ -3580,7 +3615,6 @@ def test_qemu_arm64_extra_assets(tmpdir, mocker):
     # 2/ enable_cca=True builds a FAT boot image
     kernel_file = tmp / "Image"
     kernel_file.write_bytes(b"kernel")
-    mocker.patch("subprocess.run")
 
     asset = device.extra_assets(
         tmpdir=tmp,
@@ -3589,10 +3623,10 @@ def test_qemu_arm64_extra_assets(tmpdir, mocker):
         tux_boot_args="",
     )
     assert asset == [f"file://{tmp / 'boot.img'}"]
-    assert (tmp / "boot" / "Image").read_bytes() == b"kernel"
-    assert (tmp / "boot" / "startup.nsh").read_text(encoding="utf-8") == (
-        "Image root=/dev/vda rw console=ttyAMA0 earlycon"
-    )
+    assert read_fat(tmp / "boot.img") == {
+        "IMAGE": b"kernel",
+        "startup.nsh": b"Image root=/dev/vda rw console=ttyAMA0 earlycon",
+    }
 
     # 3/ tux_boot_args is appended to the kernel cmdline
     asset = device.extra_assets(
@@ -3601,8 +3635,8 @@ def test_qemu_arm64_extra_assets(tmpdir, mocker):
         enable_cca=True,
         tux_boot_args="debug",
     )
-    assert (tmp / "boot" / "startup.nsh").read_text(encoding="utf-8") == (
-        "Image root=/dev/vda debug rw console=ttyAMA0 earlycon"
+    assert read_fat(tmp / "boot.img")["startup.nsh"] == (
+        b"Image root=/dev/vda debug rw console=ttyAMA0 earlycon"
     )
 
     # 4/ gzipped kernel is decompressed
@@ -3615,39 +3649,39 @@ def test_qemu_arm64_extra_assets(tmpdir, mocker):
         enable_cca=True,
         tux_boot_args="",
     )
-    assert (tmp / "boot" / "Image").read_bytes() == b"unzipped"
+    assert read_fat(tmp / "boot.img")["IMAGE"] == b"unzipped"
 
 
-@pytest.mark.parametrize(
-    "missing,side_effect",
-    [
-        (
-            "mformat",
-            FileNotFoundError(2, "No such file or directory", "mformat"),
-        ),
-        (
-            "mcopy",
-            [None, FileNotFoundError(2, "No such file or directory", "mcopy")],
-        ),
-    ],
-)
-def test_qemu_arm64_extra_assets_mtools_missing(tmpdir, mocker, missing, side_effect):
+def test_qemu_arm64_extra_assets_cache_dir(tmpdir, mocker, read_fat):
     device = Device.select("qemu-arm64")()
     tmp = Path(tmpdir)
-
     kernel_file = tmp / "Image"
     kernel_file.write_bytes(b"kernel")
-    mocker.patch("subprocess.run", side_effect=side_effect)
+    kwargs = {
+        "kernel": f"file://{kernel_file}",
+        "enable_cca": True,
+        "tux_boot_args": "",
+        "cache_dir": tmp / "cache",
+    }
+    for job in ["job-1", "job-2"]:
+        (tmp / job).mkdir()
+    boot_disk = mocker.spy(tuxlava.devices.qemu, "boot_disk")
+
+    device.extra_assets(tmpdir=tmp / "job-1", **kwargs)
+    device.extra_assets(tmpdir=tmp / "job-2", **kwargs)
+    assert boot_disk.call_count == 1
+    assert read_fat(tmp / "job-2" / "boot.img")["IMAGE"] == b"kernel"
+
+    # The boot disk depends on the command line
+    device.extra_assets(tmpdir=tmp / "job-2", **{**kwargs, "tux_boot_args": "debug"})
+    assert boot_disk.call_count == 2
+    assert len(list((tmp / "cache" / "bootdisks").glob("*/boot.img"))) == 2
 
-    with pytest.raises(InvalidArgument) as exc:
-        device.extra_assets(
-            tmpdir=tmp,
-            kernel=f"file://{kernel_file}",
-            enable_cca=True,
-            tux_boot_args="",
-        )
-    assert "mtools" in str(exc.value)
-    assert missing in str(exc.value)
+    # The least recently used boot disks are removed
+    mocker.patch("tuxlava.devices.qemu.BOOT_DISKS_SIZE", 1)
+    device.extra_assets(tmpdir=tmp / "job-1", **kwargs)
+    assert len(list((tmp / "cache" / "bootdisks").glob("*/boot.img"))) == 1
+    assert read_fat(tmp / "job-1" / "boot.img")["IMAGE"] == b"kernel"
 
 
 def test_fvp_aemva_extra_assets(tmpdir):
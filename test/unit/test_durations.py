@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+import yaml
+
+from tuxlava.__main__ import main
+from tuxlava.durations import DurationStore, parse_results, percentile
+from tuxlava.exceptions import InvalidArgument
+
+
+def results(**durations):
+    data = [
+        {"suite": "lava", "name": "job", "metadata": {"duration": "1000.0"}},
+        {"suite": "1_ltp-smoke", "name": "abort01", "result": "pass"},
+    ]
+    for index, (name, duration) in enumerate(durations.items()):
+        data.append(
+            {
+                "suite": "lava",
+                "name": f"{index}_{name.replace('_', '-')}",
+                "metadata": {"duration": str(duration)},
+            }
+        )
+    return yaml.dump(data)
+
+
+def test_percentile():
+    assert percentile([3, 1, 2], 95) == 3
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile([5], 0) == 5
+
+
+def test_parse_results():
+    assert parse_results(results(ltp_smoke=120.5, kselftest_ipc=30)) == {
+        "ltp-smoke": 120.5,
+        "kselftest-ipc": 30.0,
+    }
+    assert parse_results(json.dumps([{"suite": "lava", "name": "0_unknown"}])) == {}
+    with pytest.raises(InvalidArgument):
+        parse_results("{}")
+
+
+def test_store(tmp_path):
+    store = DurationStore(tmp_path / "durations.json")
+    assert store.timeout("qemu-arm64", "ltp-smoke") is None
+    for seconds in [60, 70, 80, 90]:
+        store.ingest("qemu-arm64", results(ltp_smoke=seconds))
+    assert store.timeout("qemu-arm64", "ltp-smoke") is None
+    store.ingest("qemu-arm64", results(ltp_smoke=600))
+    assert store.timeout("qemu-arm64", "ltp-smoke") == 12
+    store.save()
+
+    store = DurationStore(tmp_path / "durations.json")
+    assert store.samples("qemu-arm64", "ltp-smoke") == [60, 70, 80, 90, 600]
+    assert store.timeouts("qemu-arm64") == {"ltp-smoke": 12}
+    assert store.timeouts("qemu-arm64", {"ltp-smoke": 3, "boot": 2}) == {
+        "ltp-smoke": 3,
+        "boot": 2,
+    }
+    assert store.timeouts("qemu-x86_64") == {}
+
+    for _ in range(200):
+        store.add("qemu-arm64", "ltp-smoke", 1)
+    assert len(store.samples("qemu-arm64", "ltp-smoke")) == 100
+    assert store.timeout("qemu-arm64", "ltp-smoke") == 1
+
+
+def test_store_default_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert DurationStore().path == tmp_path / "tuxlava" / "durations.json"
+
+
+def test_main_durations(monkeypatch, capsys, tmp_path):
+    store = tmp_path / "durations.json"
+    files = []
+    for index in range(5):
+        files.append(tmp_path / f"results-{index}.yaml")
+        files[-1].write_text(results(ltp_syscalls=300 + index * 10))
+
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        ["tuxlava", "--device", "qemu-arm64", "--durations", str(store)]
+        + ["--record-durations"]
+        + [str(f) for f in files],
+    )
+    assert main() == 0
+    assert (
+        len(json.loads(store.read_text())["durations"]["qemu-arm64"]["ltp-syscalls"])
+        == 5
+    )
+
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        ["tuxlava", "--device", "qemu-arm64", "--durations", str(store)]
+        + ["--tests", "ltp-syscalls", "ltp-smoke", "--timeouts", "auto", "boot=3"],
+    )
+    main()
+    job = yaml.safe_load(capsys.readouterr().out)
+    tests = [a["test"] for a in job["actions"] if "test" in a]
+    assert [t["timeout"]["minutes"] for t in tests] == [7, 5]
+    assert job["timeouts"]["job"]["minutes"] == 15 + 3 + 7 + 5
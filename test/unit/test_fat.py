@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+
+import pytest
+
+from tuxlava.fat import MAX_CLUSTERS, MIN_CLUSTERS, geometry, short_name, write_image
+
+
+def test_short_name():
+    assert short_name("Image") == (b"IMAGE      ", 0)
+    assert short_name("startup.nsh") == (b"STARTUP NSH", 0x18)
+    assert short_name("BOOT.efi") == (b"BOOT    EFI", 0x10)
+    for name in ["", "toolongname", "a.long", "a-b", "a.b.c"]:
+        with pytest.raises(ValueError):
+            short_name(name)
+
+
+@pytest.mark.parametrize("sectors", [4182, 16384, 65536, 200000, 4000000])
+def test_geometry(sectors):
+    cluster, fat = geometry(sectors)
+    clusters = (sectors - 1 - 32 - 2 * fat) // cluster
+    assert MIN_CLUSTERS <= clusters <= MAX_CLUSTERS
+    assert (clusters + 2) * 2 <= fat * 512
+    assert cluster == 1 or geometry(sectors // 2)[0] < cluster
+
+    with pytest.raises(ValueError):
+        geometry(64 * 70000)
+
+
+def test_write_image(tmp_path, read_fat):
+    kernel = os.urandom(3 * 1024 * 1024 + 5)
+    files = {"Image": kernel, "startup.nsh": b"Image rw", "empty": b""}
+    path = tmp_path / "boot.img"
+    write_image(path, [(k, len(v), io.BytesIO(v)) for k, v in files.items()])
+    assert read_fat(path) == {"IMAGE": kernel, "startup.nsh": b"Image rw", "empty": b""}
+    # The free space is left sparse
+    assert path.stat().st_size >= len(kernel) + 4 * 1024 * 1024
+    assert path.stat().st_blocks * 512 < path.stat().st_size
+
+
+def test_write_image_size_mismatch(tmp_path):
+    with pytest.raises(ValueError):
+        write_image(tmp_path / "boot.img", [("Image", 10, io.BytesIO(b"kernel"))])
+    with pytest.raises(ValueError):
+        write_image(tmp_path / "boot.img", [("Image", 2, io.BytesIO(b"kernel"))])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import importlib
+import os
+import pkgutil
+import subprocess
+import sys
+from pathlib import Path
+
+import tuxlava.devices
+import tuxlava.tests
+from tuxlava import index
+from tuxlava.devices import DEVICES, Device
+from tuxlava.tests import TESTS
+
+HEADER = """# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+# Generated from the device and test classes, do not edit.
+# Run "TUXLAVA_RENDER=1 make test" to update it.
+"""
+
+
+def classes(package, registry):
+    for module in pkgutil.iter_modules(package.__path__):
+        importlib.import_module(f"{package.__name__}.{module.name}")
+    prefix = f"{package.__name__}."
+    return {
+        name: cls
+        for name, cls in sorted(registry.items())
+        if cls.__module__.startswith(prefix)
+    }
+
+
+def render():
+    lines = [HEADER, "# name: (module, real_device)", "DEVICES = {"]
+    for name, cls in classes(tuxlava.devices, DEVICES).items():
+        module = cls.__module__.split(".")[-1]
+        lines.append(f'    "{name}": ("{module}", {cls.real_device}),')
+    lines.append("}")
+
+    patterns = []
+    tests = []
+    for name, cls in classes(tuxlava.tests, TESTS).items():
+        if cls.devices not in patterns:
+            patterns.append(cls.devices)
+        module = cls.__module__.split(".")[-1]
+        tests.append(f'    "{name}": ("{module}", {patterns.index(cls.devices)}),')
+
+    lines += ["", "# device patterns supported by the tests", "PATTERNS = ["]
+    for pats in patterns:
+        lines += ["    ["] + [f'        "{p}",' for p in pats] + ["    ],"]
+    lines += ["]", "", "# name: (module, index in PATTERNS)", "TESTS = {"]
+    lines += tests + ["}"]
+    return "\n".join(lines) + "\n"
+
+
+def test_index():
+    output = render()
+    if os.environ.get("TUXLAVA_RENDER"):
+        Path(index.__file__).write_text(output, encoding="utf-8")
+    assert output == Path(index.__file__).read_text(encoding="utf-8")
+
+
+def test_lazy_import():
+    script = """
+import sys
+from tuxlava.jobs import Job
+job = Job(device="qemu-arm64", tests=["ltp-smoke"])
+job.initialize()
+job.render()
+print(" ".join(m for m in sys.modules if m.startswith("tuxlava.")))
+"""
+    out = subprocess.check_output(
+        [sys.executable, "-c", script],
+        cwd=Path(tuxlava.__file__).parent.parent,
+        text=True,
+    )
+    modules = out.split()
+    assert "tuxlava.devices.qemu" in modules
+    assert "tuxlava.tests.ltp" in modules
+    assert "tuxlava.devices.fvp" not in modules
+    assert "tuxlava.tests.kselftest" not in modules
+
+
+def test_names():
+    assert Device.names() == [d.name for d in Device.list()]
+    assert Device.names(virtual_device=True) == [
+        d.name for d in Device.list(virtual_device=True)
+    ]
+    assert tuxlava.tests.Test.list() == sorted(classes(tuxlava.tests, TESTS))
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import pytest
+import yaml
+
+from tuxlava.__main__ import main
+from tuxlava.jobs import Job, render_many, render_one
+
+
+def render(**kwargs):
+    job = Job(**kwargs)
+    job.initialize()
+    return job.render()
+
+
+def test_job_does_not_share_defaults(tmp_path):
+    job = Job(device="qemu-arm64", commands=["ls"], tmpdir=tmp_path)
+    job.initialize()
+    assert job.tests[0].name == "commands"
+    assert Job(device="qemu-arm64").tests == []
+
+
+def test_render_one(tmp_path):
+    spec = {"device": "qemu-arm64", "tests": ["ltp-smoke"], "tmpdir": str(tmp_path)}
+    result = render_one(spec)
+    assert result["spec"] is spec
+    assert result["error"] is None
+    assert result["definition"] == render(
+        device="qemu-arm64", tests=["ltp-smoke"], tmpdir=tmp_path
+    )
+
+    result = render_one({"device": "qemu-arm64", "tests": ["unknown"]})
+    assert result["definition"] is None
+    assert result["error"] == "Unknown test unknown"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_many(tmp_path, workers):
+    specs = [
+        {"device": device, "tests": tests, "tmpdir": str(tmp_path)}
+        for device in ["qemu-arm64", "qemu-x86_64"]
+        for tests in [[], ["ltp-smoke"], ["kselftest-ipc"]]
+    ]
+    results = render_many(specs, workers=workers)
+    assert [r["spec"] for r in results] == specs
+    for spec, result in zip(specs, results):
+        assert result["error"] is None
+        assert result["definition"] == render(
+            device=spec["device"], tests=spec["tests"], tmpdir=tmp_path
+        )
+
+
+def test_main_batch(monkeypatch, capsys, tmp_path):
+    specs = [{"device": "qemu-arm64", "tmpdir": str(tmp_path)}, {"device": "hello"}]
+    monkeypatch.setattr("tuxlava.__main__.sys.argv", ["tuxlava", "--batch", "-"])
+    monkeypatch.setattr("sys.stdin", io.StringIO(json.dumps(specs)))
+    assert main() == 1
+    results = json.loads(capsys.readouterr().out)
+    assert [r["spec"] for r in results] == specs
+    assert results[0]["definition"].startswith('device_type: "qemu"')
+    assert results[1]["error"].startswith("Unknown device hello")
+
+
+def test_main_batch_invalid(monkeypatch, capsys):
+    monkeypatch.setattr("tuxlava.__main__.sys.argv", ["tuxlava", "--batch", "-"])
+    monkeypatch.setattr("sys.stdin", io.StringIO("{}"))
+    with pytest.raises(SystemExit):
+        main()
+    assert "expecting a list of job specs" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "device,tests", [("qemu-arm64", ["ltp-smoke", "kselftest-ipc"]), ("qemu-i386", [])]
+)
+def test_iter_render(tmp_path, device, tests):
+    job = Job(device=device, tests=tests, tmpdir=tmp_path)
+    job.initialize()
+    chunks = list(job.iter_render())
+    assert len(chunks) > 1
+    assert "".join(chunks) == job.render()
+
+    stream = io.StringIO()
+    job.render_to(stream)
+    assert stream.getvalue() == job.render()
+
+
+def test_iter_render_definition(tmp_path):
+    # Devices only implementing definition()
+    job_definition = tmp_path / "definition.yaml"
+    job_definition.write_text("job_name: hello\n", encoding="utf-8")
+    job = Job(device="fvp-lava", job_definition=str(job_definition), tmpdir=tmp_path)
+    job.initialize()
+    assert list(job.iter_render()) == ["job_name: hello\n"]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"device": "qemu-arm64", "tests": ["ltp-smoke", "kselftest-ipc"]},
+        {"device": "fvp-aemva", "tests": ["ltp-smoke"]},
+        {"device": "nfs-x86_64", "kernel": "https://example.com/bzImage"},
+    ],
+)
+def test_render_dict(tmp_path, kwargs):
+    job = Job(tmpdir=tmp_path, **kwargs)
+    job.initialize()
+    assert job.render_dict() == yaml.safe_load(job.render())
+
+
+def test_render_dict_fvp_lava(tmp_path):
+    job_definition = tmp_path / "definition.yaml"
+    job_definition.write_text("job_name: hello\n", encoding="utf-8")
+    job = Job(device="fvp-lava", job_definition=str(job_definition), tmpdir=tmp_path)
+    job.initialize()
+    data = job.render_dict()
+    assert data == {"job_name": "hello"}
+    data["job_name"] = "world"
+    assert job.render_dict() == {"job_name": "hello"}
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_main_format_json(monkeypatch, capsys, tmp_path, cache):
+    args = ["tuxlava", "--device", "qemu-arm64", "--format", "json"]
+    if cache:
+        args += ["--cache-dir", str(tmp_path)]
+    monkeypatch.setattr("tuxlava.__main__.sys.argv", args)
+    main()
+    data = json.loads(capsys.readouterr().out)
+    assert data["device_type"] == "qemu"
+    assert data["actions"][0]["deploy"]["to"] == "tmpfs"
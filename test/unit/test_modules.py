@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+import io
+import tarfile
+
+import pytest
+
+from tuxlava import modules
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.jobs import Job
+from tuxlava.modules import closure, module_name, parse_dep, slim, wanted_modules
+from tuxlava.tests import Test as LavaTest
+
+DEP = b"""kernel/drivers/block/loop.ko:
+kernel/fs/btrfs/btrfs.ko.xz: kernel/lib/raid6/raid6_pq.ko.xz kernel/crypto/xor.ko
+kernel/lib/raid6/raid6_pq.ko.xz:
+kernel/crypto/xor.ko:
+kernel/fs/fuse/fuse.ko:
+kernel/drivers/net/dummy.ko:
+"""
+
+FILES = {
+    "./lib/modules/6.1/modules.dep": DEP,
+    "./lib/modules/6.1/modules.builtin": b"kernel/fs/ext4/ext4.ko\n",
+    "./lib/modules/6.1/modules.alias": b"alias fs-btrfs btrfs\n",
+    "./lib/modules/6.1/kernel/drivers/block/loop.ko": b"loop",
+    "./lib/modules/6.1/kernel/fs/btrfs/btrfs.ko.xz": b"btrfs",
+    "./lib/modules/6.1/kernel/lib/raid6/raid6_pq.ko.xz": b"raid6",
+    "./lib/modules/6.1/kernel/crypto/xor.ko": b"xor",
+    "./lib/modules/6.1/kernel/fs/fuse/fuse.ko": b"fuse",
+    "./lib/modules/6.1/kernel/drivers/net/dummy.ko": b"dummy",
+}
+
+
+def make_modules(path, files=FILES):
+    with tarfile.open(path, "w:xz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return f"file://{path}"
+
+
+def members(url):
+    with tarfile.open(url[len("file://") :]) as tar:
+        return sorted(m.name.split("/", 4)[-1] for m in tar)
+
+
+def test_module_name():
+    assert module_name("kernel/fs/btrfs/btrfs.ko.xz") == "btrfs"
+    assert module_name("kernel/drivers/net/e1000-e.ko") == "e1000_e"
+
+
+def test_closure():
+    deps = parse_dep(DEP.decode())
+    paths, unknown = closure(deps, ["btrfs", "missing"])
+    assert paths == {
+        "kernel/fs/btrfs/btrfs.ko.xz",
+        "kernel/lib/raid6/raid6_pq.ko.xz",
+        "kernel/crypto/xor.ko",
+    }
+    assert unknown == ["missing"]
+
+
+def test_wanted_modules():
+    ltp = LavaTest.select("ltp-smoke")(None)
+    assert wanted_modules("none", [ltp]) == []
+    assert wanted_modules("auto", []) == []
+    assert "btrfs" in wanted_modules("auto", [ltp])
+    assert wanted_modules("auto", [ltp, LavaTest.select("ltp-fs")(None)]) is None
+    assert wanted_modules("loop, fuse,loop", [ltp]) == ["fuse", "loop"]
+
+
+def test_slim(tmp_path, mocker):
+    url = make_modules(tmp_path / "modules.tar.xz")
+    write = mocker.spy(modules, "write")
+    open_tar = mocker.spy(modules, "open_tar")
+
+    result = slim(url, ["btrfs", "ext4"], tmp_path / "cache")
+    # The modules are downloaded and decompressed once
+    assert open_tar.call_count == 1
+    assert result.startswith(f"file://{tmp_path / 'cache' / 'modules'}/")
+    assert members(result) == [
+        "kernel/crypto/xor.ko",
+        "kernel/fs/btrfs/btrfs.ko.xz",
+        "kernel/lib/raid6/raid6_pq.ko.xz",
+        "modules.alias",
+        "modules.builtin",
+        "modules.dep",
+    ]
+
+    # Slim tarballs are cached by the content of the modules and the names
+    assert slim(url, ["ext4", "btrfs"], tmp_path / "cache") == result
+    assert write.call_count == 1
+    assert slim(url, ["loop"], tmp_path / "cache") != result
+    assert write.call_count == 2
+
+
+def test_slim_unknown(tmp_path):
+    url = make_modules(tmp_path / "modules.tar.xz")
+    with pytest.raises(InvalidArgument, match="missing"):
+        slim(url, ["loop", "missing"], tmp_path / "cache")
+    result = slim(url, ["loop", "missing"], tmp_path / "cache", strict=False)
+    assert "kernel/drivers/block/loop.ko" in members(result)
+
+    url = make_modules(tmp_path / "other.tar.xz", {"lib/modules/6.1/a.ko": b"a"})
+    with pytest.raises(InvalidArgument, match="modules.dep"):
+        slim(url, ["a"], tmp_path / "cache")
+
+    broken = tmp_path / "broken.tar.xz"
+    broken.write_bytes(b"broken")
+    with pytest.raises(InvalidArgument):
+        slim(f"file://{broken}", ["a"], tmp_path / "cache")
+
+
+def test_job_slim_modules(tmp_path):
+    url = make_modules(tmp_path / "modules.tar.xz")
+    job = Job(
+        device="qemu-arm64",
+        modules=url,
+        tests=["ltp-smoke"],
+        cache_dir=tmp_path / "cache",
+        slim_modules="auto",
+    )
+    job.initialize()
+    assert job.modules[0].startswith(f"file://{tmp_path / 'cache' / 'modules'}/")
+    assert job.modules[0] in job.extra_assets
+    assert "fuse.ko" in str(members(job.modules[0]))
+    assert "dummy.ko" not in str(members(job.modules[0]))
+
+    job = Job(device="qemu-arm64", modules=url, tests=["vdso"], slim_modules="auto")
+    job.initialize()
+    assert job.modules is None
+    assert "modules:" not in job.render()
+
+    # Tests that do not list their modules keep all of them
+    job = Job(device="qemu-arm64", modules=url, tests=["ltp-fs"], slim_modules="auto")
+    job.initialize()
+    assert job.modules[0] == url
+
+    with pytest.raises(InvalidArgument, match="--cache-dir"):
+        Job(device="qemu-arm64", modules=url, slim_modules="loop").initialize()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+import io
+import shutil
+import subprocess
+import tarfile
+
+import pytest
+
+from tuxlava import overlays
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.jobs import Job
+from tuxlava.overlays import merge, relocate
+
+
+def make_tar(path, files, mode="w:gz", links=None):
+    with tarfile.open(path, mode) as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        for name, target in (links or {}).items():
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.LNKTYPE
+            info.linkname = target
+            tar.addfile(info)
+    return f"file://{path}"
+
+
+def read_tar(url):
+    path = url[len("file://") :]
+    if path.endswith(".zst"):
+        data = subprocess.run(
+            ["zstd", "-d", "-c", path], check=True, capture_output=True
+        ).stdout
+        tar = tarfile.open(fileobj=io.BytesIO(data))
+    else:
+        tar = tarfile.open(path)
+    with tar:
+        return {
+            m.name: tar.extractfile(m).read() if m.isreg() else m.linkname for m in tar
+        }
+
+
+@pytest.fixture
+def no_zstd(mocker):
+    return mocker.patch("tuxlava.overlays.shutil.which", return_value=None)
+
+
+def test_relocate():
+    assert relocate("./lib/modules/6.1", "/") == "lib/modules/6.1"
+    assert relocate("lib/modules", "/usr/") == "usr/lib/modules"
+    assert relocate(".", "/opt/kselftests/") == "opt/kselftests"
+    assert relocate("/etc/passwd", "/usr/") == "usr/etc/passwd"
+    assert relocate("lib/../bin", "/usr/") == "usr/bin"
+    for name in ["../etc/passwd", "lib/../../etc/passwd", "/../etc"]:
+        with pytest.raises(tarfile.TarError):
+            relocate(name, "/usr/")
+
+
+def test_merge_escape(tmp_path, no_zstd):
+    escape = make_tar(tmp_path / "escape.tar.gz", {"../etc/passwd": b"root"})
+    overlay = make_tar(tmp_path / "overlay.tar.gz", {"bin/tool": b"tool"})
+    with pytest.raises(InvalidArgument, match="outside of /opt/"):
+        merge(
+            [("overlay-00", overlay, "/"), ("overlay-01", escape, "/opt/")],
+            tmp_path / "cache",
+        )
+
+
+def test_merge(tmp_path, no_zstd, mocker):
+    modules = make_tar(
+        tmp_path / "modules.tar.xz",
+        {"./lib/modules/a.ko": b"a"},
+        mode="w:xz",
+        links={"./lib/modules/b.ko": "./lib/modules/a.ko"},
+    )
+    overlay = make_tar(tmp_path / "overlay.tar.gz", {"bin/tool": b"tool"})
+    script = f"file://{tmp_path / 'run.sh'}"
+    (tmp_path / "run.sh").write_text("true")
+    inputs = [
+        ("modules", modules, "/usr/"),
+        ("overlay-00", overlay, "/"),
+        ("overlay-01", script, "/"),
+    ]
+    write = mocker.spy(overlays, "write")
+
+    result = merge(inputs, tmp_path / "cache")
+    assert len(result) == 2
+    assert result[1] == inputs[2]
+    name, url, path = result[0]
+    assert (name, path) == ("overlays", "/")
+    assert url.endswith("/overlay.tar.gz")
+    assert read_tar(url) == {
+        "usr/lib/modules/a.ko": b"a",
+        "usr/lib/modules/b.ko": "usr/lib/modules/a.ko",
+        "bin/tool": b"tool",
+    }
+
+    # Merged overlays are cached by the content of the inputs
+    assert merge(inputs, tmp_path / "cache") == result
+    assert write.call_count == 1
+    make_tar(tmp_path / "overlay.tar.gz", {"bin/tool": b"new"})
+    assert merge(inputs, tmp_path / "cache") != result
+    assert write.call_count == 2
+
+
+def test_merge_order(tmp_path, no_zstd):
+    # Overlays that are not tarballs stay between the tarballs
+    tars = [
+        make_tar(tmp_path / f"{i}.tar.gz", {"etc/config": str(i).encode()})
+        for i in range(4)
+    ]
+    script = f"file://{tmp_path / 'config'}"
+    (tmp_path / "config").write_text("script")
+    inputs = [
+        ("overlay-00", tars[0], "/"),
+        ("overlay-01", script, "/etc/"),
+        ("overlay-02", tars[1], "/"),
+    ]
+    assert merge(inputs, tmp_path / "cache") == inputs
+
+    inputs = [
+        ("overlay-00", tars[0], "/"),
+        ("overlay-01", tars[1], "/"),
+        ("overlay-02", script, "/etc/"),
+        ("overlay-03", tars[2], "/"),
+        ("overlay-04", tars[3], "/"),
+    ]
+    result = merge(inputs, tmp_path / "cache")
+    assert [name for name, _, _ in result] == ["overlays", "overlay-02", "overlays"]
+    assert read_tar(result[0][1]) == {"etc/config": b"1"}
+    assert read_tar(result[2][1]) == {"etc/config": b"3"}
+
+
+def test_merge_single(tmp_path):
+    modules = make_tar(tmp_path / "modules.tar.gz", {"lib/a.ko": b"a"})
+    inputs = [("modules", modules, "/")]
+    assert merge(inputs, tmp_path / "cache") == inputs
+    assert not (tmp_path / "cache").exists()
+
+
+@pytest.mark.skipif(shutil.which("zstd") is None, reason="zstd is not installed")
+def test_merge_zstd(tmp_path):
+    first = tmp_path / "first.tar"
+    make_tar(first, {"a": b"a"}, mode="w")
+    subprocess.run(["zstd", "-q", str(first)], check=True)
+    second = make_tar(tmp_path / "second.tar.gz", {"b": b"b"})
+    result = merge(
+        [("modules", f"file://{first}.zst", "/"), ("overlay-00", second, "/")],
+        tmp_path / "cache",
+    )
+    assert result[0][1].endswith("/overlay.tar.zst")
+    assert read_tar(result[0][1]) == {"a": b"a", "b": b"b"}
+
+
+def test_merge_remote(tmp_path, no_zstd, mocker, get, response):
+    head = mocker.patch("requests.Session.head")
+    head.return_value.status_code = 200
+    head.return_value.headers = {"ETag": '"v1"'}
+    data = tmp_path / "modules.tar.gz"
+    make_tar(data, {"lib/a.ko": b"a"})
+    response.status_code = 200
+    response.raw = io.BytesIO(data.read_bytes())
+    overlay = make_tar(tmp_path / "overlay.tar.gz", {"bin/tool": b"tool"})
+
+    result = merge(
+        [
+            ("modules", "https://example.com/modules.tar.gz", "/"),
+            ("overlay-00", overlay, "/"),
+        ],
+        tmp_path / "cache",
+        secrets={"token": "secret"},
+    )
+    assert read_tar(result[0][1]) == {"lib/a.ko": b"a", "bin/tool": b"tool"}
+    assert get.call_args.kwargs["headers"] == {"Authorization": "secret"}
+
+    response.status_code = 404
+    head.return_value.headers = {"ETag": '"v2"'}
+    with pytest.raises(InvalidArgument):
+        merge(
+            [
+                ("modules", "https://example.com/modules.tar.gz", "/"),
+                ("overlay-00", overlay, "/"),
+            ],
+            tmp_path / "cache",
+        )
+
+
+def test_merge_invalid(tmp_path, no_zstd):
+    broken = tmp_path / "broken.tar.gz"
+    broken.write_bytes(b"broken")
+    overlay = make_tar(tmp_path / "overlay.tar.gz", {"bin/tool": b"tool"})
+    with pytest.raises(InvalidArgument):
+        merge(
+            [("overlay-00", overlay, "/"), ("overlay-01", f"file://{broken}", "/")],
+            tmp_path / "cache",
+        )
+    assert not list((tmp_path / "cache").glob("overlays/*/*.tar.*"))
+
+
+def test_job_merge_overlays(tmp_path, no_zstd):
+    modules = make_tar(tmp_path / "modules.tar.xz", {"lib/a.ko": b"a"}, mode="w:xz")
+    overlay = make_tar(tmp_path / "overlay.tar.gz", {"bin/tool": b"tool"})
+    job = Job(
+        device="qemu-arm64",
+        modules=modules,
+        overlays=[[overlay, "/"]],
+        cache_dir=tmp_path / "cache",
+        merge_overlays=True,
+    )
+    job.initialize()
+    assert [name for name, _, _ in job.overlays] == ["overlays"]
+    assert job.overlays[0][1] in job.extra_assets
+    definition = job.render()
+    assert "overlay-00" not in definition
+    assert "modules:" not in definition
+
+    with pytest.raises(InvalidArgument, match="--cache-dir"):
+        Job(device="qemu-arm64", merge_overlays=True).initialize()
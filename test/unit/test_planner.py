@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+
+import pytest
+import yaml
+
+from tuxlava.__main__ import main
+from tuxlava.exceptions import InvalidArgument, MissingArgument
+from tuxlava.jobs import Job
+from tuxlava.planner import expand, overhead, pack, plan
+
+
+def test_pack():
+    tests = [("a", 10), ("b", 50), ("c", 30), ("d", 20), ("e", 40)]
+    assert pack(tests, 100, 40) == [["a", "b"], ["c"], ["d", "e"]]
+    assert pack(tests, 200, 40) == [["a", "b", "c", "d", "e"]]
+    assert pack(tests, 140, 40) == [["a", "b", "e"], ["c", "d"]]
+    assert pack([], 100, 40) == []
+
+    with pytest.raises(InvalidArgument) as exc:
+        pack(tests, 60, 40)
+    assert exc.match("Test 'b' \\(50 minutes\\) does not fit")
+
+
+def test_expand():
+    assert expand("qemu-arm64", ["ltp-smoke", "ltp-s*"])[0] == "ltp-smoke"
+    tests = expand("qemu-x86_64", ["kselftest-*"])
+    assert "kselftest-ipc" in tests
+    assert "kselftest-arm64" not in tests
+
+    with pytest.raises(InvalidArgument):
+        expand("qemu-x86_64", ["kselftest-arm64"])
+
+
+def test_overhead(tmp_path):
+    assert overhead(device="qemu-arm64", tmpdir=tmp_path) == 30
+    assert overhead(device="qemu-arm64", timeouts={"boot": 5}, tmpdir=tmp_path) == 20
+    assert overhead(device="nfs-x86_64", tmpdir=tmp_path) > 30
+
+
+def test_plan(tmp_path):
+    kwargs = {"device": "qemu-arm64", "tmpdir": tmp_path}
+    assert plan(100, **kwargs) == [kwargs]
+
+    specs = plan(
+        100,
+        tests=["ltp-controllers", "ltp-smoke", "ltp-syscalls"],
+        timeouts={"ltp-controllers": 40},
+        **kwargs,
+    )
+    assert [s["tests"] for s in specs] == [
+        ["ltp-controllers"],
+        ["ltp-smoke", "ltp-syscalls"],
+    ]
+    assert all(s["device"] == "qemu-arm64" for s in specs)
+
+    with pytest.raises(MissingArgument):
+        plan(100, device=None, tests=["ltp-smoke"])
+
+
+def test_main_max_job_timeout(monkeypatch, capsys, tmp_path):
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        [
+            "tuxlava",
+            "--device",
+            "qemu-arm64",
+            "--tests",
+            "ltp-controllers",
+            "ltp-syscalls",
+            "ltp-smoke",
+            "--max-job-timeout",
+            "120",
+        ],
+    )
+    main()
+    jobs = list(yaml.safe_load_all(capsys.readouterr().out))
+    assert [j["job_name"] for j in jobs] == [
+        "tuxlava@qemu-arm64: ltp-controllers",
+        "tuxlava@qemu-arm64: ltp-syscalls, ltp-smoke",
+    ]
+    assert all(j["timeouts"]["job"]["minutes"] <= 120 for j in jobs)
+
+
+def test_main_max_job_timeout_patterns(monkeypatch, capsys):
+    args = ["tuxlava", "--device", "qemu-arm64", "--tests", "ltp-s*"]
+    monkeypatch.setattr("tuxlava.__main__.sys.argv", args)
+    with pytest.raises(SystemExit):
+        main()
+    assert "invalid choice: 'ltp-s*'" in capsys.readouterr().err
+
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv", args + ["--max-job-timeout", "120"]
+    )
+    main()
+    jobs = list(yaml.safe_load_all(capsys.readouterr().out))
+    tests = [t for j in jobs for t in j["job_name"].split(": ")[1].split(", ")]
+    assert "ltp-smoke" in tests and "ltp-syscalls" in tests
+
+
+FASTBOOT_AOSP = {
+    "LKFT_BUILD_CONFIG": "lkft-db845c-aosp-master-mainline-gki",
+    "TUXSUITE_BAKE_VENDOR_DOWNLOAD_URL": "https://example.com/vendor/",
+    "BUILD_REFERENCE_IMAGE_GZ_URL": "https://example.com/Image.gz",
+}
+FVP_MORELLO = {
+    name: f"https://example.com/{name}.bin"
+    for name in ["ap_romfw", "mcp_fw", "mcp_romfw", "scp_fw", "scp_romfw", "fip"]
+    + ["rootfs"]
+}
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"device": "qemu-arm64"},
+        {"device": "nfs-x86_64"},
+        {"device": "fastboot-dragonboard-845c"},
+        {"device": "fastboot-aosp-dragonboard-845c", "parameters": FASTBOOT_AOSP},
+        {"device": "flasher-qrb2210-rb1", "rootfs": "https://example.com/rootfs"},
+        {"device": "fvp-aemva"},
+        {"device": "fvp-morello-android", **FVP_MORELLO},
+        {
+            "device": "avh-rpi4b",
+            "kernel": "https://example.com/Image",
+            "dtb": "https://example.com/devicetree",
+            "rootfs": "https://example.com/rootfs.ext4",
+            "secrets": {"avh_api_token": "token"},
+        },
+        {
+            "device": "ssh-device",
+            "ssh_host": "host",
+            "ssh_user": "user",
+            "ssh_identity_file": "/id",
+        },
+    ],
+)
+@pytest.mark.parametrize("timeouts", [{}, {"deploy": 7, "boot": 4}])
+def test_overhead_devices(tmp_path, mocker, kwargs, timeouts):
+    initialize = mocker.spy(Job, "initialize")
+    minutes = overhead(**kwargs, timeouts=timeouts)
+    initialize.assert_not_called()
+
+    # The job template computes the same timeout
+    job = Job(**kwargs, timeouts=timeouts, tmpdir=tmp_path)
+    job.initialize()
+    assert minutes == job.render_dict()["timeouts"]["job"]["minutes"]
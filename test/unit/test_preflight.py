@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+import tempfile
+
+import pytest
+
+from tuxlava.__main__ import main
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.jobs import Job
+from tuxlava.preflight import check, job_headers, job_urls, preflight, probe
+
+
+@pytest.fixture
+def head(mocker):
+    # https://example.com/missing* are 404, https://example.com/nohead* do
+    # not allow HEAD requests and https://example.com/private* need a token
+    def fetch(url, headers=None, **kwargs):
+        if "/private" in url and (headers or {}).get("Authorization") != "token":
+            return mocker.Mock(status_code=401, headers={})
+        if "/missing" in url:
+            return mocker.Mock(status_code=404, headers={})
+        if "/nohead" in url:
+            return mocker.Mock(status_code=405, headers={})
+        return mocker.Mock(status_code=200, headers={"Content-Length": "42"})
+
+    return mocker.patch("requests.Session.head", side_effect=fetch)
+
+
+def test_probe_file(tmp_path):
+    (tmp_path / "Image").write_bytes(b"kernel")
+    assert probe(f"file://{tmp_path}/Image") == {
+        "url": f"file://{tmp_path}/Image",
+        "status": 200,
+        "size": 6,
+        "error": None,
+    }
+    assert probe(f"file://{tmp_path}/missing")["status"] == 404
+
+
+def test_probe_http(head, get, mocker):
+    assert probe("https://example.com/Image")["size"] == 42
+    assert probe("https://example.com/missing")["status"] == 404
+
+    get.return_value = mocker.Mock(
+        status_code=206, headers={"Content-Range": "bytes 0-0/1234"}
+    )
+    result = probe("https://example.com/nohead")
+    assert (result["status"], result["size"]) == (206, 1234)
+    assert get.call_args[1]["headers"] == {"Range": "bytes=0-0"}
+
+    head.side_effect = OSError("unreachable")
+    assert probe("https://example.com/Image")["error"] == "unreachable"
+
+
+def test_probe_headers(head, get, mocker):
+    assert probe("https://example.com/private")["status"] == 401
+    result = probe("https://example.com/private", headers={"Authorization": "token"})
+    assert result["status"] == 200
+
+    get.return_value = mocker.Mock(status_code=206, headers={})
+    probe("https://example.com/nohead", headers={"Authorization": "token"})
+    assert get.call_args[1]["headers"] == {
+        "Authorization": "token",
+        "Range": "bytes=0-0",
+    }
+
+
+def test_preflight(head):
+    urls = [f"https://example.com/{i}" for i in range(10)]
+    results = preflight(urls + urls)
+    assert [r["url"] for r in results] == urls + urls
+    assert head.call_count == 10
+
+
+def test_job_urls(tmp_path):
+    job = Job(
+        device="qemu-x86_64",
+        kernel="https://example.com/bzImage",
+        modules="https://example.com/modules.tar.xz",
+        overlays=[["https://example.com/overlay.tar.xz", "/"]],
+        parameters={"KSELFTEST": "https://example.com/kselftest.tar.xz"},
+        tests=["kselftest-ipc"],
+        tmpdir=tmp_path,
+    )
+    job.initialize()
+    names = dict(job_urls(job))
+    assert names["kernel"] == "https://example.com/bzImage"
+    assert names["modules"] == "https://example.com/modules.tar.xz"
+    assert names["overlay-00"] == "https://example.com/overlay.tar.xz"
+    assert names["parameters KSELFTEST"] == "https://example.com/kselftest.tar.xz"
+    assert "rootfs" in names
+    assert "test-definitions" in names
+
+
+def test_check(head, tmp_path):
+    job = Job(
+        device="qemu-arm64", kernel="https://example.com/missing/Image", tmpdir=tmp_path
+    )
+    job.initialize()
+    with pytest.raises(InvalidArgument) as exc:
+        check([job])
+    assert exc.match(
+        "Missing artefact\\(s\\): kernel https://example.com/missing/Image"
+    )
+
+
+def test_job_headers(tmp_path):
+    job = Job(
+        device="flasher-qcs6490-rb3gen2-core-kit",
+        rootfs="https://example.com/private/rootfs.img",
+        secrets={"PRIVATE-TOKEN": "token"},
+        tmpdir=tmp_path,
+    )
+    job.initialize()
+    assert job_headers(job) == {"PRIVATE-TOKEN": "token"}
+
+    # The AVH secrets are the API token, never sent with the downloads
+    job = Job(
+        device="avh-rpi4b",
+        kernel="https://example.com/Image",
+        dtb="https://example.com/devicetree",
+        rootfs="https://example.com/rootfs.ext4",
+        secrets={"avh_api_token": "token"},
+        tmpdir=tmp_path,
+    )
+    job.initialize()
+    assert job_headers(job) == {}
+
+
+def test_check_denied(head, tmp_path, mocker):
+    job = Job(
+        device="qemu-arm64", kernel="https://example.com/private/Image", tmpdir=tmp_path
+    )
+    job.initialize()
+    with pytest.raises(InvalidArgument) as exc:
+        check([job])
+    assert exc.match(
+        "Access denied to artefact\\(s\\): kernel https://example.com/private/Image"
+    )
+
+    # The probes send the credentials of the job
+    mocker.patch(
+        "tuxlava.preflight.job_headers", return_value={"Authorization": "token"}
+    )
+    assert check([job])[0]["status"] == 200
+
+
+def test_main_preflight(head, monkeypatch, capsys):
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        [
+            "tuxlava",
+            "--device",
+            "qemu-arm64",
+            "--kernel",
+            "https://example.com/missing/Image",
+            "--preflight",
+        ],
+    )
+    with pytest.raises(SystemExit):
+        main()
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert "Missing artefact(s): kernel https://example.com/missing/Image" in err
+
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        [
+            "tuxlava",
+            "--device",
+            "qemu-arm64",
+            "--kernel",
+            "https://example.com/Image",
+            "--preflight",
+        ],
+    )
+    main()
+    out, err = capsys.readouterr()
+    assert "https://example.com/Image" in out
+    assert err == ""
+
+
+def test_main_preflight_initialize_once(head, monkeypatch, capsys, mocker):
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        [
+            "tuxlava",
+            "--device",
+            "qemu-arm64",
+            "--kernel",
+            "https://example.com/Image",
+            "--preflight",
+        ],
+    )
+    mkdtemp = mocker.spy(tempfile, "mkdtemp")
+    main()
+    assert "https://example.com/Image" in capsys.readouterr().out
+    # The job checked by preflight is the one written
+    assert mkdtemp.call_count == 1
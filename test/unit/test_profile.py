@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from tuxlava.__main__ import main
+from tuxlava.jobs import Job
+from tuxlava.profile import PROFILE, phase, profiling
+
+
+def test_phase_without_profiling():
+    with phase("initialize"):
+        assert PROFILE.get() is None
+
+
+def test_profiling():
+    reports = []
+    with profiling(reports.append) as profile:
+        with phase("initialize"):
+            with phase("validate"):
+                pass
+        with phase("render"):
+            pass
+    assert [p["name"] for p in profile.phases] == [
+        "initialize",
+        "initialize/validate",
+        "render",
+    ]
+    assert profile.stack == []
+    assert PROFILE.get() is None
+    assert len(reports) == 1
+    assert reports[0]["total"] >= sum(p["duration"] for p in reports[0]["phases"][::2])
+
+
+def test_profiling_error():
+    reports = []
+    with pytest.raises(ValueError):
+        with profiling(reports.append):
+            with phase("initialize"):
+                raise ValueError("failed")
+    assert [p["name"] for p in reports[0]["phases"]] == ["initialize"]
+
+
+def test_profiling_decorator():
+    @phase("work")
+    def work():
+        return PROFILE.get().stack[:]
+
+    with profiling() as profile:
+        assert work() == ["work"]
+        assert work() == ["work"]
+    assert [p["name"] for p in profile.phases] == ["work", "work"]
+
+
+def test_job_phases(tmp_path):
+    with profiling() as profile:
+        job = Job(
+            device="qemu-x86_64", tests=["ltp-smoke", "kselftest-ipc"], tmpdir=tmp_path
+        )
+        job.initialize()
+        job.render()
+    assert [p["name"] for p in profile.phases] == [
+        "initialize",
+        "initialize/validate",
+        "initialize/extra-assets",
+        "render",
+        "render/test/ltp-smoke",
+        "render/test/kselftest-ipc",
+        "render/template",
+    ]
+
+
+def test_main_profile(monkeypatch, capsys, tmp_path):
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        ["tuxlava", "--device", "qemu-arm64", "--tests", "ltp-smoke"]
+        + ["--profile", str(tmp_path / "profile.json")],
+    )
+    main()
+    report = json.loads((tmp_path / "profile.json").read_text())
+    names = [p["name"] for p in report["phases"]]
+    assert names[:2] == ["parse", "import"]
+    assert "initialize/validate" in names
+    assert "render/test/ltp-smoke" in names
+    assert "render/template" in names
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+from tuxlava import requests as tuxlava_requests
+from tuxlava.requests import cached_get, requests_get, reset, session
+
+URL = "https://example.com/metadata.json"
+BUILD = "https://storage.example.com/builds/2k0BQ4PP7MJG21NqvHmWZpCA6RC/metadata.json"
+
+
+def test_session():
+    assert session() is session()
+    first = session()
+    reset()
+    assert session() is not first
+
+
+def test_session_pool():
+    # The threads resolving builds or probing artefacts share the session
+    adapter = session().get_adapter(URL)
+    assert adapter._pool_maxsize == tuxlava_requests.POOL_SIZE
+
+
+def test_requests_get(get):
+    requests_get(URL)
+    get.assert_called_once_with(URL, timeout=tuxlava_requests.timeout)
+
+
+def test_cached_get(get, mocker):
+    get.return_value = mocker.Mock(status_code=200, text="{}", headers={"ETag": '"1"'})
+    assert cached_get(URL) == (200, "{}")
+    assert cached_get(URL) == (200, "{}")
+    assert get.call_count == 1
+
+    # Revalidated with the ETag in a new process
+    reset()
+    get.return_value = mocker.Mock(status_code=304, text="", headers={})
+    assert cached_get(URL) == (200, "{}")
+    assert get.call_args[1]["headers"] == {"If-None-Match": '"1"'}
+
+    # Updated content
+    reset()
+    get.return_value = mocker.Mock(status_code=200, text="[]", headers={})
+    assert cached_get(URL) == (200, "[]")
+    reset()
+    assert cached_get(URL) == (200, "[]")
+    assert get.call_args[1]["headers"] == {}
+
+
+def test_cached_get_immutable(get, mocker):
+    get.return_value = mocker.Mock(status_code=200, text="{}", headers={})
+    assert cached_get(BUILD) == (200, "{}")
+    reset()
+    assert cached_get(BUILD) == (200, "{}")
+    assert get.call_count == 1
+
+
+def test_cached_get_error(get, mocker, home):
+    get.return_value = mocker.Mock(status_code=404, text="", headers={})
+    assert cached_get(BUILD).status_code == 404
+    assert cached_get(BUILD).status_code == 404
+    assert get.call_count == 2
+    assert not (home / ".cache" / "tuxlava" / "http").exists()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+
+import pytest
+
+from tuxlava import rootfs
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.jobs import Job
+from tuxlava.rootfs import decompress
+
+CONTENT = b"ext4" * 1024
+
+
+@pytest.fixture
+def no_programs(mocker):
+    return mocker.patch("tuxlava.rootfs.shutil.which", return_value=None)
+
+
+@pytest.fixture
+def head(mocker):
+    f = mocker.patch("requests.Session.head")
+    f.return_value.status_code = 200
+    f.return_value.headers = {"ETag": '"v1"'}
+    return f
+
+
+def test_decompress_local(tmp_path, no_programs, mocker):
+    src = tmp_path / "rootfs.ext4.gz"
+    src.write_bytes(gzip.compress(CONTENT))
+    stream = mocker.spy(rootfs, "decompress_stream")
+
+    url = decompress(f"file://{src}", tmp_path / "cache")
+    assert url.startswith(f"file://{tmp_path / 'cache' / 'rootfs'}/")
+    assert url.endswith("/rootfs.ext4")
+    assert open(url[7:], "rb").read() == CONTENT
+    assert decompress(f"file://{src}", tmp_path / "cache") == url
+    assert stream.call_count == 1
+
+    # A new version of the file is decompressed again
+    src.write_bytes(lzma.compress(CONTENT))
+    os.utime(src, ns=(0, 0))
+    assert decompress(f"file://{src}", tmp_path / "cache") != url
+    assert stream.call_count == 2
+
+
+@pytest.mark.skipif(shutil.which("xz") is None, reason="xz is not installed")
+def test_decompress_program(tmp_path):
+    src = tmp_path / "rootfs.ext4.xz"
+    src.write_bytes(lzma.compress(CONTENT))
+    url = decompress(f"file://{src}", tmp_path / "cache")
+    assert open(url[7:], "rb").read() == CONTENT
+
+    src = tmp_path / "broken.ext4.xz"
+    src.write_bytes(b"broken")
+    with pytest.raises(InvalidArgument):
+        decompress(f"file://{src}", tmp_path / "cache")
+    assert not list((tmp_path / "cache").glob("rootfs/*/broken*"))
+
+
+def test_decompress_uncompressed(tmp_path):
+    src = tmp_path / "rootfs.ext4"
+    src.write_bytes(CONTENT)
+    assert decompress(f"file://{src}", tmp_path / "cache") == f"file://{src}"
+    assert not (tmp_path / "cache").exists()
+
+
+def test_decompress_zstd_missing(tmp_path, no_programs, monkeypatch):
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    src = tmp_path / "rootfs.ext4.zst"
+    src.write_bytes(b"\x28\xb5\x2f\xfd")
+    with pytest.raises(InvalidArgument, match="zstd"):
+        decompress(f"file://{src}", tmp_path / "cache")
+
+
+def test_decompress_http(tmp_path, no_programs, head, get, response):
+    url = "https://example.com/rootfs.ext4.gz"
+    response.status_code = 200
+    response.raw = io.BytesIO(gzip.compress(CONTENT))
+    path = decompress(url, tmp_path / "cache")
+    assert open(path[7:], "rb").read() == CONTENT
+    get.assert_called_once()
+    assert decompress(url, tmp_path / "cache") == path
+    get.assert_called_once()
+
+    # A new ETag is a new rootfs
+    head.return_value.headers = {"ETag": '"v2"'}
+    response.raw = io.BytesIO(gzip.compress(CONTENT))
+    assert decompress(url, tmp_path / "cache") != path
+
+    response.status_code = 404
+    with pytest.raises(InvalidArgument):
+        decompress("https://example.com/missing.ext4.gz", tmp_path / "cache")
+    head.return_value.status_code = 404
+    with pytest.raises(InvalidArgument):
+        decompress("https://example.com/missing.ext4.gz", tmp_path / "cache")
+
+
+def test_decompress_headers(tmp_path, no_programs, head, get, response):
+    response.status_code = 200
+    response.raw = io.BytesIO(gzip.compress(CONTENT))
+    url = "https://example.com/rootfs.ext4.gz"
+    path = decompress(url, tmp_path / "cache", {"Authorization": "secret"})
+    assert open(path[7:], "rb").read() == CONTENT
+    assert head.call_args.kwargs["headers"] == {"Authorization": "secret"}
+    assert get.call_args.kwargs["headers"] == {"Authorization": "secret"}
+
+    # The AVH secrets are the API token, never sent to the artefact servers
+    head.return_value.headers = {"ETag": '"v2"'}
+    response.raw = io.BytesIO(gzip.compress(CONTENT))
+    job = Job(
+        device="avh-imx93",
+        kernel="https://example.com/Image",
+        rootfs=url,
+        secrets={"avh_api_token": "token"},
+        cache_dir=tmp_path / "cache",
+        decompress_rootfs=True,
+    )
+    job.initialize()
+    assert head.call_args.kwargs["headers"] == {}
+    assert get.call_args.kwargs["headers"] == {}
+
+
+def test_decompress_evict(tmp_path, no_programs):
+    urls = []
+    for name in ["a", "b"]:
+        src = tmp_path / f"{name}.ext4.gz"
+        src.write_bytes(gzip.compress(CONTENT))
+        urls.append(decompress(f"file://{src}", tmp_path / "cache", max_size=1))
+    assert not os.path.exists(urls[0][7:])
+    # The most recently used rootfs is kept
+    assert os.path.exists(urls[1][7:])
+
+
+def test_job_decompress_rootfs(tmp_path, no_programs):
+    src = tmp_path / "rootfs.ext4.gz"
+    src.write_bytes(gzip.compress(CONTENT))
+    job = Job(
+        device="qemu-arm64",
+        rootfs=str(src),
+        cache_dir=tmp_path / "cache",
+        decompress_rootfs=True,
+    )
+    job.initialize()
+    assert job.rootfs.startswith(f"file://{tmp_path / 'cache'}")
+    assert job.rootfs in job.extra_assets
+    assert "compression:" not in job.render().split("rootfs:")[1]
+
+    with pytest.raises(InvalidArgument, match="--cache-dir"):
+        Job(device="qemu-arm64", decompress_rootfs=True).initialize()
+    with pytest.raises(InvalidArgument, match="not supported"):
+        Job(
+            device="nfs-x86_64",
+            cache_dir=tmp_path / "cache",
+            decompress_rootfs=True,
+        ).initialize()
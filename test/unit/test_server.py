@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import json
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from tuxlava import devices, tests
+from tuxlava.jobs import render_one
+from tuxlava.server import JobServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = JobServer(tmp_path / "tuxlava.sock")
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(server, *lines):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(server.path))
+        sock.sendall(b"".join(line + b"\n" for line in lines))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as f:
+            return [json.loads(line) for line in f]
+
+
+def test_server(server, tmp_path):
+    spec = {"device": "qemu-arm64", "tests": ["ltp-smoke"], "tmpdir": str(tmp_path)}
+    results = request(server, json.dumps(spec).encode(), b"", b'{"device": "hello"}')
+    assert len(results) == 2
+    assert results[0] == render_one(spec)
+    assert results[0]["definition"]
+    assert results[1]["error"].startswith("Unknown device hello")
+
+
+def test_server_tmpdir(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    spec = {"device": "fvp-aemva", "tests": ["ltp-smoke"]}
+    results = request(server, json.dumps(spec).encode())
+    assert results[0]["spec"] == spec
+    assert "tuxlava-" in results[0]["definition"]
+    assert not list(tmp_path.glob("tuxlava-*"))
+
+
+def test_server_warmup(tmp_path, mocker):
+    load_devices = mocker.spy(devices, "load")
+    load_tests = mocker.spy(tests, "load")
+    JobServer(tmp_path / "tuxlava.sock").server_close()
+    load_devices.assert_called_once_with()
+    load_tests.assert_called_once_with()
+
+
+def test_server_invalid_request(server):
+    results = request(server, b"not json", b"[]")
+    assert len(results) == 2
+    assert all(r["error"].startswith("Invalid request: ") for r in results)
+
+
+def test_server_close(tmp_path):
+    path = tmp_path / "tuxlava.sock"
+    JobServer(path).server_close()
+    assert not path.exists()
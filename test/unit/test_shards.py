@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+import yaml
+
+from tuxlava.__main__ import main
+from tuxlava.exceptions import InvalidArgument, MissingArgument
+from tuxlava.shards import load_runtimes, shard, shard_count, split
+
+
+def test_split():
+    assert split([1, 2, 3, 4, 5], 1) == [15]
+    assert split([1, 2, 3, 4, 5], 2) == [9, 6]
+    assert split([1, 2, 3, 4, 5], 3) == [5, 7, 3]
+
+
+def test_shard_count():
+    assert shard_count([60] * 10, 10) == 1
+    assert shard_count([60] * 10, 5) == 2
+    assert shard_count([60] * 10, 3) == 4
+    # The longest testcase is the shortest possible shard
+    assert shard_count([600, 60, 60, 60], 5) == 4
+
+
+def test_load_runtimes(tmp_path):
+    path = tmp_path / "runtimes.json"
+    path.write_text(json.dumps({"ltp-syscalls": {"abort01": 1, "accept01": 0.5}}))
+    assert load_runtimes(path) == {"ltp-syscalls": {"abort01": 1, "accept01": 0.5}}
+
+    path.write_text(json.dumps({"ltp-syscalls": ["abort01"]}))
+    with pytest.raises(InvalidArgument):
+        load_runtimes(path)
+    with pytest.raises(InvalidArgument):
+        load_runtimes(tmp_path / "missing.json")
+
+
+def test_shard_count_from_timeouts():
+    specs = shard(
+        None, 25, device="qemu-arm64", tests=["ltp-syscalls", "ltp-cve"], parameters={}
+    )
+    assert len(specs) == 3
+    for index, spec in enumerate(specs, 1):
+        assert spec["tests"] == ["ltp-syscalls", "ltp-cve"]
+        assert spec["timeouts"] == {"ltp-syscalls": 20, "ltp-cve": 20}
+        assert spec["parameters"] == {"SHARD_NUMBER": "3", "SHARD_INDEX": str(index)}
+
+
+def test_shard_count_given():
+    kwargs = {
+        "device": "qemu-arm64",
+        "tests": ["ltp-smoke", "kselftest-ipc", "perf"],
+        "timeouts": {"kselftest-ipc": 8},
+        "parameters": {"SKIPFILE": "skip"},
+    }
+    specs = shard(2, None, **kwargs)
+    assert [s["tests"] for s in specs] == [
+        ["ltp-smoke", "kselftest-ipc", "perf"],
+        ["ltp-smoke", "kselftest-ipc"],
+    ]
+    assert specs[1]["timeouts"] == {"ltp-smoke": 3, "kselftest-ipc": 4}
+    assert specs[1]["parameters"] == {
+        "SKIPFILE": "skip",
+        "SHARD_NUMBER": "2",
+        "SHARD_INDEX": "2",
+    }
+    assert kwargs["parameters"] == {"SKIPFILE": "skip"}
+
+    assert shard(1, None, **kwargs) == [kwargs]
+    assert shard(4, None, device="qemu-arm64", tests=["perf"]) == [
+        {"device": "qemu-arm64", "tests": ["perf"]}
+    ]
+
+
+def test_shard_modules():
+    # The modules test reads SHARD_* too: each shard tests its part
+    specs = shard(3, None, device="qemu-arm64", tests=["ltp-syscalls", "modules"])
+    assert [s["tests"] for s in specs] == [["ltp-syscalls", "modules"]] * 3
+    assert [s["timeouts"]["modules"] for s in specs] == [7, 7, 7]
+
+
+def test_shard_runtimes():
+    runtimes = {"ltp-syscalls": {"a": 600, "b": 60, "c": 60, "d": 60, "e": 60}}
+    specs = shard(
+        None, 12, runtimes, device="qemu-arm64", tests=["ltp-syscalls"], parameters={}
+    )
+    assert len(specs) == 2
+    assert [s["timeouts"]["ltp-syscalls"] for s in specs] == [52, 9]
+
+    with pytest.raises(MissingArgument):
+        shard(None, None, device="qemu-arm64", tests=["ltp-syscalls"])
+    with pytest.raises(MissingArgument):
+        shard(2, None, device=None, tests=["ltp-syscalls"])
+
+
+def test_main_shards(monkeypatch, capsys):
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        [
+            "tuxlava",
+            "--device",
+            "qemu-arm64",
+            "--tests",
+            "ltp-syscalls",
+            "--shards",
+            "4",
+        ],
+    )
+    main()
+    jobs = list(yaml.safe_load_all(capsys.readouterr().out))
+    assert len(jobs) == 4
+    params = [j["actions"][-1]["test"]["definitions"][0]["parameters"] for j in jobs]
+    assert [(p["SHARD_NUMBER"], p["SHARD_INDEX"]) for p in params] == [
+        (4, 1),
+        (4, 2),
+        (4, 3),
+        (4, 4),
+    ]
+
+
+def test_main_shards_exclusive(monkeypatch, capsys):
+    monkeypatch.setattr(
+        "tuxlava.__main__.sys.argv",
+        ["tuxlava", "--device", "qemu-arm64", "--shards", "2", "--shard-duration", "5"],
+    )
+    with pytest.raises(SystemExit):
+        main()
+    assert "not allowed with argument --shard-duration" in capsys.readouterr().err
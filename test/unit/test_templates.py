@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import jinja2
+import pytest
+
+from tuxlava import __version__, templates
+
+
+@pytest.fixture
+def envs(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    funcs = [templates.bytecode_cache, templates.jobs, templates.tests]
+    for func in funcs:
+        func.cache_clear()
+    yield tmp_path / "cache" / "tuxlava" / "templates" / __version__
+    for func in funcs:
+        func.cache_clear()
+
+
+def test_bytecode_cache(envs, mocker):
+    compile = mocker.spy(jinja2.Environment, "compile")
+    templates.jobs().get_template("qemu.yaml.jinja2")
+    templates.tests().get_template("ltp.yaml.jinja2")
+    assert compile.call_count == 2
+    assert len(list(envs.iterdir())) == 2
+
+    # A new process loads the compiled templates instead of compiling them
+    templates.jobs.cache_clear()
+    compile.reset_mock()
+    templates.jobs().get_template("qemu.yaml.jinja2")
+    assert compile.call_count == 0
+
+
+def test_bytecode_cache_not_writable(envs, mocker):
+    envs.parent.mkdir(parents=True)
+    envs.touch()
+    assert templates.bytecode_cache() is None
+    assert templates.jobs().get_template("qemu.yaml.jinja2")
+
+
+def test_bytecode_cache_dump_error(envs, mocker):
+    mocker.patch("tempfile.NamedTemporaryFile", side_effect=PermissionError)
+    assert templates.jobs().get_template("qemu.yaml.jinja2")
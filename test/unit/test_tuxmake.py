@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
 
 import copy
+import functools
 import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import pytest
 
-from tuxlava.tuxmake import InvalidTuxBuild, TuxBuildBuild, TuxMakeBuild
+from tuxlava.jobs import render_many
+from tuxlava.tuxmake import InvalidTuxBuild, TuxBuildBuild, TuxMakeBuild, resolve
 
 metadata = {
     "results": {
@@ -112,3 +118,95 @@ class TestTuxBuildBuild:
         get.side_effect = [mocker.Mock(status_code=404)]
         with pytest.raises(InvalidTuxBuild):
             TuxBuildBuild(url)
+
+
+@pytest.fixture
+def builds(get, mocker):
+    # https://example.com/<name>: ok builds, "missing" is a 404 and "slow"
+    # hangs until the test ends
+    release = threading.Event()
+
+    def fetch(url, **kwargs):
+        if "/slow/" in url:
+            release.wait(10)
+        if "/missing/" in url:
+            return mocker.Mock(status_code=404, text="", headers={})
+        return mocker.Mock(status_code=200, text=json.dumps(metadata), headers={})
+
+    get.side_effect = fetch
+    yield release
+    release.set()
+
+
+class TestResolve:
+    def test_resolve(self, builds, get):
+        urls = [f"https://example.com/{i}" for i in range(20)]
+        builds, errors = resolve(urls + urls[:2] + ["https://example.com/missing"])
+        assert sorted(builds) == sorted(urls)
+        assert builds[urls[3]].kernel == f"{urls[3]}/bzImage"
+        assert errors == {
+            "https://example.com/missing": "https://example.com/missing/metadata.json is missing"
+        }
+        assert get.call_count == 21
+
+    def test_deadline(self, builds):
+        builds, errors = resolve(
+            ["https://example.com/ok", "https://example.com/slow"], deadline=0.5
+        )
+        assert list(builds) == ["https://example.com/ok"]
+        assert errors == {
+            "https://example.com/slow": "https://example.com/slow/metadata.json timed out after 0.5 seconds"
+        }
+
+    def test_deadline_stop(self, builds, get):
+        urls = ["https://example.com/slow", "https://example.com/ok"]
+        _, errors = resolve(urls, deadline=0.2, workers=1)
+        assert sorted(errors) == sorted(urls)
+        # The worker stops instead of fetching the remaining builds
+        builds.set()
+        time.sleep(0.2)
+        assert get.call_count == 1
+
+    def test_render_many(self, builds, get, tmp_path):
+        specs = [
+            {
+                "device": "qemu-arm64",
+                "tuxbuild": "https://example.com/ok/",
+                "tmpdir": str(tmp_path),
+            },
+            {"device": "qemu-arm64", "tuxbuild": "https://example.com/missing"},
+            {
+                "device": "qemu-arm64",
+                "tuxbuild": "https://example.com/ok",
+                "tmpdir": str(tmp_path),
+            },
+        ]
+        results = render_many(specs, workers=1)
+        assert [r["spec"] for r in results] == specs
+        assert [r["error"] for r in results] == [
+            None,
+            "https://example.com/missing/metadata.json is missing",
+            None,
+        ]
+        assert "https://example.com/ok/bzImage" in results[0]["definition"]
+        assert get.call_count == 2
+
+    def test_render_many_spawn(self, builds, get, tmp_path, monkeypatch):
+        # Spawned workers inherit nothing: the metadata is given to them
+        context = multiprocessing.get_context("spawn")
+        monkeypatch.setattr(
+            "tuxlava.jobs.ProcessPoolExecutor",
+            functools.partial(ProcessPoolExecutor, mp_context=context),
+        )
+        specs = [
+            {
+                "device": "qemu-arm64",
+                "tuxbuild": f"https://example.com/{i}",
+                "tmpdir": str(tmp_path),
+            }
+            for i in range(2)
+        ]
+        results = render_many(specs, workers=2)
+        assert [r["error"] for r in results] == [None, None]
+        assert "https://example.com/1/bzImage" in results[1]["definition"]
+        assert get.call_count == 2
@@ -1,11 +1,23 @@
 # -*- coding: utf-8 -*-
 
+import gzip
+import io
+import lzma
+import os
+import tarfile
 from argparse import ArgumentTypeError
 from pathlib import Path
 
 import pytest
 
-from tuxlava.utils import notnone, pathurlnone
+from tuxlava import utils
+from tuxlava.utils import (
+    Compression,
+    atomic_path,
+    compression,
+    notnone,
+    pathurlnone,
+)
 
 
 def test_notnone():
@@ -14,6 +26,30 @@ def test_notnone():
     assert notnone("hello", "fallback") == "hello"
 
 
+def test_atomic_path(tmp_path):
+    path = tmp_path / "file"
+    with atomic_path(path) as tmp:
+        assert tmp.parent == tmp_path
+        tmp.write_text("data")
+        assert not path.exists()
+    assert path.read_text() == "data"
+    assert path.stat().st_mode & 0o777 == 0o666 & ~utils.UMASK
+
+    with pytest.raises(RuntimeError):
+        with atomic_path(path) as tmp:
+            tmp.write_text("partial")
+            raise RuntimeError()
+    assert path.read_text() == "data"
+    assert os.listdir(tmp_path) == ["file"]
+
+    # Concurrent writers never share their temporary file
+    with atomic_path(path) as first, atomic_path(path) as second:
+        assert first != second
+        first.write_text("first")
+        second.write_text("second")
+    assert path.read_text() == "first"
+
+
 def test_pathurlnone():
     assert pathurlnone(None) is None
     assert pathurlnone("https://example.com/kernel") == "https://example.com/kernel"
@@ -26,3 +62,66 @@ def test_pathurlnone():
     with pytest.raises(ArgumentTypeError) as exc:
         pathurlnone("file:///should-not-exists")
     assert exc.match("/should-not-exists no such file or directory")
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("https://example.com/rootfs.ext4.zst", ("ext4", "zstd")),
+        ("https://example.com/modules.tar.xz", ("tar", "xz")),
+        ("https://example.com/modules.tgz", ("tar", "gz")),
+        ("https://example.com/v1.2/Image.gz", (None, "gz")),
+        ("https://example.com/v1.2/Image", (None, None)),
+        ("https://example.com/run.sh", ("file", None)),
+        ("/path/to/rootfs.cpio", ("cpio.newc", None)),
+    ],
+)
+def test_compression_suffix(path, expected):
+    assert compression(path) == expected
+    assert compression(path) is compression(path)
+
+
+def tar_bytes():
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as tar:
+        info = tarfile.TarInfo("lib/modules/dep")
+        tar.addfile(info, io.BytesIO(b""))
+    return data.getvalue()
+
+
+def test_compression_magic(tmp_path):
+    ext4 = bytearray(4096)
+    ext4[1080:1082] = b"\x53\xef"
+    files = {
+        # Oddly named local files
+        "rootfs": (gzip.compress(b"070701" + bytes(2048)), ("cpio.newc", "gz")),
+        "modules": (lzma.compress(tar_bytes()), ("tar", "xz")),
+        "image.bin": (bytes(ext4), ("ext4", None)),
+        # Wrong suffix
+        "rootfs.ext4.zst": (bytes(ext4), ("ext4", None)),
+        # Format of zstd content from the suffix
+        "rootfs.ext4.img": (b"\x28\xb5\x2f\xfd" + bytes(64), (None, "zstd")),
+        "disk.ext4.zst": (b"\x28\xb5\x2f\xfd" + bytes(64), ("ext4", "zstd")),
+        # Unknown content keeps the suffix
+        "Image.gz": (b"kernel", (None, "gz")),
+    }
+    for name, (content, expected) in files.items():
+        (tmp_path / name).write_bytes(content)
+        assert compression(f"file://{tmp_path / name}") == expected, name
+        assert compression(str(tmp_path / name)) == utils.suffix_compression(name)
+    assert compression(f"file://{tmp_path / 'missing.tar'}") == ("tar", None)
+    assert isinstance(compression(f"file://{tmp_path / 'rootfs'}"), Compression)
+
+
+def test_compression_magic_cached(tmp_path, mocker):
+    path = tmp_path / "rootfs"
+    path.write_bytes(gzip.compress(b"070701"))
+    sniff = mocker.spy(utils, "sniff")
+    assert compression(f"file://{path}") == ("cpio.newc", "gz")
+    assert compression(f"file://{path}") == ("cpio.newc", "gz")
+    assert sniff.call_count == 1
+
+    path.write_bytes(lzma.compress(b"070701"))
+    os.utime(path, ns=(0, 0))
+    assert compression(f"file://{path}") == ("cpio.newc", "xz")
+    assert sniff.call_count == 2
@@ -7,38 +7,154 @@
 #
 # SPDX-License-Identifier: MIT
 
+import json
 import logging
 import sys
 
-from tuxlava.jobs import Job
 from tuxlava.exceptions import TuxLavaException
 from tuxlava.argparse import setup_parser
+from tuxlava.profile import phase, profiling
+from tuxlava.tests import Test
+from tuxlava.utils import yaml_load
 
 LOG = logging.getLogger("tuxlava")
 
 
+def dump_json(data) -> str:
+    return json.dumps(data, indent=2, default=str) + "\n"
+
+
+def write(jobs, fmt, cache=None):
+    # Several jobs are written as a list in json or as a multi-document yaml
+    data = []
+    end = "\n"
+    for index, job in enumerate(jobs):
+        if cache is not None:
+            chunks = [job.render_cached(cache)]
+        else:
+            job.initialize()
+            chunks = None
+        if fmt == "json":
+            data.append(job.render_dict() if chunks is None else yaml_load(chunks[0]))
+            continue
+        if index:
+            sys.stdout.write(("" if end.endswith("\n") else "\n") + "---\n")
+        for chunk in job.iter_render() if chunks is None else chunks:
+            sys.stdout.write(chunk)
+            end = chunk or end
+    if fmt == "json":
+        sys.stdout.write(dump_json(data[0] if len(data) == 1 else data))
+
+
 def main() -> int:
-    # Parse command line
-    parser = setup_parser()
-    options = parser.parse_args()
+    with profiling() as profile:
+        # Parse command line
+        with phase("parse"):
+            parser = setup_parser()
+            options = parser.parse_args()
 
+        try:
+            return run(parser, options)
+        finally:
+            if options.profile:
+                options.profile.write_text(
+                    dump_json(profile.report()), encoding="utf-8"
+                )
+
+
+def run(parser, options) -> int:
     # Setup logging
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(logging.Formatter("%(message)s"))
     LOG.addHandler(handler)
     LOG.setLevel(logging.DEBUG if options.debug else logging.INFO)
 
+    if options.list_tests:
+        try:
+            tests = Test.list(device=options.device)
+        except TuxLavaException as exc:
+            parser.error(str(exc))
+        sys.stdout.write("\n".join(tests) + "\n")
+        return 0
+
+    # Listing only needs the index: import the templates (jinja2) and the
+    # tuxbuild support (requests) when rendering jobs
+    with phase("import"):
+        from tuxlava.bandwidth import BandwidthModel, estimate
+        from tuxlava.cache import RenderCache
+        from tuxlava.durations import DurationStore
+        from tuxlava.jobs import Job, render_many
+        from tuxlava.planner import plan
+        from tuxlava.preflight import check
+        from tuxlava.server import serve
+        from tuxlava.shards import load_runtimes, shard
+
+    if options.serve:
+        serve(options.serve)
+        return 0
+
+    if options.batch:
+        try:
+            specs = json.load(options.batch)
+        except json.JSONDecodeError as exc:
+            parser.error(f"argument --batch: invalid JSON: {exc}")
+        if not isinstance(specs, list) or not all(isinstance(s, dict) for s in specs):
+            parser.error("argument --batch: expecting a list of job specs")
+        results = render_many(
+            specs, workers=options.batch_workers, deadline=options.batch_deadline
+        )
+        sys.stdout.write(json.dumps(results, indent=2) + "\n")
+        return 0 if all(r["error"] is None for r in results) else 1
+
+    if options.record_durations:
+        if not options.device:
+            parser.error("argument --record-durations requires --device")
+        store = DurationStore(options.durations)
+        try:
+            for path in options.record_durations:
+                store.ingest(options.device, path.read_text(encoding="utf-8"))
+        except (OSError, TuxLavaException) as exc:
+            parser.error(f"argument --record-durations: {exc}")
+        store.save()
+        return 0
+
+    if options.auto_timeouts:
+        if not options.device:
+            parser.error("argument --timeouts auto requires --device")
+        try:
+            options.timeouts = DurationStore(options.durations).timeouts(
+                options.device, options.timeouts
+            )
+        except TuxLavaException as exc:
+            parser.error(str(exc))
+
     if not options.device:
         if not (options.tuxmake or options.tuxbuild):
             parser.error("argument --device is required")
 
+    if options.shards is not None and options.shard_duration is not None:
+        parser.error("argument --shards: not allowed with argument --shard-duration")
+    if options.shards is not None and options.shards < 1:
+        parser.error("argument --shards: must be at least 1")
+    if options.shard_duration is not None and options.shard_duration < 1:
+        parser.error("argument --shard-duration: must be at least 1")
+
+    # Patterns are expanded with the tests of the device when planning
+    patterns = options.max_job_timeout or options.shards or options.shard_duration
+    tests = Test.list()
+    for name in options.tests:
+        if name not in tests and not (patterns and set("*?[") & set(name)):
+            parser.error(
+                f"argument --tests: invalid choice: '{name}' (choose from {', '.join(tests)})"
+            )
+
     if "hacking-session" in options.tests:
         options.enable_network = True
         if not options.parameters.get("PUB_KEY"):
             parser.error("argument missing --parameters PUB_KEY='...'")
 
     try:
-        job = Job(
+        kwargs = dict(
             device=options.device,
             bios=options.bios,
             bl1=options.bl1,
@@ -83,9 +199,48 @@ def main() -> int:
             job_definition=options.job_definition,
             shared=options.shared,
             visibility=options.visibility,
+            cache_dir=options.cache_dir,
+            checksums=options.checksums,
+            artefact_store=options.artefact_store,
+            decompress_rootfs=options.decompress_rootfs,
+            merge_overlays=options.merge_overlays,
+            slim_modules=options.slim_modules,
         )
-        job.initialize()
-        sys.stdout.write(job.render())
+        if options.deploy_bandwidth or options.bandwidth_model:
+            if options.bandwidth_model:
+                model = BandwidthModel.load(options.bandwidth_model)
+            else:
+                model = BandwidthModel()
+            if options.deploy_bandwidth:
+                model.settings["bandwidth"] = options.deploy_bandwidth
+            kwargs = estimate(model, **kwargs)
+        if options.shards or options.shard_duration:
+            runtimes = None
+            if options.shard_runtimes:
+                runtimes = load_runtimes(options.shard_runtimes)
+            specs = shard(options.shards, options.shard_duration, runtimes, **kwargs)
+        else:
+            specs = [kwargs]
+        if options.max_job_timeout:
+            specs = [s for spec in specs for s in plan(options.max_job_timeout, **spec)]
+        jobs = [Job(**spec) for spec in specs]
+        if options.preflight:
+            for job in jobs:
+                job.initialize()
+            # The report goes to stderr, stdout being the job definition
+            for result in check(jobs):
+                failed = result["error"] or result["status"] not in [200, 206]
+                if failed or options.debug:
+                    sys.stderr.write(
+                        "preflight: {name} {url}: {state}\n".format(
+                            state=result["error"]
+                            or f"{result['status']} ({result['size']} bytes)",
+                            **result,
+                        )
+                    )
+        cache = RenderCache(options.cache_dir) if options.cache_dir else None
+        # Jobs initialized by --preflight are not initialized again
+        write(jobs, options.format, cache)
     except TuxLavaException as exc:
         parser.error(str(exc))
     except Exception as exc:
@@ -22,18 +22,25 @@ from tuxlava.utils import pathurlnone
 ###########
 def filter_options(options):
     keys = [
+        "arguments",
+        "artefact_store",
         "cache_dir",
+        "checksums",
         "debug",
+        "decompress_rootfs",
         "deploy_os",
         "device",
         "device_dict",
         "d_dict_config",
         "extra_assets",
+        "initialized",
         "lava_definition",
+        "merge_overlays",
         "qemu_binary",
         "qemu_image",
         "shell",
         "shared",
+        "slim_modules",
         "test_definitions",
         "timeouts",
         "tmpdir",
@@ -54,20 +61,7 @@ class ListDevicesAction(argparse.Action):
         super().__init__(option_strings, dest=dest, default=default, nargs=0, help=help)
 
     def __call__(self, parser, namespace, values, option_string=None):
-        parser._print_message(
-            "\n".join([d.name for d in Device.list()]) + "\n", sys.stdout
-        )
-        parser.exit()
-
-
-class ListTestsAction(argparse.Action):
-    def __init__(
-        self, option_strings, help, dest=argparse.SUPPRESS, default=argparse.SUPPRESS
-    ):
-        super().__init__(option_strings, dest=dest, default=default, nargs=0, help=help)
-
-    def __call__(self, parser, namespace, values, option_string=None):
-        parser._print_message("\n".join(Test.list()) + "\n", sys.stdout)
+        parser._print_message("\n".join(Device.names()) + "\n", sys.stdout)
         parser.exit()
 
 
@@ -92,6 +86,9 @@ class KeyValueIntAction(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         KEYS = ["deploy", "boot"] + Test.list()
         for value in values:
+            if value == "auto":
+                namespace.auto_timeouts = True
+                continue
             try:
                 key, value = value.split("=")
             except ValueError:
@@ -156,7 +153,10 @@ def setup_parser() -> argparse.ArgumentParser:
         "--list-devices", action=ListDevicesAction, help="List available devices"
     )
     group.add_argument(
-        "--list-tests", action=ListTestsAction, help="List available tests"
+        "--list-tests",
+        default=False,
+        action="store_true",
+        help="List available tests, or the tests supported by --device",
     )
 
     group = parser.add_argument_group("artefacts")
@@ -285,8 +285,7 @@ def setup_parser() -> argparse.ArgumentParser:
         nargs="+",
         default=[],
         metavar="T",
-        help="test suites",
-        choices=Test.list(),
+        help="test suites, or patterns like 'ltp-*' with --max-job-timeout, --shards or --shard-duration",
         action="extend",
     )
     group.add_argument(
@@ -306,7 +305,7 @@ def setup_parser() -> argparse.ArgumentParser:
         default=None,
         metavar="NAME",
         help="Device type",
-        choices=[d.name for d in Device.list()],
+        choices=Device.names(),
     )
     group.add_argument(
         "--device-dict",
@@ -329,10 +328,11 @@ def setup_parser() -> argparse.ArgumentParser:
         metavar="K=V",
         default={},
         type=str,
-        help="timeouts in minutes as action=duration",
+        help="timeouts in minutes as action=duration, or 'auto' to compute the test timeouts from the recorded durations",
         action=KeyValueIntAction,
         nargs="+",
     )
+    parser.set_defaults(auto_timeouts=False)
     group.add_argument(
         "--deploy-os",
         default="debian",
@@ -389,6 +389,111 @@ def setup_parser() -> argparse.ArgumentParser:
         help="Use qemu from the given path",
     )
 
+    group.add_argument(
+        "--cache-dir",
+        default=None,
+        type=Path,
+        metavar="PATH",
+        help="Directory used to cache the rendered definitions",
+    )
+    group.add_argument(
+        "--artefact-store",
+        default=False,
+        action="store_true",
+        help="Point the job to copies of the local modules, overlays and parameter files, stored by content in the cache directory",
+    )
+    group.add_argument(
+        "--decompress-rootfs",
+        default=False,
+        action="store_true",
+        help="Decompress the rootfs once in the cache directory and point the job to the raw image (qemu, fvp and avh devices)",
+    )
+    group.add_argument(
+        "--merge-overlays",
+        default=False,
+        action="store_true",
+        help="Merge the modules and overlay tarballs into a single overlay, cached in the cache directory",
+    )
+    group.add_argument(
+        "--slim-modules",
+        default=None,
+        metavar="MODE",
+        help="Keep only the needed modules in the modules tarball, cached in the cache directory: auto (modules of the tests), none or a comma separated list of modules",
+    )
+
+    group = parser.add_argument_group("planning")
+    group.add_argument(
+        "--max-job-timeout",
+        default=None,
+        metavar="MINUTES",
+        type=int,
+        help="Split the tests into the fewest jobs whose timeout, including deploy and boot, stays under the given duration",
+    )
+
+    group = parser.add_argument_group("durations")
+    group.add_argument(
+        "--durations",
+        default=None,
+        metavar="FILE",
+        type=Path,
+        help="Test durations database. Default is $XDG_CACHE_HOME/tuxlava/durations.json",
+    )
+    group.add_argument(
+        "--record-durations",
+        default=[],
+        metavar="RESULTS",
+        type=Path,
+        nargs="+",
+        help="Record the test durations of LAVA results files (YAML or JSON) for the given device",
+    )
+
+    group = parser.add_argument_group("deploy timeout estimation")
+    group.add_argument(
+        "--deploy-bandwidth",
+        default=None,
+        metavar="MBPS",
+        type=float,
+        help="Compute the deploy timeout from the size of the artefacts, downloaded at the given speed in MB/s",
+    )
+    group.add_argument(
+        "--bandwidth-model",
+        default=None,
+        metavar="FILE",
+        type=Path,
+        help="Compute the deploy timeout from the size of the artefacts, with the lab bandwidth model in the given JSON file",
+    )
+
+    group = parser.add_argument_group("preflight")
+    group.add_argument(
+        "--preflight",
+        default=False,
+        action="store_true",
+        help="Check that every artefact of the job exists before writing it, failing on missing ones",
+    )
+
+    group = parser.add_argument_group("sharding")
+    group.add_argument(
+        "--shards",
+        default=None,
+        metavar="N",
+        type=int,
+        help="Split the ltp, kselftest and modules tests into N jobs, using SHARD_NUMBER and SHARD_INDEX",
+    )
+    group.add_argument(
+        "--shard-duration",
+        default=None,
+        metavar="MINUTES",
+        type=int,
+        help="Split the ltp and kselftest tests into jobs lasting the given duration",
+    )
+    group.add_argument(
+        "--shard-runtimes",
+        default=None,
+        metavar="FILE",
+        type=Path,
+        help="JSON file with the runtime in seconds of each testcase by test, used to balance the shards",
+    )
+
     group = parser.add_argument_group("test job")
     group.add_argument(
         "--visibility",
@@ -399,6 +504,25 @@ def setup_parser() -> argparse.ArgumentParser:
     )
 
     group = parser.add_argument_group("output")
+    group.add_argument(
+        "--format",
+        default="yaml",
+        choices=["yaml", "json"],
+        help="Output format of the job definition. Default is 'yaml'",
+    )
+    group.add_argument(
+        "--profile",
+        default=None,
+        metavar="FILE",
+        type=Path,
+        help="Write the duration of each phase (parsing, initialization, rendering of the templates) as JSON to FILE",
+    )
+    group.add_argument(
+        "--checksums",
+        default=False,
+        action="store_true",
+        help="Add the sha256sum of the local artefacts (file:// URLs) to the job",
+    )
     group.add_argument(
         "--lava-definition",
         default=False,
@@ -414,6 +538,38 @@ def setup_parser() -> argparse.ArgumentParser:
         nargs="*",
     )
 
+    group = parser.add_argument_group("batch")
+    group.add_argument(
+        "--batch",
+        default=None,
+        metavar="FILE",
+        type=argparse.FileType("r"),
+        help="Render every job spec from the given JSON list ('-' for stdin) and print the results as JSON",
+    )
+    group.add_argument(
+        "--batch-workers",
+        default=None,
+        metavar="NUMBER",
+        type=int,
+        help="Number of worker processes used by --batch. Defaults to the number of CPUs",
+    )
+    group.add_argument(
+        "--batch-deadline",
+        default=120,
+        metavar="SECONDS",
+        type=float,
+        help="Time allowed to fetch the metadata of the --tuxbuild builds of the batch, fetched concurrently. Default is 120",
+    )
+
+    group = parser.add_argument_group("server")
+    group.add_argument(
+        "--serve",
+        default=None,
+        metavar="SOCKET",
+        type=Path,
+        help="Render the job specs received as lines of JSON on the given unix socket",
+    )
+
     group = parser.add_argument_group("debugging")
     group.add_argument(
         "--debug",
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import fnmatch
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tuxlava.devices import Device
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.jobs import TEST_DEFINITIONS, Job
+from tuxlava.planner import expand
+from tuxlava.preflight import ARTEFACTS, is_url, preflight
+from tuxlava.tests import Test
+
+# Settings of a model, overridable by device name pattern
+SETTINGS = {
+    # Download speed of the artefacts, in MB/s
+    "bandwidth": 10.0,
+    # Fixed cost of a deploy, in minutes
+    "overhead": 2.0,
+    # Factor applied to the transfer time, for decompression and writing
+    "margin": 2.0,
+    # Shortest deploy timeout, in minutes
+    "minimum": 3,
+}
+
+
+class BandwidthModel:
+    """Deploy duration of the artefacts of a job, from their size
+
+    The settings can be changed for the devices matching a pattern, like
+    {"fastboot-*": {"bandwidth": 4}}, the first matching pattern applying.
+    """
+
+    def __init__(self, devices: Optional[Dict[str, Dict[str, float]]] = None, **kwargs):
+        unknown = set(kwargs) - set(SETTINGS)
+        for overrides in (devices or {}).values():
+            unknown.update(set(overrides) - set(SETTINGS))
+        if unknown:
+            raise InvalidArgument(
+                f"Unknown bandwidth model setting(s): {', '.join(sorted(unknown))}"
+            )
+        self.settings = {**SETTINGS, **kwargs}
+        self.devices = devices or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "BandwidthModel":
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise InvalidArgument(f"Invalid bandwidth model '{path}': {exc}")
+        if not isinstance(data, dict):
+            raise InvalidArgument(
+                f"Invalid bandwidth model '{path}': expecting an object"
+            )
+        return cls(**data)
+
+    def get(self, device: str) -> Dict[str, Any]:
+        for pattern, overrides in self.devices.items():
+            if fnmatch.fnmatch(device, pattern):
+                return {**self.settings, **overrides}
+        return self.settings
+
+    def deploy_timeout(self, device: str, sizes: List[int]) -> int:
+        """Deploy timeout in minutes for artefacts of the given sizes in bytes"""
+        settings = self.get(device)
+        transfer = sum(sizes) / (settings["bandwidth"] * 1024 * 1024) / 60
+        minutes = settings["overhead"] + transfer * settings["margin"]
+        return max(math.ceil(minutes), int(settings["minimum"]))
+
+
+def deploy_urls(job: Job) -> List[str]:
+    """URLs of the artefacts a job downloads at deploy, before initialize()
+
+    Only the build is resolved and the device defaults applied: the rest
+    of initialize() (decompressed rootfs, boot disks, ...) does not change
+    what is downloaded. The URLs given as parameters are downloaded by the
+    tests, not at deploy. Test name patterns are expanded like when planning.
+    """
+    job.apply_build()
+    Device.select(job.device)().default(job)
+    urls = [getattr(job, name) for name in ARTEFACTS]
+    if job.modules:
+        urls.append(job.modules[0])
+    urls.extend(overlay[0] for overlay in job.overlays)
+    urls.extend(job.pflash)
+    tests = expand(job.device, job.tests)
+    if any(Test.select(name).need_test_definition for name in tests):
+        urls.append(TEST_DEFINITIONS)
+    return [url for url in urls if is_url(url)]
+
+
+def estimate(model: BandwidthModel, **kwargs) -> Dict[str, Any]:
+    """Job arguments with a deploy timeout computed from the artefact sizes
+
+    The artefacts are probed like with preflight. An explicit deploy
+    timeout is kept, and so are the template defaults when no size is
+    known.
+    """
+    timeouts = kwargs.get("timeouts") or {}
+    if "deploy" in timeouts:
+        return kwargs
+
+    job = Job(**kwargs)
+    results = preflight(deploy_urls(job))
+    sizes = [r["size"] for r in results if r["size"] is not None]
+    if not sizes:
+        return kwargs
+    deploy = model.deploy_timeout(job.device, sizes)
+    return {**kwargs, "timeouts": {**timeouts, "deploy": deploy}}
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import contextlib
+import fcntl
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+from tuxlava.checksums import file_path, sha256
+from tuxlava.utils import atomic_path, evict_directories
+
+# ioctl cloning a file on filesystems sharing extents (btrfs, xfs)
+FICLONE = 0x40049409
+
+
+class RenderCache:
+    """Rendered definitions stored by job fingerprint
+
+    The least recently used definitions are removed when the cache grows
+    over max_size bytes.
+    """
+
+    def __init__(self, directory: Path, max_size: int = 64 * 1024 * 1024):
+        self.directory = Path(directory) / "definitions"
+        self.max_size = max_size
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.yaml"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        try:
+            definition = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        # Mark the entry as recently used
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return definition
+
+    def put(self, key: str, definition: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with atomic_path(self.path(key)) as tmp:
+            tmp.write_text(definition, encoding="utf-8")
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.yaml"):
+            with contextlib.suppress(FileNotFoundError):
+                st = path.stat()
+                entries.append((st.st_mtime, st.st_size, path))
+        size = sum(e[1] for e in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+            size -= entry_size
+
+
+class ArtefactStore:
+    """Local artefacts stored by content, as <sha256>/<name>
+
+    Files are added by hardlink, by reflink when on another filesystem,
+    and copied as a last resort, so identical artefacts of many jobs share
+    one copy. The least recently used artefacts are removed when the store
+    grows over max_size bytes.
+    """
+
+    def __init__(self, directory: Path, max_size: int = 16 * 1024 * 1024 * 1024):
+        self.directory = Path(directory) / "artefacts"
+        self.max_size = max_size
+
+    def add(self, path: Path) -> Path:
+        path = Path(path)
+        digest = sha256(path)
+        blob = self.directory / digest / path.name
+        # A hardlinked blob changes with its source when modified in place
+        if not (blob.exists() and sha256(blob) == digest):
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_path(blob) as tmp:
+                # link() creates its destination
+                tmp.unlink()
+                link(path, tmp)
+        # Mark the entry as recently used, the blob mtime being the source one
+        os.utime(blob.parent)
+        return blob
+
+    def url(self, url: Any) -> Any:
+        """URL of the stored copy of a local file, other values unchanged"""
+        path = file_path(url) if isinstance(url, str) else None
+        if path is None or not path.is_file():
+            return url
+        return f"file://{self.add(path)}"
+
+    def evict(self) -> None:
+        evict_directories(self.directory, self.max_size)
+
+
+def link(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+        try:
+            fcntl.ioctl(f_out.fileno(), FICLONE, f_in.fileno())
+        except OSError:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+    shutil.copystat(src, dst)
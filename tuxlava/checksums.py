@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import contextlib
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from tuxlava.utils import atomic_path, cache_home, use_entry
+
+# Read buffer, large enough for the hashing to not be bound by the syscalls
+BUFFER_SIZE = 1024 * 1024
+
+# Size of the cached digests, 64 bytes each, before the least recently
+# used ones are removed
+MAX_SIZE = 1024 * 1024
+
+# Digests computed by this process, by file identity
+DIGESTS: Dict[Tuple[int, int, int, int], str] = {}
+
+URL_LINE = re.compile(
+    r'^(?P<indent>[ -]*)url: "?(?P<url>(?:file://|/)[^"\s]+)"?[ \t]*$', re.M
+)
+
+
+def compute(path: Path) -> str:
+    digest = hashlib.sha256()
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def sha256(path: Path, max_size: int = MAX_SIZE) -> str:
+    """sha256 of a file, cached by device, inode, size and modification time
+
+    The digests are kept on disk so that unchanged files are never hashed
+    again, across processes. The least recently used ones are removed
+    when they grow over max_size bytes.
+    """
+    st = os.stat(path)
+    key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    if key in DIGESTS:
+        return DIGESTS[key]
+
+    directory = cache_home() / "checksums" / f"{st.st_dev}-{st.st_ino}"
+    entry = directory / f"{st.st_size}-{st.st_mtime_ns}"
+    digest: Optional[str] = None
+    with contextlib.suppress(OSError):
+        digest = entry.read_text(encoding="utf-8").strip() or None
+        # Mark the entry as recently used
+        os.utime(directory)
+    if digest is None:
+        digest = compute(path)
+        with contextlib.suppress(OSError):
+            directory.mkdir(parents=True, exist_ok=True)
+            # Older versions of the file, not the files being written
+            for old in directory.glob("[!.]*"):
+                old.unlink()
+            with atomic_path(entry) as tmp:
+                tmp.write_text(digest, encoding="utf-8")
+            # Files of removed build directories are never hashed again
+            use_entry(directory, max_size)
+    DIGESTS[key] = digest
+    return digest
+
+
+def file_path(url: str) -> Optional[Path]:
+    if url.startswith("/"):
+        return Path(url)
+    parsed = urlparse(url)
+    if parsed.scheme != "file":
+        return None
+    return Path(unquote(parsed.path))
+
+
+def local_files(arguments: Dict[str, Any]) -> Dict[str, List[int]]:
+    """Size and modification time of the local files given as arguments"""
+    values = list(arguments.values())
+    files = {}
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            values.extend(value)
+            continue
+        if not isinstance(value, str):
+            continue
+        path = file_path(value)
+        if path is not None and path.is_file():
+            st = path.stat()
+            files[str(path)] = [st.st_size, st.st_mtime_ns]
+    return files
+
+
+def embed(definition: str) -> str:
+    """Add the sha256sum of the local files to their url in a definition"""
+
+    def replace(match):
+        path = file_path(match.group("url"))
+        if path is None or not path.is_file():
+            return match.group(0)
+        indent = " " * len(match.group("indent"))
+        return f"{match.group(0)}\n{indent}sha256sum: {sha256(path)}"
+
+    return URL_LINE.sub(replace, definition)
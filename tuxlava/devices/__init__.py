@@ -6,43 +6,84 @@
 #
 # SPDX-License-Identifier: MIT
 
-from typing import Any, Dict, List, Optional
+import importlib
+from typing import Any, Dict, Iterator, List, Optional, Type
 
 from tuxlava.exceptions import InvalidArgument
-from tuxlava import templates
+from tuxlava import index
+from tuxlava.profile import phase
 
+# Device classes by name, filled when the classes are defined
+DEVICES: Dict[str, Type["Device"]] = {}
 
-def subclasses(cls):
-    return set(cls.__subclasses__()).union(
-        [s for c in cls.__subclasses__() for s in subclasses(c)]
-    )
+
+def load(name=None):
+    # Import the module defining the given device, or every device module
+    if name is None:
+        modules = sorted({module for module, _ in index.DEVICES.values()})
+    elif name in index.DEVICES and name not in DEVICES:
+        modules = [index.DEVICES[name][0]]
+    else:
+        modules = []
+    for module in modules:
+        importlib.import_module(f"tuxlava.devices.{module}")
 
 
 class Device:
     name: str = ""
     flag_use_pre_run_cmd: bool = False
     flag_cache_rootfs: bool = False
+    # The first secret authenticates the downloads of the artefacts
+    flag_secrets_headers: bool = True
     reboot_to_fastboot: str = "false"
     redirect_to_kmsg: bool = True
     real_device: bool = True
+    # Default timeouts of the job template actions, in minutes
+    deploy_download_timeout: int = 0
+    deploy_timeout: int = 0
+    boot_timeout: int = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get("name"):
+            DEVICES[cls.name] = cls
 
     @classmethod
     def select(cls, name):
-        for subclass in subclasses(cls):
-            if subclass.name == name:
-                return subclass
+        load(name)
+        subclass = DEVICES.get(name)
+        if subclass is not None and issubclass(subclass, cls):
+            return subclass
         raise InvalidArgument(
-            f"Unknown device {name}. Available: {', '.join([c.name for c in cls.list()])}"
+            f"Unknown device {name}. Available: {', '.join(cls.names())}"
+        )
+
+    @classmethod
+    def names(cls, virtual_device=False) -> List[str]:
+        """Names of the devices, without importing their modules"""
+        if cls is not Device:
+            return [d.name for d in cls.list(virtual_device=virtual_device)]
+        names = {
+            name
+            for name, (_, real_device) in index.DEVICES.items()
+            if not (virtual_device and real_device)
+        }
+        names.update(
+            name
+            for name, device in DEVICES.items()
+            if not (virtual_device and device.real_device)
         )
+        return sorted(names)
 
     @classmethod
     def list(cls, virtual_device=False) -> List["Device"]:
-        if virtual_device:
-            return sorted(
-                [s for s in subclasses(cls) if s.name and not s.real_device],
-                key=lambda d: d.name,
-            )
-        return sorted([s for s in subclasses(cls) if s.name], key=lambda d: d.name)
+        load()
+        return [
+            DEVICES[name]
+            for name in sorted(DEVICES)
+            if issubclass(DEVICES[name], cls)
+            and not (virtual_device and DEVICES[name].real_device)
+        ]
 
     def validate(self, **kwargs):
         raise NotImplementedError  # pragma: no cover
@@ -50,8 +91,29 @@ class Device:
     def default(self, options) -> None:
         raise NotImplementedError  # pragma: no cover
 
+    def overhead(self, timeouts: Dict[str, int]) -> int:
+        """Minutes of the job timeout spent before the tests, as rendered"""
+        minutes = timeouts.get("deploy", self.deploy_timeout)
+        minutes += timeouts.get("boot", self.boot_timeout)
+        if self.deploy_download_timeout:
+            minutes += timeouts.get("deploy", self.deploy_download_timeout)
+        return minutes
+
+    def download_headers(self, secrets: Dict[str, Any]) -> Dict[str, str]:
+        """Headers LAVA sends with the downloads of the artefacts, as rendered"""
+        return {}
+
     def definition(self, **kwargs) -> str:
-        raise NotImplementedError  # pragma: no cover
+        return "".join(self.iter_definition(**kwargs))
+
+    def iter_definition(self, **kwargs) -> Iterator[str]:
+        """Yield the job definition in chunks
+
+        Devices implement either definition() or iter_definition(). The
+        tests are rendered before the job template, as rendering a test can
+        add overlays to the deploy action.
+        """
+        yield self.definition(**kwargs)
 
     def device_dict(
         self, context: Dict, d_dict_config: Optional[Dict[str, Any]] = None
@@ -66,6 +128,19 @@ class Device:
         """
         raise NotImplementedError  # pragma: no cover
 
+    def _generate(self, filename: str, **kwargs) -> Iterator[str]:
+        # Render the job template in chunks
+        from tuxlava import templates
+
+        kwargs = {
+            "deploy_download_timeout": self.deploy_download_timeout,
+            "deploy_timeout": self.deploy_timeout,
+            "boot_timeout": self.boot_timeout,
+            **kwargs,
+        }
+        with phase("template"):
+            yield from templates.jobs().get_template(filename).generate(**kwargs)
+
     def _render_device_dict(
         self,
         template_name: str,
@@ -73,6 +148,8 @@ class Device:
         d_dict_config: Optional[Dict[str, Any]] = None,
         d_dict_defaults: Optional[Dict[str, str]] = None,
     ) -> str:
+        from tuxlava import templates
+
         context = context or {}
         if hasattr(self, "test_character_delay") and self.test_character_delay:
             context["test_character_delay"] = self.test_character_delay
@@ -92,13 +169,3 @@ class Device:
 
     def extra_assets(self, tmpdir, **kwargs) -> List[str]:
         return []
-
-
-import tuxlava.devices.avh  # noqa: E402
-import tuxlava.devices.fastboot  # noqa: E402
-import tuxlava.devices.fvp  # noqa: E402
-import tuxlava.devices.nfs  # noqa: E402,F401
-import tuxlava.devices.nfs_bootloader  # noqa: E402,F401
-import tuxlava.devices.qemu  # noqa: E402,F401
-import tuxlava.devices.ssh  # noqa: E402,F401
-import tuxlava.devices.flasher  # noqa: E402,F401
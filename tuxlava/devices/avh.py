@@ -17,7 +17,11 @@ from tuxlava.utils import compression, notnone, slugify
 class AvhDevice(Device):
     flag_use_pre_run_cmd = True
     flag_cache_rootfs = True
+    # The secrets are the AVH API token
+    flag_secrets_headers = False
     real_device = False
+    deploy_timeout = 15
+    boot_timeout = 15
 
     api_endpoint: str = "https://app.avh.arm.com/api"
     api_token: str = ""
@@ -82,7 +86,7 @@ class AvhDevice(Device):
         options.kernel = notnone(options.kernel, self.kernel)
         options.rootfs = notnone(options.rootfs, self.rootfs)
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         # Options that can *not* be updated
@@ -121,9 +125,8 @@ class AvhDevice(Device):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template("avh.yaml.jinja2").render(
-            **kwargs
-        ) + "".join(tests)
+        yield from self._generate("avh.yaml.jinja2", **kwargs)
+        yield from tests
 
     def device_dict(
         self, context: Dict[str, Any], d_dict_config: Optional[Dict[str, Any]] = None
@@ -8,13 +8,16 @@
 
 from typing import Any, Dict, List, Optional
 
-from tuxlava import templates
 from tuxlava.devices import Device
 from tuxlava.exceptions import InvalidArgument
 from tuxlava.utils import compression, notnone, slugify
 
 
 class FastbootDevice(Device):
+    deploy_download_timeout = 25
+    deploy_timeout = 30
+    boot_timeout = 25
+
     arch: str = ""
     lava_arch: str = ""
     machine: str = ""
@@ -114,7 +117,7 @@ class FastbootDevice(Device):
         options.boot = notnone(options.boot, self.boot)
         options.rootfs = notnone(options.rootfs, self.rootfs)
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         # Options that can *not* be updated
@@ -164,9 +167,8 @@ class FastbootDevice(Device):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template(self.template).render(**kwargs) + "".join(
-            tests
-        )
+        yield from self._generate(self.template, **kwargs)
+        yield from tests
 
     def device_dict(
         self, context: Dict[str, Any], d_dict_config: Optional[Dict[str, Any]] = None
@@ -314,6 +316,10 @@ class FastbootQRB5165rb5(FastbootDevice):
 
 
 class FastbootAOSPDevice(Device):
+    deploy_download_timeout = 25
+    deploy_timeout = 30
+    boot_timeout = 25
+
     arch: str = ""
     lava_arch: str = ""
     machine: str = ""
@@ -359,7 +365,7 @@ class FastbootAOSPDevice(Device):
     def default(self, options) -> None:
         pass
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         # Options that can *not* be updated
@@ -412,9 +418,8 @@ class FastbootAOSPDevice(Device):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template("fastboot-aosp.yaml.jinja2").render(
-            **kwargs
-        ) + "".join(tests)
+        yield from self._generate("fastboot-aosp.yaml.jinja2", **kwargs)
+        yield from tests
 
 
 class FastbootAOSPDragonboard_845c(FastbootAOSPDevice):
@@ -3,10 +3,9 @@
 # SPDX-License-Identifier: MIT
 
 from os.path import basename
-from typing import List
+from typing import Any, Dict, List
 from urllib.parse import urlparse
 
-from tuxlava import templates
 from tuxlava.devices import Device
 from tuxlava.exceptions import InvalidArgument, MissingArgument
 from tuxlava.utils import notnone
@@ -21,6 +20,10 @@ class FlasherDevice(Device):
     variable in the decvice dictionary.
     """
 
+    deploy_download_timeout = 25
+    deploy_timeout = 30
+    boot_timeout = 25
+
     arch: str = ""
     lava_arch: str = ""
     machine: str = ""
@@ -61,7 +64,10 @@ class FlasherDevice(Device):
     def default(self, options) -> None:
         options.rootfs = notnone(options.rootfs, self.rootfs)
 
-    def definition(self, **kwargs):
+    def download_headers(self, secrets: Dict[str, Any]) -> Dict[str, str]:
+        return {str(k): str(v) for k, v in (secrets or {}).items()}
+
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         kwargs["rootfs"] = notnone(kwargs.get("rootfs"), self.rootfs)
@@ -84,9 +90,8 @@ class FlasherDevice(Device):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template(self.template).render(**kwargs) + "".join(
-            tests
-        )
+        yield from self._generate(self.template, **kwargs)
+        yield from tests
 
 
 class FlasherQCS6490(FlasherDevice):
@@ -22,6 +22,14 @@ class FVPDevice(Device):
     real_device = False
     deploy_timeout = 5
 
+    def overhead(self, timeouts: Dict[str, int]) -> int:
+        boot = timeouts.get("boot", self.boot_timeout)
+        # Like the deploy timeout of a job without tests
+        deploy = timeouts.get("deploy") or self.deploy_timeout + (
+            10 if boot < 15 else 0
+        )
+        return deploy + boot
+
     def device_dict(
         self, context: Dict[str, Any], d_dict_config: Optional[Dict[str, Any]] = None
     ) -> str:
@@ -89,7 +97,7 @@ class AEMvAFVPDevice(FVPDevice):
         options.rootfs = notnone(options.rootfs, self.rootfs)
         options.uefi = notnone(options.uefi, self.uefi)
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         kwargs["no_network"] = not kwargs["enable_network"]
@@ -124,9 +132,8 @@ class AEMvAFVPDevice(FVPDevice):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template("fvp-aemva.yaml.jinja2").render(
-            **kwargs
-        ) + "".join(tests)
+        yield from self._generate("fvp-aemva.yaml.jinja2", **kwargs)
+        yield from tests
 
     def _url_to_filename(self, url):
         """Convert URL to the filename format used by tuxrun cache."""
@@ -219,7 +226,7 @@ class MorelloFVPDevice(FVPDevice):
         if self.rootfs:
             options.rootfs = notnone(options.rootfs, self.rootfs)
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         # Options that can *not* be updated
@@ -243,11 +250,9 @@ class MorelloFVPDevice(FVPDevice):
             )
             for t in kwargs["tests"]
         ]
-        return (
-            templates.jobs().get_template("fvp-morello.yaml.jinja2").render(**kwargs)
-            + "\n"
-            + "".join(tests)
-        )
+        yield from self._generate("fvp-morello.yaml.jinja2", **kwargs)
+        yield "\n"
+        yield from tests
 
 
 class FVPMorelloAndroid(MorelloFVPDevice):
@@ -8,13 +8,15 @@
 
 from typing import Any, Dict, List, Optional
 
-from tuxlava import templates
 from tuxlava.devices import Device
 from tuxlava.exceptions import InvalidArgument
 from tuxlava.utils import compression, notnone, slugify
 
 
 class NfsDevice(Device):
+    deploy_timeout = 30
+    boot_timeout = 15
+
     arch: str = ""
     lava_arch: str = ""
     machine: str = ""
@@ -93,7 +95,7 @@ class NfsDevice(Device):
         options.kernel = notnone(options.kernel, self.kernel)
         options.rootfs = notnone(options.rootfs, self.rootfs)
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         # Options that can *not* be updated
@@ -138,9 +140,8 @@ class NfsDevice(Device):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template("nfs.yaml.jinja2").render(
-            **kwargs
-        ) + "".join(tests)
+        yield from self._generate("nfs.yaml.jinja2", **kwargs)
+        yield from tests
 
     def device_dict(
         self, context: Dict[str, Any], d_dict_config: Optional[Dict[str, Any]] = None
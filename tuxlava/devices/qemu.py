@@ -6,23 +6,61 @@
 #
 # SPDX-License-Identifier: MIT
 
+import contextlib
 import gzip
+import hashlib
+import io
+import os
 import platform
-import shutil
-import subprocess
+import struct
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
 
 from tuxlava import templates
+from tuxlava.cache import link
+from tuxlava.checksums import sha256
 from tuxlava.devices import Device
 from tuxlava.exceptions import InvalidArgument
-from tuxlava.utils import compression, notnone, slugify
+from tuxlava.fat import write_image
+from tuxlava.overlays import auth_headers
+from tuxlava.utils import atomic_path, compression, notnone, slugify, use_entry
+
+# Size of the boot disks kept in the cache directory, before the least
+# recently used ones are removed
+BOOT_DISKS_SIZE = 1024 * 1024 * 1024
+
+
+def boot_disk(path: Path, kernel: Path, cmdline: str) -> None:
+    """Write the FAT boot disk with the kernel Image and its startup.nsh"""
+    startup = cmdline.encode("utf-8")
+    if compression(f"file://{kernel}")[1] == "gz":
+        # Uncompressed size modulo 4GiB, from the gzip trailer
+        with open(kernel, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            size = struct.unpack("<I", f.read(4))[0]
+        image = gzip.open(kernel, "rb")
+    else:
+        size = kernel.stat().st_size
+        image = open(kernel, "rb")
+    with image:
+        try:
+            write_image(
+                path,
+                [
+                    ("Image", size, image),
+                    ("startup.nsh", len(startup), io.BytesIO(startup)),
+                ],
+            )
+        except ValueError as exc:
+            raise InvalidArgument(f"argument --enable-cca: {exc}")
 
 
 class QemuDevice(Device):
     flag_cache_rootfs = True
     real_device = False
+    deploy_timeout = 15
+    boot_timeout = 15
 
     arch: str = ""
     lava_arch: str = ""
@@ -92,6 +130,9 @@ class QemuDevice(Device):
         for test in tests:
             test.validate(device=self, parameters=parameters, **kwargs)
 
+    def download_headers(self, secrets: Dict[str, Any]) -> Dict[str, str]:
+        return auth_headers(secrets)
+
     def default(self, options) -> None:
         options.bios = notnone(options.bios, self.bios)
         options.dtb = notnone(options.dtb, self.dtb)
@@ -101,7 +142,7 @@ class QemuDevice(Device):
     def arch_customization(self, kwargs):
         pass
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         kwargs = kwargs.copy()
 
         # Options that can *not* be updated
@@ -151,9 +192,8 @@ class QemuDevice(Device):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template("qemu.yaml.jinja2").render(
-            **kwargs
-        ) + "".join(tests)
+        yield from self._generate("qemu.yaml.jinja2", **kwargs)
+        yield from tests
 
     def device_dict(
         self, context: Dict[str, Any], d_dict_config: Optional[Dict[str, Any]] = None
@@ -219,42 +259,34 @@ class QemuArm64(QemuDevice):
         if enable_trustzone:
             self.machine = f"{self.machine},secure=on"
 
-    def extra_assets(self, tmpdir, kernel, enable_cca, tux_boot_args, **kwargs):
+    def extra_assets(
+        self, tmpdir, kernel, enable_cca, tux_boot_args, cache_dir=None, **kwargs
+    ):
         # sbsa-ref has no -kernel; EDK2 loads the kernel from a FAT
         # disk via startup.nsh in the UEFI shell.
         if not enable_cca:
             return []
 
         kernel_path = Path(urlparse(notnone(kernel, self.kernel)).path)
-        boot_dir = tmpdir / "boot"
-        boot_dir.mkdir(exist_ok=True)
-
-        image = boot_dir / "Image"
-        if compression(kernel_path.name)[1] == "gz":
-            with gzip.open(kernel_path, "rb") as f_in, open(image, "wb") as f_out:
-                shutil.copyfileobj(f_in, f_out)
-        else:
-            shutil.copy2(kernel_path, image)
-
         boot_args = tux_boot_args + " " if tux_boot_args else ""
         cmdline = f"Image root=/dev/vda {boot_args}rw console=ttyAMA0 earlycon"
-        startup = boot_dir / "startup.nsh"
-        startup.write_text(cmdline, encoding="utf-8")
 
         fat_img = tmpdir / "boot.img"
-        with open(fat_img, "wb") as f:
-            f.truncate(image.stat().st_size + 4 * 1024 * 1024)
-        try:
-            subprocess.run(["mformat", "-i", str(fat_img), "::"], check=True)
-            subprocess.run(
-                ["mcopy", "-i", str(fat_img), str(image), str(startup), "::"],
-                check=True,
-            )
-        except FileNotFoundError as exc:
-            raise InvalidArgument(
-                f"argument --enable-cca requires mtools ({exc.filename}) to build the boot disk"
-            )
-
+        with contextlib.suppress(FileNotFoundError):
+            fat_img.unlink()
+        if not cache_dir:
+            boot_disk(fat_img, kernel_path, cmdline)
+            return [f"file://{fat_img}"]
+
+        # Boot disks are cached by kernel content and command line
+        key = hashlib.sha256(f"{sha256(kernel_path)}\n{cmdline}".encode()).hexdigest()
+        cached = Path(cache_dir) / "bootdisks" / key / "boot.img"
+        if not cached.exists():
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_path(cached) as tmp:
+                boot_disk(tmp, kernel_path, cmdline)
+        link(cached, fat_img)
+        use_entry(cached.parent, BOOT_DISKS_SIZE)
         return [f"file://{fat_img}"]
 
     def arch_customization(self, kwargs):
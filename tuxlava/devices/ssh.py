@@ -19,6 +19,11 @@ class SSHDevice(Device):
     ssh_port = 22
     redirect_to_kmsg = False
     real_device = False
+    boot_timeout = 3
+
+    def overhead(self, timeouts: Dict[str, int]) -> int:
+        # Nothing is deployed
+        return timeouts.get("boot", self.boot_timeout)
 
     def validate(
         self,
@@ -50,7 +55,7 @@ class SSHDevice(Device):
     def default(self, options) -> None:
         options.ssh_port = notnone(options.ssh_port, self.ssh_port)
 
-    def definition(self, **kwargs):
+    def iter_definition(self, **kwargs):
         # Options that can be updated
         if kwargs["ssh_prompt"]:
             kwargs["ssh_prompt"] = [kwargs["ssh_prompt"]]
@@ -77,9 +82,8 @@ class SSHDevice(Device):
             )
             for t in kwargs["tests"]
         ]
-        return templates.jobs().get_template("ssh.yaml.jinja2").render(
-            **kwargs
-        ) + "".join(tests)
+        yield from self._generate("ssh.yaml.jinja2", **kwargs)
+        yield from tests
 
     def device_dict(
         self, context: Dict[str, Any], d_dict_config: Optional[Dict[str, Any]] = None
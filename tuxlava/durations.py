@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.tests import Test
+from tuxlava.utils import atomic_path, cache_home, yaml_load
+
+# Samples kept for each (device, test), the most recent ones
+MAX_SAMPLES = 100
+# Samples required before replacing the default timeout of a test
+MIN_SAMPLES = 5
+# Margin applied to the 95th percentile
+MARGIN = 1.2
+
+
+def percentile(samples: List[float], rank: float) -> float:
+    """Nearest-rank percentile of the samples"""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)), 1) - 1]
+
+
+def parse_results(data: str) -> Dict[str, float]:
+    """Durations in seconds of the tests found in LAVA results
+
+    The results are the YAML or JSON list exported by LAVA (for instance
+    with 'lavacli results --yaml'). The duration of each test definition
+    is recorded by LAVA in the 'lava' suite, named after the definition
+    and prefixed by its index, like '1_ltp-smoke'.
+    """
+    try:
+        results = yaml_load(data)
+    except Exception as exc:
+        raise InvalidArgument(f"Invalid LAVA results: {exc}")
+    if not isinstance(results, list):
+        raise InvalidArgument("Invalid LAVA results: expecting a list")
+
+    tests = set(Test.list())
+    durations: Dict[str, float] = {}
+    for result in results:
+        if not isinstance(result, dict) or result.get("suite") != "lava":
+            continue
+        name = re.sub(r"^\d+_", "", str(result.get("name", "")))
+        metadata = result.get("metadata") or {}
+        if name not in tests or "duration" not in metadata:
+            continue
+        try:
+            durations[name] = float(metadata["duration"])
+        except (TypeError, ValueError):
+            continue
+    return durations
+
+
+class DurationStore:
+    """Test durations in seconds by device and test
+
+    The store is a JSON file, by default in the tuxlava cache directory.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else cache_home() / "durations.json"
+        self._durations: Optional[Dict[str, Dict[str, List[float]]]] = None
+
+    @property
+    def durations(self) -> Dict[str, Dict[str, List[float]]]:
+        if self._durations is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                data = {}
+            except ValueError as exc:
+                raise InvalidArgument(f"Invalid durations file '{self.path}': {exc}")
+            self._durations = data.get("durations", {})
+        return self._durations
+
+    def samples(self, device: str, test: str) -> List[float]:
+        return self.durations.get(device, {}).get(test, [])
+
+    def add(self, device: str, test: str, seconds: float) -> None:
+        samples = self.durations.setdefault(device, {}).setdefault(test, [])
+        samples.append(seconds)
+        del samples[:-MAX_SAMPLES]
+
+    def ingest(self, device: str, data: str) -> Dict[str, float]:
+        """Add the test durations of LAVA results for the given device"""
+        durations = parse_results(data)
+        for test, seconds in durations.items():
+            self.add(device, test, seconds)
+        return durations
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_path(self.path) as tmp:
+            tmp.write_text(
+                json.dumps({"durations": self.durations}, indent=2, sort_keys=True),
+                encoding="utf-8",
+            )
+
+    def timeout(self, device: str, test: str) -> Optional[int]:
+        """Timeout in minutes from the 95th percentile of the durations
+
+        None is returned when there are not enough samples.
+        """
+        samples = self.samples(device, test)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return max(math.ceil(percentile(samples, 95) * MARGIN / 60), 1)
+
+    def timeouts(self, device: str, timeouts: Dict[str, Any] = {}) -> Dict[str, Any]:
+        """Complete the given timeouts with the computed test timeouts"""
+        computed = {}
+        for test in self.durations.get(device, {}):
+            timeout = self.timeout(device, test)
+            if timeout is not None:
+                computed[test] = timeout
+        return {**computed, **timeouts}
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import math
+import struct
+from pathlib import Path
+from typing import BinaryIO, List, Tuple
+
+SECTOR_SIZE = 512
+RESERVED_SECTORS = 1
+FATS = 2
+ROOT_ENTRIES = 512
+ROOT_SECTORS = ROOT_ENTRIES * 32 // SECTOR_SIZE
+# FAT16 volumes have from 4085 to 65524 clusters
+MIN_CLUSTERS = 4085
+MAX_CLUSTERS = 65524
+BUFFER_SIZE = 1024 * 1024
+# 1980-01-01 00:00, for the images to only depend on their content
+DATE = (1 << 5) | 1
+SERIAL = 0x54555800
+
+
+def short_name(name: str) -> Tuple[bytes, int]:
+    """8.3 name of a file and the flags to show it in lower case"""
+    base, _, ext = name.partition(".")
+    if not base or len(base) > 8 or len(ext) > 3 or not (base + ext).isalnum():
+        raise ValueError(f"Invalid FAT file name '{name}'")
+    flags = (0x08 if base.islower() else 0) | (0x10 if ext.islower() else 0)
+    return f"{base.upper():<8}{ext.upper():<3}".encode("ascii"), flags
+
+
+def geometry(sectors: int) -> Tuple[int, int]:
+    """Sectors per cluster and per FAT of a volume of the given sectors"""
+    for cluster in [1, 2, 4, 8, 16, 32, 64]:
+        fat = 1
+        while True:
+            clusters = (
+                sectors - RESERVED_SECTORS - ROOT_SECTORS - FATS * fat
+            ) // cluster
+            needed = math.ceil((clusters + 2) * 2 / SECTOR_SIZE)
+            if needed <= fat:
+                break
+            fat = needed
+        if clusters <= MAX_CLUSTERS:
+            return cluster, fat
+    raise ValueError("FAT16 image too large")
+
+
+def write_image(
+    path: Path, files: List[Tuple[str, int, BinaryIO]], free: int = 4 * 1024 * 1024
+) -> None:
+    """Write a FAT16 image holding the files, as (name, size, stream)
+
+    The content of the files is streamed into the image, which is written
+    without a partition table like "mformat -i". The files go to the root
+    directory, in contiguous clusters.
+    """
+    if len(files) > ROOT_ENTRIES:
+        raise ValueError("Too many files for a FAT16 root directory")
+    data = sum(math.ceil(size / SECTOR_SIZE) for _, size, _ in files)
+    sectors = max(
+        data + math.ceil(free / SECTOR_SIZE),
+        # Too few clusters would make it a FAT12 volume
+        MIN_CLUSTERS + RESERVED_SECTORS + ROOT_SECTORS + FATS * 32,
+    )
+    cluster, fat_sectors = geometry(sectors)
+    cluster_size = cluster * SECTOR_SIZE
+    first_data = RESERVED_SECTORS + FATS * fat_sectors + ROOT_SECTORS
+    clusters = (sectors - first_data) // cluster
+    if sum(math.ceil(size / cluster_size) for _, size, _ in files) > clusters:
+        raise ValueError("Files too large for the FAT16 image")
+
+    boot = bytearray(SECTOR_SIZE)
+    struct.pack_into(
+        "<3s8sHBHBHHBHHHIIBBBI11s8s",
+        boot,
+        0,
+        b"\xeb\x3c\x90",
+        b"TUXLAVA ",
+        SECTOR_SIZE,
+        cluster,
+        RESERVED_SECTORS,
+        FATS,
+        ROOT_ENTRIES,
+        sectors if sectors < 0x10000 else 0,
+        0xF8,
+        fat_sectors,
+        32,
+        64,
+        0,
+        sectors if sectors >= 0x10000 else 0,
+        0x80,
+        0,
+        0x29,
+        SERIAL,
+        b"NO NAME    ",
+        b"FAT16   ",
+    )
+    boot[510:512] = b"\x55\xaa"
+
+    fat = bytearray(fat_sectors * SECTOR_SIZE)
+    struct.pack_into("<HH", fat, 0, 0xFFF8, 0xFFFF)
+    root = bytearray(ROOT_SECTORS * SECTOR_SIZE)
+    start = 2
+    for index, (name, size, _) in enumerate(files):
+        short, flags = short_name(name)
+        count = math.ceil(size / cluster_size)
+        for n in range(start, start + count):
+            last = n == start + count - 1
+            struct.pack_into("<H", fat, n * 2, 0xFFFF if last else n + 1)
+        struct.pack_into(
+            "<11sBBBHHHHHHHI",
+            root,
+            index * 32,
+            short,
+            0x20,
+            flags,
+            0,
+            0,
+            DATE,
+            DATE,
+            0,
+            0,
+            DATE,
+            start if count else 0,
+            size,
+        )
+        start += count
+
+    with open(path, "wb") as f:
+        f.write(boot)
+        for _ in range(FATS):
+            f.write(fat)
+        f.write(root)
+        start = 2
+        buffer = bytearray(BUFFER_SIZE)
+        for name, size, stream in files:
+            f.seek((first_data + (start - 2) * cluster) * SECTOR_SIZE)
+            written = 0
+            while True:
+                length = stream.readinto(buffer)
+                if not length:
+                    break
+                written += length
+                if written > size:
+                    break
+                f.write(memoryview(buffer)[:length])
+            if written != size:
+                raise ValueError(f"Size of '{name}' is not {size} bytes")
+            start += math.ceil(size / cluster_size)
+        # The free clusters are left sparse
+        f.truncate(sectors * SECTOR_SIZE)
@@ -0,0 +1,469 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+# Generated from the device and test classes, do not edit.
+# Run "TUXLAVA_RENDER=1 make test" to update it.
+
+# name: (module, real_device)
+DEVICES = {
+    "avh-imx93": ("avh", False),
+    "avh-rpi4b": ("avh", False),
+    "fastboot-aosp-dragonboard-845c": ("fastboot", True),
+    "fastboot-aosp-qrb5165-rb5": ("fastboot", True),
+    "fastboot-dragonboard-410c": ("fastboot", True),
+    "fastboot-dragonboard-845c": ("fastboot", True),
+    "fastboot-e850-96": ("fastboot", True),
+    "fastboot-gs101-oriole": ("fastboot", True),
+    "fastboot-oe-dragonboard-845c": ("fastboot", True),
+    "fastboot-qrb5165-rb5": ("fastboot", True),
+    "fastboot-x15": ("fastboot", True),
+    "flasher-debian-qcs6490-rb3gen2-core-kit": ("flasher", True),
+    "flasher-debian-qcs9075-iq-9075-evk": ("flasher", True),
+    "flasher-debian-qcs9100-ride-sx": ("flasher", True),
+    "flasher-debian-qrb2210-rb1-core-kit": ("flasher", True),
+    "flasher-poky-altcfg-qcs6490-rb3gen2-core-kit": ("flasher", True),
+    "flasher-poky-altcfg-qcs9075-iq-9075-evk": ("flasher", True),
+    "flasher-poky-altcfg-qcs9100-ride-sx": ("flasher", True),
+    "flasher-poky-altcfg-qrb2210-rb1-core-kit": ("flasher", True),
+    "flasher-qcom-distro-qcs6490-rb3gen2-core-kit": ("flasher", True),
+    "flasher-qcom-distro-qcs9075-iq-9075-evk": ("flasher", True),
+    "flasher-qcom-distro-qcs9100-ride-sx": ("flasher", True),
+    "flasher-qcom-distro-qrb2210-rb1-core-kit": ("flasher", True),
+    "flasher-qcs6490-rb3gen2-core-kit": ("flasher", True),
+    "flasher-qcs9075-iq-9075-evk": ("flasher", True),
+    "flasher-qcs9100-ride-sx": ("flasher", True),
+    "flasher-qrb2210-rb1": ("flasher", True),
+    "fvp-aemva": ("fvp", False),
+    "fvp-lava": ("fvp", False),
+    "fvp-morello-android": ("fvp", False),
+    "fvp-morello-baremetal": ("fvp", False),
+    "fvp-morello-busybox": ("fvp", False),
+    "fvp-morello-debian": ("fvp", False),
+    "fvp-morello-grub": ("fvp", False),
+    "fvp-morello-oe": ("fvp", False),
+    "fvp-morello-ubuntu": ("fvp", False),
+    "nfs-altra-max-ac02": ("nfs", True),
+    "nfs-ampereone": ("nfs", True),
+    "nfs-ampereone-ac04": ("nfs", True),
+    "nfs-bcm2711-rpi-4-b": ("nfs", True),
+    "nfs-cd8180-orion-o6": ("nfs", True),
+    "nfs-grub-arm64": ("nfs_bootloader", True),
+    "nfs-grub-i386": ("nfs_bootloader", True),
+    "nfs-grub-ppc64le": ("nfs_bootloader", True),
+    "nfs-grub-riscv64": ("nfs_bootloader", True),
+    "nfs-grub-x86-64": ("nfs_bootloader", True),
+    "nfs-i386": ("nfs", True),
+    "nfs-juno-r2": ("nfs", True),
+    "nfs-rk3399-rock-pi-4b": ("nfs", True),
+    "nfs-s32g399a-rdb3": ("nfs", True),
+    "nfs-uboot-arm64": ("nfs_bootloader", True),
+    "nfs-uboot-i386": ("nfs_bootloader", True),
+    "nfs-uboot-ppc64le": ("nfs_bootloader", True),
+    "nfs-uboot-riscv64": ("nfs_bootloader", True),
+    "nfs-uboot-x86-64": ("nfs_bootloader", True),
+    "nfs-x86_64": ("nfs", True),
+    "qemu-arm64": ("qemu", False),
+    "qemu-arm64be": ("qemu", False),
+    "qemu-armv5": ("qemu", False),
+    "qemu-armv7": ("qemu", False),
+    "qemu-armv7be": ("qemu", False),
+    "qemu-i386": ("qemu", False),
+    "qemu-m68k": ("qemu", False),
+    "qemu-mips32": ("qemu", False),
+    "qemu-mips32el": ("qemu", False),
+    "qemu-mips64": ("qemu", False),
+    "qemu-mips64el": ("qemu", False),
+    "qemu-ppc32": ("qemu", False),
+    "qemu-ppc64": ("qemu", False),
+    "qemu-ppc64le": ("qemu", False),
+    "qemu-riscv32": ("qemu", False),
+    "qemu-riscv64": ("qemu", False),
+    "qemu-s390": ("qemu", False),
+    "qemu-sh4": ("qemu", False),
+    "qemu-sparc64": ("qemu", False),
+    "qemu-x86_64": ("qemu", False),
+    "ssh-device": ("ssh", False),
+}
+
+# device patterns supported by the tests
+PATTERNS = [
+    [
+        "fastboot-aosp-*",
+    ],
+    [
+        "fvp-morello-android",
+    ],
+    [
+        "fvp-morello-grub",
+    ],
+    [
+        "qemu-*",
+        "fvp-aemva",
+        "avh-imx93",
+        "avh-rpi4b",
+        "nfs-*",
+        "fastboot-*",
+    ],
+    [
+        "fvp-morello-debian",
+    ],
+    [
+        "fvp-morello-oe",
+    ],
+    [
+        "qemu-armv6",
+        "qemu-armv7",
+        "qemu-arm64",
+        "qemu-i386",
+        "qemu-x86_64",
+        "fvp-aemva",
+        "nfs-*",
+        "fastboot-*",
+    ],
+    [
+        "qemu-arm64",
+        "fvp-aemva",
+        "avh-imx93",
+        "avh-rpi4b",
+        "nfs-ampereone",
+        "nfs-ampereone-ac04",
+        "nfs-altra-max-ac02",
+        "nfs-cd8180-orion-o6",
+        "nfs-juno-r2",
+        "nfs-bcm2711-rpi-4-b",
+        "nfs-rk3399-rock-pi-4b",
+        "fastboot-dragonboard-410c",
+        "fastboot-dragonboard-845c",
+        "fastboot-gs101-oriole",
+        "fastboot-e850-96",
+    ],
+    [
+        "qemu-arm64",
+        "fvp-aemva",
+        "*-x86_64",
+        "avh-imx93",
+        "avh-rpi4b",
+        "nfs-ampereone",
+        "nfs-ampereone-ac04",
+        "nfs-altra-max-ac02",
+        "nfs-cd8180-orion-o6",
+        "nfs-juno-r2",
+        "nfs-bcm2711-rpi-4-b",
+        "nfs-rk3399-rock-pi-4b",
+        "fastboot-dragonboard-410c",
+        "fastboot-dragonboard-845c",
+        "fastboot-e850-96",
+        "fastboot-x15",
+    ],
+    [
+        "*-x86_64",
+        "*-i386",
+    ],
+    [
+        "*-x86_64",
+        "*-i386",
+        "qemu-ppc64le",
+    ],
+    [
+        "qemu-arm64",
+        "qemu-x86_64",
+        "avh-imx93",
+        "avh-rpi4b",
+        "nfs-*",
+        "fastboot-*",
+    ],
+    [
+        "qemu-*",
+        "fvp-aemva",
+        "avh-imx93",
+        "avh-rpi4b",
+        "nfs-*",
+        "fastboot-*",
+        "flasher-*",
+    ],
+    [
+        "fvp-morello-busybox",
+    ],
+    [
+        "fvp-morello-android",
+        "fvp-morello-busybox",
+    ],
+    [
+        "qemu-*",
+        "fvp-aemva",
+        "avh-imx93",
+        "avh-rpi4b",
+        "fastboot-*",
+    ],
+    [
+        "qemu-arm64",
+    ],
+    [
+        "fastboot-*",
+        "flasher-*",
+    ],
+    [
+        "qemu-arm64",
+        "qemu-x86_64",
+        "fvp-aemva",
+        "nfs-*",
+        "fastboot-*",
+    ],
+]
+
+# name: (module, index in PATTERNS)
+TESTS = {
+    "android-cts": ("androidcts", 0),
+    "android-vts": ("androidvts", 0),
+    "android-vts-kernel-v7a": ("androidvts", 0),
+    "android-vts-kernel-v8a": ("androidvts", 0),
+    "binder": ("morello", 1),
+    "bionic": ("morello", 1),
+    "boot-busybox-acpi": ("morello", 2),
+    "boot-busybox-dt": ("morello", 2),
+    "boot-debian-acpi": ("morello", 2),
+    "boot-debian-dt": ("morello", 2),
+    "boottest": ("morello", 1),
+    "boringssl": ("morello", 1),
+    "commands": ("commands", 3),
+    "compartment": ("morello", 1),
+    "debian-purecap": ("morello", 4),
+    "device-tree": ("morello", 1),
+    "dvfs": ("morello", 1),
+    "fwts": ("morello", 5),
+    "hacking-session": ("hackingsession", 6),
+    "kselftest-acct": ("kselftest", 3),
+    "kselftest-alsa": ("kselftest", 3),
+    "kselftest-amd-pstate": ("kselftest", 3),
+    "kselftest-arm64": ("kselftest", 7),
+    "kselftest-bpf": ("kselftest", 3),
+    "kselftest-breakpoints": ("kselftest", 8),
+    "kselftest-cachestat": ("kselftest", 3),
+    "kselftest-capabilities": ("kselftest", 3),
+    "kselftest-cgroup": ("kselftest", 3),
+    "kselftest-clone3": ("kselftest", 3),
+    "kselftest-connector": ("kselftest", 3),
+    "kselftest-core": ("kselftest", 3),
+    "kselftest-cpu-hotplug": ("kselftest", 3),
+    "kselftest-cpufreq": ("kselftest", 3),
+    "kselftest-damon": ("kselftest", 3),
+    "kselftest-devices-error_logs": ("kselftest", 3),
+    "kselftest-devices-probe": ("kselftest", 3),
+    "kselftest-dma": ("kselftest", 3),
+    "kselftest-dmabuf-heaps": ("kselftest", 3),
+    "kselftest-drivers": ("kselftest", 3),
+    "kselftest-drivers-dma-buf": ("kselftest", 3),
+    "kselftest-drivers-gpu": ("kselftest", 3),
+    "kselftest-drivers-net": ("kselftest", 3),
+    "kselftest-drivers-net-bonding": ("kselftest", 3),
+    "kselftest-drivers-net-dsa": ("kselftest", 3),
+    "kselftest-drivers-net-hw": ("kselftest", 3),
+    "kselftest-drivers-net-lib": ("kselftest", 3),
+    "kselftest-drivers-net-microchip": ("kselftest", 3),
+    "kselftest-drivers-net-mlxsw": ("kselftest", 3),
+    "kselftest-drivers-net-netdevsim": ("kselftest", 3),
+    "kselftest-drivers-net-ocelot": ("kselftest", 3),
+    "kselftest-drivers-net-team": ("kselftest", 3),
+    "kselftest-drivers-net-virtio_net": ("kselftest", 3),
+    "kselftest-drivers-sdsi": ("kselftest", 3),
+    "kselftest-drivers-usb-usbip": ("kselftest", 3),
+    "kselftest-efivarfs": ("kselftest", 3),
+    "kselftest-exec": ("kselftest", 3),
+    "kselftest-fchmodat2": ("kselftest", 3),
+    "kselftest-filesystems": ("kselftest", 3),
+    "kselftest-filesystems-binderfs": ("kselftest", 3),
+    "kselftest-filesystems-epoll": ("kselftest", 3),
+    "kselftest-filesystems-eventfd": ("kselftest", 3),
+    "kselftest-filesystems-fat": ("kselftest", 3),
+    "kselftest-filesystems-overlayfs": ("kselftest", 3),
+    "kselftest-filesystems-statmount": ("kselftest", 3),
+    "kselftest-firmware": ("kselftest", 3),
+    "kselftest-fpu": ("kselftest", 3),
+    "kselftest-ftrace": ("kselftest", 3),
+    "kselftest-futex": ("kselftest", 3),
+    "kselftest-gpio": ("kselftest", 3),
+    "kselftest-hid": ("kselftest", 3),
+    "kselftest-ia64": ("kselftest", 3),
+    "kselftest-intel_pstate": ("kselftest", 9),
+    "kselftest-iommu": ("kselftest", 3),
+    "kselftest-ipc": ("kselftest", 3),
+    "kselftest-ir": ("kselftest", 3),
+    "kselftest-kcmp": ("kselftest", 3),
+    "kselftest-kexec": ("kselftest", 10),
+    "kselftest-kmod": ("kselftest", 3),
+    "kselftest-kvm": ("kselftest", 3),
+    "kselftest-landlock": ("kselftest", 3),
+    "kselftest-lib": ("kselftest", 3),
+    "kselftest-livepatch": ("kselftest", 9),
+    "kselftest-locking": ("kselftest", 3),
+    "kselftest-lsm": ("kselftest", 3),
+    "kselftest-membarrier": ("kselftest", 3),
+    "kselftest-memfd": ("kselftest", 3),
+    "kselftest-memory-hotplug": ("kselftest", 3),
+    "kselftest-mincore": ("kselftest", 3),
+    "kselftest-mm": ("kselftest", 3),
+    "kselftest-mount": ("kselftest", 3),
+    "kselftest-mount_setattr": ("kselftest", 3),
+    "kselftest-move_mount_set_group": ("kselftest", 3),
+    "kselftest-mqueue": ("kselftest", 3),
+    "kselftest-nci": ("kselftest", 3),
+    "kselftest-net": ("kselftest", 3),
+    "kselftest-net-af_unix": ("kselftest", 3),
+    "kselftest-net-forwarding": ("kselftest", 3),
+    "kselftest-net-hsr": ("kselftest", 3),
+    "kselftest-net-mptcp": ("kselftest", 3),
+    "kselftest-net-rds": ("kselftest", 3),
+    "kselftest-net-tcp_ao": ("kselftest", 3),
+    "kselftest-netfilter": ("kselftest", 3),
+    "kselftest-nolibc": ("kselftest", 3),
+    "kselftest-nsfs": ("kselftest", 3),
+    "kselftest-ntb": ("kselftest", 3),
+    "kselftest-openat2": ("kselftest", 3),
+    "kselftest-perf_events": ("kselftest", 3),
+    "kselftest-pid_namespace": ("kselftest", 3),
+    "kselftest-pidfd": ("kselftest", 3),
+    "kselftest-prctl": ("kselftest", 3),
+    "kselftest-proc": ("kselftest", 3),
+    "kselftest-pstore": ("kselftest", 3),
+    "kselftest-ptp": ("kselftest", 3),
+    "kselftest-ptrace": ("kselftest", 9),
+    "kselftest-rcutorture": ("kselftest", 3),
+    "kselftest-resctrl": ("kselftest", 3),
+    "kselftest-rlimits": ("kselftest", 3),
+    "kselftest-rseq": ("kselftest", 3),
+    "kselftest-rtc": ("kselftest", 3),
+    "kselftest-rust": ("kselftest", 3),
+    "kselftest-safesetid": ("kselftest", 3),
+    "kselftest-sched": ("kselftest", 3),
+    "kselftest-seccomp": ("kselftest", 3),
+    "kselftest-sgx": ("kselftest", 3),
+    "kselftest-sigaltstack": ("kselftest", 3),
+    "kselftest-signal": ("kselftest", 3),
+    "kselftest-size": ("kselftest", 3),
+    "kselftest-splice": ("kselftest", 3),
+    "kselftest-static_keys": ("kselftest", 3),
+    "kselftest-sync": ("kselftest", 3),
+    "kselftest-sysctl": ("kselftest", 3),
+    "kselftest-tc-testing": ("kselftest", 3),
+    "kselftest-tdx": ("kselftest", 3),
+    "kselftest-timens": ("kselftest", 3),
+    "kselftest-timers": ("kselftest", 3),
+    "kselftest-tmpfs": ("kselftest", 3),
+    "kselftest-tpm2": ("kselftest", 3),
+    "kselftest-uevent": ("kselftest", 3),
+    "kselftest-user": ("kselftest", 3),
+    "kselftest-user_events": ("kselftest", 3),
+    "kselftest-vDSO": ("kselftest", 3),
+    "kselftest-watchdog": ("kselftest", 3),
+    "kselftest-x86": ("kselftest", 9),
+    "kselftest-zram": ("kselftest", 3),
+    "kunit": ("kunit", 3),
+    "kvm-unit-tests": ("kvmunittests", 3),
+    "libgpiod": ("libgpiod", 3),
+    "libhugetlbfs": ("libhugetlbfs", 3),
+    "libjpeg-turbo": ("morello", 1),
+    "libpcre": ("morello", 1),
+    "libpdfium": ("morello", 1),
+    "libpng": ("morello", 1),
+    "lldb": ("morello", 1),
+    "logd": ("morello", 1),
+    "ltp-cap_bounds": ("ltp", 3),
+    "ltp-capability": ("ltp", 3),
+    "ltp-commands": ("ltp", 3),
+    "ltp-containers": ("ltp", 3),
+    "ltp-controllers": ("ltp", 3),
+    "ltp-cpuhotplug": ("ltp", 3),
+    "ltp-crypto": ("ltp", 3),
+    "ltp-cve": ("ltp", 3),
+    "ltp-dio": ("ltp", 3),
+    "ltp-fcntl-locktests": ("ltp", 3),
+    "ltp-filecaps": ("ltp", 3),
+    "ltp-fs": ("ltp", 3),
+    "ltp-fs_bind": ("ltp", 3),
+    "ltp-fs_perms_simple": ("ltp", 3),
+    "ltp-fsx": ("ltp", 3),
+    "ltp-hugetlb": ("ltp", 3),
+    "ltp-io": ("ltp", 3),
+    "ltp-ipc": ("ltp", 3),
+    "ltp-math": ("ltp", 3),
+    "ltp-mm": ("ltp", 3),
+    "ltp-nptl": ("ltp", 3),
+    "ltp-pty": ("ltp", 3),
+    "ltp-sched": ("ltp", 3),
+    "ltp-securebits": ("ltp", 3),
+    "ltp-smoke": ("ltp", 3),
+    "ltp-syscalls": ("ltp", 3),
+    "ltp-tracing": ("ltp", 3),
+    "mmtests-db-sqlite-insert-small": ("mmtests", 11),
+    "mmtests-hpc-scimarkc-small": ("mmtests", 11),
+    "mmtests-io-blogbench": ("mmtests", 11),
+    "mmtests-io-fio-randread-async-randwrite": ("mmtests", 11),
+    "mmtests-io-fio-randread-async-seqwrite": ("mmtests", 11),
+    "mmtests-io-fio-randread-sync-heavywrite": ("mmtests", 11),
+    "mmtests-io-fio-randread-sync-randwrite": ("mmtests", 11),
+    "mmtests-io-fsmark-small-file-stream": ("mmtests", 11),
+    "mmtests-memdb-redis-benchmark-small": ("mmtests", 11),
+    "mmtests-memdb-redis-memtier-small": ("mmtests", 11),
+    "mmtests-scheduler-schbench": ("mmtests", 11),
+    "mmtests-scheduler-sysbench-cpu": ("mmtests", 11),
+    "mmtests-scheduler-sysbench-thread": ("mmtests", 11),
+    "mmtests-workload-aim9-disk": ("mmtests", 11),
+    "mmtests-workload-coremark": ("mmtests", 11),
+    "mmtests-workload-cyclictest-fine-hackbench": ("mmtests", 11),
+    "mmtests-workload-cyclictest-hackbench": ("mmtests", 11),
+    "mmtests-workload-ebizzy": ("mmtests", 11),
+    "mmtests-workload-pmqtest-hackbench": ("mmtests", 11),
+    "mmtests-workload-stressng-af-alg": ("mmtests", 11),
+    "mmtests-workload-stressng-bad-altstack": ("mmtests", 11),
+    "mmtests-workload-stressng-class-io-parallel": ("mmtests", 11),
+    "mmtests-workload-stressng-context": ("mmtests", 11),
+    "mmtests-workload-stressng-fork": ("mmtests", 11),
+    "mmtests-workload-stressng-get": ("mmtests", 11),
+    "mmtests-workload-stressng-getdent": ("mmtests", 11),
+    "mmtests-workload-stressng-madvise": ("mmtests", 11),
+    "mmtests-workload-stressng-mmap": ("mmtests", 11),
+    "mmtests-workload-stressng-vm-splice": ("mmtests", 11),
+    "mmtests-workload-stressng-zombie": ("mmtests", 11),
+    "mmtests-workload-unixbench": ("mmtests", 11),
+    "mmtests-workload-usemem": ("mmtests", 11),
+    "mmtests-workload-will-it-scale-io-processes": ("mmtests", 11),
+    "mmtests-workload-will-it-scale-io-threads": ("mmtests", 11),
+    "mmtests-workload-will-it-scale-pf-processes": ("mmtests", 11),
+    "mmtests-workload-will-it-scale-pf-threads": ("mmtests", 11),
+    "mmtests-workload-will-it-scale-sys-processes": ("mmtests", 11),
+    "mmtests-workload-will-it-scale-sys-threads": ("mmtests", 11),
+    "modules": ("modules", 3),
+    "multicore": ("morello", 1),
+    "network-basic": ("network", 12),
+    "perf": ("perf", 3),
+    "purecap": ("morello", 13),
+    "rcutorture": ("rcutorture", 3),
+    "rt-tests-cyclicdeadline": ("rttests", 3),
+    "rt-tests-pi-stress": ("rttests", 3),
+    "rt-tests-pmqtest": ("rttests", 3),
+    "rt-tests-rt-migrate-test": ("rttests", 3),
+    "rt-tests-signaltest": ("rttests", 3),
+    "smc91x": ("morello", 14),
+    "smoke": ("smoke", 12),
+    "sysfs-interface-framework": ("peripherals", 15),
+    "systemd-analyze": ("systemdanalyze", 3),
+    "tcpreplay": ("tcpreplay", 3),
+    "tfa-tests": ("tfatests", 16),
+    "usb-gadget-framework": ("peripherals", 15),
+    "v4l2": ("v4l2", 12),
+    "vdso": ("vdso", 3),
+    "virtio_net": ("morello", 14),
+    "virtiop9": ("morello", 13),
+    "wifi": ("wifi", 17),
+    "xfstests-btrfs": ("xfstests", 18),
+    "xfstests-ext4": ("xfstests", 18),
+    "xfstests-f2fs": ("xfstests", 18),
+    "xfstests-nilfs2": ("xfstests", 18),
+    "xfstests-xfs": ("xfstests", 18),
+    "zlib": ("morello", 1),
+}
@@ -7,19 +7,32 @@
 #
 # SPDX-License-Identifier: MIT
 
+import copy
+import hashlib
+import json
+import os
 import re
 import shlex
 import tempfile
 
+from concurrent.futures import ProcessPoolExecutor
 from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional, TextIO
+from urllib.parse import unquote, urlparse
+from tuxlava import __version__, requests
 from tuxlava.argparse import filter_options
+from tuxlava.cache import ArtefactStore, RenderCache
+from tuxlava.checksums import embed, local_files
 from tuxlava.exceptions import InvalidArgument, MissingArgument, TuxLavaError
 from tuxlava.devices import Device
+from tuxlava.modules import slim, wanted_modules
+from tuxlava.overlays import auth_headers, merge
+from tuxlava.profile import phase
+from tuxlava.rootfs import decompress
 from tuxlava.tests import Test
-from tuxlava.tuxmake import TuxBuildBuild, TuxMakeBuild
-from tuxlava.utils import pathurlnone
+from tuxlava.tuxmake import TuxBuildBuild, TuxMakeBuild, resolve
+from tuxlava.utils import pathurlnone, yaml_load
 
 TEST_DEFINITIONS = "https://github.com/Linaro/test-definitions/releases/download/2025.10.01/2025.10.tar.zst"
 
@@ -120,12 +133,21 @@ class Job:
         cache_dir: Path = None,
         visibility: str = "public",
         device_dict: Path = None,
+        checksums: bool = False,
+        artefact_store: bool = False,
+        decompress_rootfs: bool = False,
+        merge_overlays: bool = False,
+        slim_modules: str = None,
     ) -> None:
+        # Arguments as given, to fingerprint the job before initialize()
+        self.arguments = {
+            k: copy.deepcopy(v) for k, v in locals().items() if k != "self"
+        }
         self.device = device
         self.device_dict = device_dict
         self.bios = bios
         self.bl1 = bl1
-        self.commands = commands
+        self.commands = copy.copy(commands)
         self.qemu_image = qemu_image
         self.qemu_binary = qemu_binary
         self.dtb = dtb
@@ -152,16 +174,16 @@ class Job:
         self.ssh_port = ssh_port
         self.ssh_user = ssh_user
         self.ssh_identity_file = ssh_identity_file
-        self.tests = tests
-        self.timeouts = timeouts
+        self.tests = copy.copy(tests)
+        self.timeouts = copy.copy(timeouts)
         self.tux_prompt = tux_prompt
         self.uefi = uefi
         self.boot_args = boot_args
-        self.secrets = secrets
+        self.secrets = copy.copy(secrets)
         self.modules = modules
-        self.overlays = overlays
-        self.pflash = pflash
-        self.parameters = parameters
+        self.overlays = copy.copy(overlays)
+        self.pflash = copy.copy(pflash)
+        self.parameters = copy.copy(parameters)
         self.deploy_os = deploy_os
         self.tuxbuild = tuxbuild
         self.tuxmake = tuxmake
@@ -172,6 +194,12 @@ class Job:
         self.extra_assets = []
         self.tux_boot_args = None
         self.visibility = visibility
+        self.checksums = checksums
+        self.artefact_store = artefact_store
+        self.decompress_rootfs = decompress_rootfs
+        self.merge_overlays = merge_overlays
+        self.slim_modules = slim_modules
+        self.initialized = False
 
     def __str__(self) -> str:
         tests = "_".join(self.tests) if self.tests else "boot"
@@ -195,10 +223,54 @@ class Job:
             )
         return priority
 
-    def initialize(self) -> str:
-        # Initialize Job class
-        overlays = []
+    def fingerprint(self) -> str:
+        """Hash of the tuxlava version, the job arguments and the files they name"""
+        data = {"version": __version__, "arguments": self.arguments}
+        # Files read by initialize(), that can change under the same arguments
+        files = {
+            "device_dict": self.device_dict,
+            "job_definition": self.job_definition
+            and unquote(urlparse(str(self.job_definition)).path),
+            "tuxmake": self.tuxmake and Path(self.tuxmake) / "metadata.json",
+        }
+        for name, path in files.items():
+            if path and Path(path).exists():
+                st = Path(path).stat()
+                data[name] = [st.st_size, st.st_mtime_ns]
+        # The detected compression, the embedded digests and the stored copies
+        # change with the content of the local files
+        data["files"] = local_files(self.arguments)
+        text = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def render_cached(self, cache: RenderCache) -> str:
+        """Return the definition cached for the same arguments or render it
+
+        On a cache hit, the job is neither initialized nor validated. Jobs
+        reading the ssh keys, decompressing a rootfs, merging overlays or
+        slimming modules that might have changed, or whose definition refer
+        to their temporary directory, are never stored.
+        """
+        if (
+            self.shell
+            or self.decompress_rootfs
+            or self.merge_overlays
+            or self.slim_modules
+        ):
+            self.initialize()
+            return self.render()
+
+        key = self.fingerprint()
+        definition = cache.get(key)
+        if definition is None:
+            self.initialize()
+            definition = self.render()
+            if str(self.tmpdir) not in definition:
+                cache.put(key, definition)
+        return definition
 
+    def apply_build(self) -> None:
+        """Take the kernel, modules and device from --tuxbuild or --tuxmake"""
         # Grab the modules path from parameters if available, else set it
         # as "/" by default
         if isinstance(self.modules, str):
@@ -208,11 +280,12 @@ class Job:
             ]
 
         if self.tuxbuild or self.tuxmake:
-            tux = (
-                tuxbuild_url(self.tuxbuild)
-                if self.tuxbuild
-                else tuxmake_directory(self.tuxmake)
-            )
+            with phase("tuxbuild" if self.tuxbuild else "tuxmake"):
+                tux = (
+                    tuxbuild_url(self.tuxbuild)
+                    if self.tuxbuild
+                    else tuxmake_directory(self.tuxmake)
+                )
             self.kernel = self.kernel or tux.kernel
             self.modules = self.modules or tux.modules
             self.device = self.device or f"qemu-{tux.target_arch}"
@@ -236,6 +309,15 @@ class Job:
                         "parameter with '$BUILD/' substitution requires --tuxbuild or --tuxmake"
                     )
 
+    @phase("initialize")
+    def initialize(self) -> str:
+        # Initialize Job class, once: the next calls are no-ops
+        if self.initialized:
+            return
+        overlays = []
+
+        self.apply_build()
+
         if self.shell:
             if "hacking-session" not in self.tests:
                 self.tests.append("hacking-session")
@@ -256,35 +338,44 @@ class Job:
             if not self.parameters.get("PUB_KEY"):
                 raise MissingArgument("argument missing --parameters PUB_KEY='...'")
 
-        self.device = Device.select(self.device)()
-        self.tests = [Test.select(t)(self.timeouts.get(t)) for t in self.tests]
-        self.device.validate(**filter_options(self))
-        self.device.default(self)
+        with phase("validate"):
+            self.device = Device.select(self.device)()
+            self.tests = [Test.select(t)(self.timeouts.get(t)) for t in self.tests]
+            self.device.validate(**filter_options(self))
+            self.device.default(self)
+
+        # Secrets sent by tuxlava itself when downloading the artefacts
+        secrets = self.secrets if self.device.flag_secrets_headers else None
 
         # Load device dict config if --device-dict provided
         self.d_dict_config: Optional[Dict[str, Any]] = None
         if self.device_dict:
-            if not self.device_dict.exists():
-                raise InvalidArgument(f"Device dict file not found: {self.device_dict}")
-            # Load from external Jinja2 file (provided by kci-runner/baklaweb)
-            env = Environment(loader=FileSystemLoader(self.device_dict.parent))
-            template = env.get_template(self.device_dict.name)
-            module = template.module
-
-            # Check for unknown variables in device-dict config
-            defined_vars = {name for name in dir(module) if not name.startswith("_")}
-            unknown_vars = defined_vars - DEVICE_DICT_VARS
-            if unknown_vars:
-                raise InvalidArgument(
-                    f"Unknown variable(s) in device dict '{self.device_dict.name}': "
-                    f"{', '.join(sorted(unknown_vars))}. "
-                    f"Supported variables: {', '.join(sorted(DEVICE_DICT_VARS))}"
-                )
+            with phase("device-dict"):
+                if not self.device_dict.exists():
+                    raise InvalidArgument(
+                        f"Device dict file not found: {self.device_dict}"
+                    )
+                # Load from external Jinja2 file (provided by kci-runner/baklaweb)
+                env = Environment(loader=FileSystemLoader(self.device_dict.parent))
+                template = env.get_template(self.device_dict.name)
+                module = template.module
+
+                # Check for unknown variables in device-dict config
+                defined_vars = {
+                    name for name in dir(module) if not name.startswith("_")
+                }
+                unknown_vars = defined_vars - DEVICE_DICT_VARS
+                if unknown_vars:
+                    raise InvalidArgument(
+                        f"Unknown variable(s) in device dict '{self.device_dict.name}': "
+                        f"{', '.join(sorted(unknown_vars))}. "
+                        f"Supported variables: {', '.join(sorted(DEVICE_DICT_VARS))}"
+                    )
 
-            self.d_dict_config = {}
-            for name in DEVICE_DICT_VARS:
-                if hasattr(module, name):
-                    self.d_dict_config[name] = getattr(module, name)
+                self.d_dict_config = {}
+                for name in DEVICE_DICT_VARS:
+                    if hasattr(module, name):
+                        self.d_dict_config[name] = getattr(module, name)
 
         if self.shared is not None and not self.device.name.startswith("qemu-"):
             raise InvalidArgument("--shared options is only available for qemu devices")
@@ -315,6 +406,44 @@ class Job:
         if self.device.flag_cache_rootfs:
             self.rootfs = pathurlnone(self.rootfs)
 
+        if self.decompress_rootfs:
+            if not self.device.flag_cache_rootfs:
+                raise InvalidArgument(
+                    f"argument --decompress-rootfs is not supported by {self.device.name}"
+                )
+            if not self.cache_dir:
+                raise InvalidArgument(
+                    "argument --decompress-rootfs requires --cache-dir"
+                )
+            if self.rootfs:
+                with phase("decompress-rootfs"):
+                    self.rootfs = decompress(
+                        self.rootfs, self.cache_dir, auth_headers(secrets)
+                    )
+                if self.rootfs.startswith("file://"):
+                    self.extra_assets.append(self.rootfs)
+
+        if self.modules and self.slim_modules:
+            wanted = wanted_modules(self.slim_modules, self.tests)
+            if wanted == []:
+                self.modules = None
+            elif wanted:
+                if not self.cache_dir:
+                    raise InvalidArgument(
+                        "argument --slim-modules requires --cache-dir"
+                    )
+                with phase("slim-modules"):
+                    self.modules = [
+                        slim(
+                            pathurlnone(self.modules[0]),
+                            wanted,
+                            self.cache_dir,
+                            auth_headers(secrets),
+                            strict=self.slim_modules != "auto",
+                        ),
+                        self.modules[1],
+                    ]
+
         if self.modules and not self.device.name.startswith("fastboot-"):
             overlays.append(("modules", self.modules[0], self.modules[1]))
             self.extra_assets.append(self.modules[0])
@@ -338,6 +467,31 @@ class Job:
             if isinstance(v, str) and v.startswith("file://"):
                 self.extra_assets.append(v)
 
+        if self.artefact_store:
+            if not self.cache_dir:
+                raise InvalidArgument("argument --artefact-store requires --cache-dir")
+            with phase("artefact-store"):
+                store = ArtefactStore(self.cache_dir)
+                overlays = [(n, store.url(u), p) for n, u, p in overlays]
+                if self.modules:
+                    self.modules = [store.url(self.modules[0]), self.modules[1]]
+                for k, v in self.parameters.items():
+                    if isinstance(v, str) and v.startswith("file://"):
+                        self.parameters[k] = store.url(v)
+                self.extra_assets = [
+                    store.url(a) if isinstance(a, str) else a for a in self.extra_assets
+                ]
+                store.evict()
+
+        if self.merge_overlays:
+            if not self.cache_dir:
+                raise InvalidArgument("argument --merge-overlays requires --cache-dir")
+            with phase("merge-overlays"):
+                overlays = merge(overlays, self.cache_dir, secrets)
+            self.extra_assets.extend(
+                url for name, url, _ in overlays if name == "overlays"
+            )
+
         # Create the temp directory
         if self.tmpdir is None:
             self.tmpdir = Path(tempfile.mkdtemp(prefix="tuxlava-"))
@@ -348,15 +502,17 @@ class Job:
 
         self.overlays = overlays
         # Add extra assets from device
-        self.extra_assets.extend(self.device.extra_assets(**vars(self)))
+        with phase("extra-assets"):
+            self.extra_assets.extend(self.device.extra_assets(**vars(self)))
 
         if self.visibility not in ("public", "personal", "group"):
             raise InvalidArgument(
                 "'visibility' must be 'public', 'personal', or 'group'"
             )
+        self.initialized = True
 
-    def render(self):
-        def_arguments = {
+    def definition_arguments(self) -> Dict[str, Any]:
+        return {
             "bios": self.bios,
             "bl1": self.bl1,
             "commands": self.commands,
@@ -405,5 +561,103 @@ class Job:
             "tags": self.lava_job_tags,
             "visibility": self.visibility,
         }
-        definition = self.device.definition(**def_arguments)
-        return definition
+
+    def iter_render(self) -> Iterator[str]:
+        """Yield the job definition in chunks, as rendered by the templates"""
+        with phase("render"):
+            if self.checksums:
+                definition = "".join(
+                    self.device.iter_definition(**self.definition_arguments())
+                )
+                with phase("checksums"):
+                    yield embed(definition)
+            else:
+                yield from self.device.iter_definition(**self.definition_arguments())
+
+    def render_to(self, stream: TextIO) -> None:
+        """Write the job definition to stream, chunk by chunk"""
+        for chunk in self.iter_render():
+            stream.write(chunk)
+
+    def render(self) -> str:
+        return "".join(self.iter_render())
+
+    def render_dict(self) -> Dict[str, Any]:
+        """Return the job definition as python objects, parsed from its YAML"""
+        return yaml_load(self.render())
+
+
+def render_one(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Initialize and render the job described by spec (Job keyword arguments)
+
+    Errors are reported in the result instead of being raised so that a
+    single invalid spec does not abort a whole batch.
+    """
+    result: Dict[str, Any] = {"spec": spec, "definition": None, "error": None}
+    kwargs = copy.deepcopy(spec)
+    for key in ["cache_dir", "device_dict", "tmpdir"]:
+        if kwargs.get(key) is not None:
+            kwargs[key] = Path(kwargs[key])
+    try:
+        job = Job(**kwargs)
+        if job.cache_dir:
+            result["definition"] = job.render_cached(RenderCache(job.cache_dir))
+        else:
+            job.initialize()
+            result["definition"] = job.render()
+    except Exception as exc:
+        result["error"] = str(exc)
+    return result
+
+
+def render_many(
+    specs: Iterable[Dict[str, Any]],
+    workers: Optional[int] = None,
+    deadline: float = 120,
+) -> List[Dict[str, Any]]:
+    """Render many jobs across a pool of worker processes
+
+    Each worker imports the devices, tests and templates only once and then
+    renders its share of the specs. Results are returned in the order of
+    specs, each one tagged with its input spec.
+
+    The TuxBuild builds are first resolved concurrently, within deadline
+    seconds: the jobs of the builds that failed or timed out report the
+    error without being rendered.
+    """
+    specs = list(specs)
+    urls = {
+        index: spec["tuxbuild"].rstrip("/")
+        for index, spec in enumerate(specs)
+        if isinstance(spec.get("tuxbuild"), str)
+    }
+    builds, errors = resolve(urls.values(), deadline=deadline) if urls else ({}, {})
+    failed = {index: errors[url] for index, url in urls.items() if url in errors}
+    todo = [spec for index, spec in enumerate(specs) if index not in failed]
+    # Given to the workers: with the spawn and forkserver start methods,
+    # they do not inherit the responses fetched here
+    responses = {
+        url: requests.RESPONSES[url]
+        for url in (f"{build}/metadata.json" for build in builds)
+        if url in requests.RESPONSES
+    }
+
+    if workers == 1 or len(todo) <= 1:
+        rendered = [render_one(spec) for spec in todo]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=requests.seed, initargs=(responses,)
+        ) as executor:
+            chunksize = max(1, len(todo) // (4 * workers))
+            rendered = list(executor.map(render_one, todo, chunksize=chunksize))
+
+    results = iter(rendered)
+    return [
+        (
+            {"spec": spec, "definition": None, "error": failed[index]}
+            if index in failed
+            else next(results)
+        )
+        for index, spec in enumerate(specs)
+    ]
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import io
+import json
+import posixpath
+import re
+import tarfile
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.overlays import digest, open_tar
+from tuxlava.utils import atomic_path, use_entry
+
+# Slim modules tarballs kept in the cache directory, in bytes
+MAX_SIZE = 4 * 1024 * 1024 * 1024
+
+MODULE = re.compile(r"\.ko(\.(gz|xz|zst))?$")
+
+
+def module_name(path: str) -> str:
+    """Name of a module as given to modprobe, from its path"""
+    return MODULE.sub("", posixpath.basename(path)).replace("-", "_")
+
+
+def wanted_modules(mode: str, tests) -> Optional[List[str]]:
+    """Modules to keep for the given --slim-modules mode, None for all
+
+    "none" keeps no module, "auto" the modules of the tests when they are
+    all known, else mode is a comma separated list of modules.
+    """
+    if mode == "none":
+        return []
+    if mode == "auto":
+        if any(t.modules is None for t in tests):
+            return None
+        return sorted({m for t in tests for m in t.modules})
+    return sorted({m.strip() for m in mode.split(",") if m.strip()})
+
+
+def parse_dep(text: str) -> Dict[str, Tuple[str, List[str]]]:
+    """Path and dependencies of the modules listed in modules.dep, by name"""
+    modules = {}
+    for line in text.splitlines():
+        path, sep, deps = line.partition(":")
+        if sep:
+            modules[module_name(path)] = (path.strip(), deps.split())
+    return modules
+
+
+def closure(
+    deps: Dict[str, Tuple[str, List[str]]], names: List[str]
+) -> Tuple[Set[str], List[str]]:
+    """Paths of the modules and of their dependencies, and the unknown names"""
+    paths: Set[str] = set()
+    unknown = []
+    by_path = {path: dependencies for path, dependencies in deps.values()}
+    for name in names:
+        if module_name(name) not in deps:
+            unknown.append(name)
+            continue
+        todo = [deps[module_name(name)][0]]
+        while todo:
+            path = todo.pop()
+            if path not in paths:
+                paths.add(path)
+                todo.extend(by_path.get(path, []))
+    return paths, unknown
+
+
+def kept(
+    deps: Dict[str, Dict[str, Tuple[str, List[str]]]],
+    builtin: Dict[str, Set[str]],
+    names: List[str],
+    url: str,
+    strict: bool,
+) -> Set[str]:
+    """Paths in the tarball of the modules to keep, for each kernel version"""
+    if not deps:
+        raise InvalidArgument(f"No modules.dep in the modules {url}")
+    keep: Set[str] = set()
+    for root, modules in deps.items():
+        paths, unknown = closure(modules, names)
+        keep.update(posixpath.join(root, p) for p in paths)
+        unknown = [n for n in unknown if module_name(n) not in builtin.get(root, set())]
+        if strict and unknown:
+            raise InvalidArgument(
+                f"Unknown module(s) in {url}: {', '.join(sorted(unknown))}"
+            )
+    return keep
+
+
+def write(
+    dst: Path,
+    url: str,
+    names: List[str],
+    headers: Dict[str, str],
+    strict: bool,
+) -> None:
+    """Write the modules tarball at url with only the given modules to dst
+
+    The tarball is read once: the other files are written as they come,
+    and the modules are spooled to a temporary tarball until modules.dep
+    tells which ones to keep.
+    """
+    # modules.dep and modules.builtin of each kernel version
+    deps: Dict[str, Dict[str, Tuple[str, List[str]]]] = {}
+    builtin: Dict[str, Set[str]] = {}
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(dst) as tmp, tempfile.TemporaryFile(dir=dst.parent) as f:
+        with tarfile.open(tmp, mode="w:gz") as out:
+            with (
+                tarfile.open(fileobj=f, mode="w") as spool,
+                open_tar(url, headers) as tar,
+            ):
+                for member in tar:
+                    name = posixpath.normpath(member.name)
+                    data = tar.extractfile(member) if member.isreg() else None
+                    base = posixpath.basename(name)
+                    if data and base in ["modules.dep", "modules.builtin"]:
+                        content = data.read()
+                        data = io.BytesIO(content)
+                        text = content.decode("utf-8", "replace")
+                        root = posixpath.dirname(name)
+                        if base == "modules.dep":
+                            deps[root] = parse_dep(text)
+                        else:
+                            builtin[root] = {module_name(p) for p in text.split()}
+                    if MODULE.search(name):
+                        spool.addfile(member, data)
+                    else:
+                        out.addfile(member, data)
+
+            keep = kept(deps, builtin, names, url, strict)
+            f.seek(0)
+            with tarfile.open(fileobj=f, mode="r") as spool:
+                for member in spool:
+                    if posixpath.normpath(member.name) in keep:
+                        out.addfile(
+                            member,
+                            spool.extractfile(member) if member.isreg() else None,
+                        )
+
+
+def slim(
+    url: str,
+    names: List[str],
+    cache_dir: Path,
+    headers: Optional[Dict[str, str]] = None,
+    strict: bool = True,
+    max_size: int = MAX_SIZE,
+) -> str:
+    """file:// URL of the modules tarball at url with only the given modules
+
+    The modules are kept with their dependencies from modules.dep, and
+    with every file that is not a module (modules.dep, modules.alias, ...)
+    so that modprobe works. With strict, names that are neither modules
+    nor built in the kernel are rejected. The slim tarball is kept by URL,
+    digest of the tarball and names.
+    """
+    headers = headers or {}
+    key = hashlib.sha256(
+        json.dumps([url, digest(url, headers), sorted(names)]).encode()
+    ).hexdigest()
+    directory = Path(cache_dir) / "modules" / key
+    dst = directory / "modules.tar.gz"
+
+    if not dst.exists():
+        try:
+            write(dst, url, names, headers, strict)
+        except (EOFError, OSError, tarfile.TarError) as exc:
+            raise InvalidArgument(f"Unable to slim the modules {url}: {exc}")
+    use_entry(directory, max_size)
+    return f"file://{dst}"
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import contextlib
+import hashlib
+import itertools
+import json
+import posixpath
+import shutil
+import subprocess
+import tarfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from tuxlava import requests
+from tuxlava.checksums import sha256
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.rootfs import version
+from tuxlava.utils import atomic_path, compression, use_entry
+
+# Merged overlays kept in the cache directory, in bytes
+MAX_SIZE = 16 * 1024 * 1024 * 1024
+
+BUFFER_SIZE = 1024 * 1024
+
+Overlay = Tuple[str, str, str]
+
+
+def digest(url: str, headers: Optional[Dict[str, str]] = None) -> str:
+    """sha256 of a local file, version of the content of a remote one"""
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return sha256(Path(unquote(parsed.path)))
+    return version(url, headers)
+
+
+def auth_headers(secrets: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Authorization header sent with the downloads, from the job secrets"""
+    if secrets and list(secrets.keys())[0] is not None:
+        return {"Authorization": str(list(secrets.values())[0])}
+    return {}
+
+
+def feed(src: BinaryIO, proc: subprocess.Popen) -> threading.Thread:
+    def run():
+        with contextlib.suppress(BrokenPipeError):
+            shutil.copyfileobj(src, proc.stdin, BUFFER_SIZE)
+        with contextlib.suppress(BrokenPipeError):
+            proc.stdin.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+@contextlib.contextmanager
+def open_url(url: str, headers: Dict[str, str]) -> Iterator[BinaryIO]:
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        with open(unquote(parsed.path), "rb") as f:
+            yield f
+        return
+    ret = requests.requests_get(url, stream=True, headers=headers)
+    if ret.status_code != 200:
+        raise InvalidArgument(f"Unable to download overlay {url}: {ret.status_code}")
+    with ret:
+        yield ret.raw
+
+
+@contextlib.contextmanager
+def open_tar(url: str, headers: Dict[str, str]) -> Iterator[tarfile.TarFile]:
+    """Stream the members of the tarball at url"""
+    with open_url(url, headers) as src:
+        if compression(url)[1] != "zstd":
+            with tarfile.open(fileobj=src, mode="r|*") as tar:
+                yield tar
+            return
+
+        program = shutil.which("zstd")
+        if program is None:
+            try:
+                import zstandard
+            except ImportError:
+                raise InvalidArgument(
+                    "Merging zstd overlays requires zstd or the zstandard module"
+                )
+            with zstandard.ZstdDecompressor().stream_reader(src) as reader:
+                with tarfile.open(fileobj=reader, mode="r|") as tar:
+                    yield tar
+            return
+
+        proc = subprocess.Popen(
+            [program, "-d", "-c"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        feeder = feed(src, proc)
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                yield tar
+        finally:
+            proc.stdout.close()
+            feeder.join()
+            proc.wait()
+
+
+def relocate(name: str, path: str) -> str:
+    """Name of a member extracted to path, in a tarball applied on "/"
+
+    Absolute names are relative to path, like tar extracts them, and names
+    escaping path are rejected.
+    """
+    relative = posixpath.normpath(name.lstrip("/"))
+    if relative == ".." or relative.startswith("../"):
+        raise tarfile.TarError(f"member {name} is outside of {path}")
+    return posixpath.normpath(posixpath.join(path.strip("/"), relative))
+
+
+def write(
+    dst: Path,
+    overlays: List[Overlay],
+    headers: Dict[str, Dict[str, str]],
+    program: Optional[str],
+) -> None:
+    """Write the members of the overlays, in order, to the tarball dst
+
+    The tarball is compressed by program (zstd) when given, else gzip.
+    """
+
+    def add(out: tarfile.TarFile):
+        for name, url, path in overlays:
+            try:
+                with open_tar(url, headers.get(name, {})) as tar:
+                    for member in tar:
+                        member.name = relocate(member.name, path)
+                        if member.islnk():
+                            member.linkname = relocate(member.linkname, path)
+                        out.addfile(
+                            member, tar.extractfile(member) if member.isreg() else None
+                        )
+            except (EOFError, OSError, tarfile.TarError) as exc:
+                raise InvalidArgument(f"Unable to merge overlay {url}: {exc}")
+
+    if program is None:
+        with tarfile.open(dst, mode="w:gz", compresslevel=6) as out:
+            add(out)
+        return
+
+    with open(dst, "wb") as f:
+        proc = subprocess.Popen(
+            [program, "-T0", "-q", "-c"], stdin=subprocess.PIPE, stdout=f
+        )
+        try:
+            with tarfile.open(fileobj=proc.stdin, mode="w|") as out:
+                add(out)
+        finally:
+            proc.stdin.close()
+            if proc.wait():
+                raise InvalidArgument("Unable to merge the overlays: zstd failed")
+
+
+def merge(
+    overlays: List[Overlay],
+    cache_dir: Path,
+    secrets: Optional[Dict[str, Any]] = None,
+    max_size: int = MAX_SIZE,
+) -> List[Overlay]:
+    """Overlays with the consecutive tarballs merged, cached in cache_dir
+
+    The tarballs are extracted in order, each one to its path, like LAVA
+    would do, and written as a single tarball to apply on "/", compressed
+    with zstd -T0 when installed, else with gzip. The merged tarball is
+    kept by URL and digest of the inputs, the sha256 of local files and the
+    version (ETag) of remote ones. Overlays that are not tarballs are left
+    alone, and so is their order with the tarballs, that they might
+    overwrite or be overwritten by.
+    """
+    # Like in the templates, the secret is only sent for the modules
+    headers = {"modules": auth_headers(secrets)}
+
+    result: List[Overlay] = []
+    for is_tar, group in itertools.groupby(
+        overlays, key=lambda o: compression(o[1])[0] == "tar"
+    ):
+        run = list(group)
+        if is_tar and len(run) > 1:
+            result.append(merge_run(run, cache_dir, headers, max_size))
+        else:
+            result.extend(run)
+    return result
+
+
+def merge_run(
+    tars: List[Overlay],
+    cache_dir: Path,
+    headers: Dict[str, Dict[str, str]],
+    max_size: int,
+) -> Overlay:
+    """Merge the tarballs into a single overlay, cached in cache_dir"""
+    key = hashlib.sha256(
+        json.dumps(
+            [[url, digest(url, headers.get(name)), path] for name, url, path in tars]
+        ).encode()
+    ).hexdigest()
+    directory = Path(cache_dir) / "overlays" / key
+    program = shutil.which("zstd")
+    name = "overlay.tar.zst" if program else "overlay.tar.gz"
+    dst = next(directory.glob("overlay.tar.*"), directory / name)
+
+    if not dst.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        with atomic_path(dst) as tmp:
+            write(tmp, tars, headers, program)
+    use_entry(directory, max_size)
+    return ("overlays", f"file://{dst}", "/")
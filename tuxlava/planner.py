@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import fnmatch
+from typing import Any, Dict, List, Tuple
+
+from tuxlava.devices import Device
+from tuxlava.exceptions import InvalidArgument, MissingArgument
+from tuxlava.tests import Test
+
+
+def expand(device: str, patterns: List[str]) -> List[str]:
+    """Expand the test name patterns (like 'ltp-*') supported by the device"""
+    supported = Test.list(device=device)
+    tests: List[str] = []
+    for pattern in patterns:
+        matches = fnmatch.filter(supported, pattern)
+        if not matches:
+            raise InvalidArgument(
+                f"No test matching '{pattern}' supported on device '{device}'"
+            )
+        tests.extend(t for t in matches if t not in tests)
+    return tests
+
+
+def pack(
+    tests: List[Tuple[str, int]], max_timeout: int, overhead: int
+) -> List[List[str]]:
+    """Pack (name, timeout) pairs into the fewest groups fitting in a job
+
+    Every group timeout, including the overhead, stays under max_timeout.
+    The groups are built first-fit, longest tests first, and then sorted
+    to follow the original order of the tests.
+    """
+    budget = max_timeout - overhead
+    for name, timeout in tests:
+        if timeout > budget:
+            raise InvalidArgument(
+                f"Test '{name}' ({timeout} minutes) does not fit in a job of {max_timeout} minutes including {overhead} minutes of deploy and boot"
+            )
+
+    groups: List[List[str]] = []
+    remaining: List[int] = []
+    for name, timeout in sorted(tests, key=lambda t: t[1], reverse=True):
+        for index, left in enumerate(remaining):
+            if timeout <= left:
+                groups[index].append(name)
+                remaining[index] -= timeout
+                break
+        else:
+            groups.append([name])
+            remaining.append(budget - timeout)
+
+    order = {name: index for index, (name, _) in enumerate(tests)}
+    groups = [sorted(group, key=order.get) for group in groups]
+    return sorted(groups, key=lambda group: order[group[0]])
+
+
+def overhead(**kwargs) -> int:
+    """Deploy and boot timeout of the job, as computed by its template"""
+    device = Device.select(kwargs["device"])()
+    return device.overhead(kwargs.get("timeouts") or {})
+
+
+def plan(max_timeout: int, **kwargs) -> List[Dict[str, Any]]:
+    """Split the tests of a job into the fewest jobs lasting max_timeout
+
+    kwargs are the Job keyword arguments, and the test names can be
+    patterns. The arguments of each planned job are returned.
+    """
+    device = kwargs.get("device")
+    if not device:
+        raise MissingArgument("planning jobs requires a device")
+    timeouts = kwargs.get("timeouts", {})
+    names = expand(device, kwargs.get("tests", []))
+    if not names:
+        return [kwargs]
+
+    tests = [(name, Test.select(name)(timeouts.get(name)).timeout) for name in names]
+    groups = pack(tests, max_timeout, overhead(**kwargs))
+    return [{**kwargs, "tests": group} for group in groups]
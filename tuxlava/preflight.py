@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.requests import get_session
+
+# Job attributes holding the URL of an artefact
+ARTEFACTS = [
+    "ap_romfw",
+    "bios",
+    "bl1",
+    "boot",
+    "dtb",
+    "fip",
+    "kernel",
+    "mcp_fw",
+    "mcp_romfw",
+    "ramdisk",
+    "rootfs",
+    "scp_fw",
+    "scp_romfw",
+    "uefi",
+]
+
+# Missing artefacts, the other errors might be transient
+MISSING = [404, 410]
+
+# Artefacts the credentials of the job do not give access to
+DENIED = [401, 403]
+
+timeout = 10
+
+
+def is_url(value: Any) -> bool:
+    return isinstance(value, str) and urlparse(value).scheme in [
+        "file",
+        "http",
+        "https",
+    ]
+
+
+def job_urls(job) -> List[Tuple[str, str]]:
+    """(name, url) of every artefact referenced by an initialized job"""
+    urls = [(name, getattr(job, name)) for name in ARTEFACTS]
+    if job.modules:
+        urls.append(("modules", job.modules[0]))
+    urls.extend((name, url) for name, url, _ in job.overlays)
+    urls.extend((f"pflash-{index}", url) for index, url in enumerate(job.pflash))
+    urls.append(("test-definitions", job.test_definitions))
+    urls.extend((f"parameters {k}", v) for k, v in job.parameters.items())
+    return [(name, url) for name, url in urls if is_url(url)]
+
+
+def job_headers(job) -> Dict[str, str]:
+    """Headers an initialized job downloads its artefacts with"""
+    return job.device.download_headers(job.secrets)
+
+
+def probe(
+    url: str, session=None, headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Status and size of the artefact at url
+
+    HTTP servers are asked with a HEAD request, or for the first byte of
+    the artefact when HEAD is not allowed, sending headers. Local files are
+    checked with stat().
+    """
+    headers = headers or {}
+    result: Dict[str, Any] = {"url": url, "status": None, "size": None, "error": None}
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        try:
+            result["size"] = Path(unquote(parsed.path)).stat().st_size
+            result["status"] = 200
+        except FileNotFoundError:
+            result["status"] = 404
+        except OSError as exc:
+            result["error"] = str(exc)
+        return result
+
+    session = session or get_session(retries=2)
+    try:
+        ret = session.head(url, headers=headers, allow_redirects=True, timeout=timeout)
+        if ret.status_code in [403, 405, 501]:
+            ret = session.get(
+                url,
+                headers={**headers, "Range": "bytes=0-0"},
+                stream=True,
+                timeout=timeout,
+            )
+            ret.close()
+        result["status"] = ret.status_code
+        match = re.match(r"bytes 0-0/(\d+)", ret.headers.get("Content-Range", ""))
+        if match:
+            result["size"] = int(match.group(1))
+        elif ret.status_code == 200 and "Content-Length" in ret.headers:
+            result["size"] = int(ret.headers["Content-Length"])
+    except Exception as exc:
+        result["error"] = str(exc) or type(exc).__name__
+    return result
+
+
+def preflight(
+    urls: List[str],
+    workers: int = 16,
+    headers: Optional[List[Dict[str, str]]] = None,
+) -> List[Dict[str, Any]]:
+    """Probe the URLs concurrently, results in the same order
+
+    headers gives the headers to send with each URL, none by default.
+    """
+    pairs = list(zip(urls, headers or [{}] * len(urls)))
+    keys = [(url, tuple(sorted(h.items()))) for url, h in pairs]
+    unique = list(dict.fromkeys(keys))
+    workers = max(min(workers, len(unique)), 1)
+    # One connection kept by worker
+    session = get_session(retries=2, pool_size=workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(
+            zip(unique, pool.map(lambda k: probe(k[0], session, dict(k[1])), unique))
+        )
+    return [results[key] for key in keys]
+
+
+def check(jobs) -> List[Dict[str, Any]]:
+    """Probe the artefacts of initialized jobs, with their credentials
+
+    Raises InvalidArgument when an artefact is missing or denied, else
+    returns the results, each one with the name of the artefact.
+    """
+    names = [
+        (name, url, job_headers(job)) for job in jobs for name, url in job_urls(job)
+    ]
+    probes = preflight([url for _, url, _ in names], headers=[h for _, _, h in names])
+    results = [{"name": name, **result} for (name, _, _), result in zip(names, probes)]
+    errors = []
+    for message, statuses in [
+        ("Missing artefact(s)", MISSING),
+        ("Access denied to artefact(s)", DENIED),
+    ]:
+        failed = sorted(
+            {f"{r['name']} {r['url']}" for r in results if r["status"] in statuses}
+        )
+        if failed:
+            errors.append(f"{message}: {', '.join(failed)}")
+    if errors:
+        raise InvalidArgument("; ".join(errors))
+    return results
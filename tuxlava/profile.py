@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import contextlib
+import contextvars
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class Profile:
+    """Durations of the phases of a job
+
+    Phases are named after the phases they are nested in, like
+    'initialize/validate'. They are listed in start order, a phase
+    happening several times being listed each time.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self.stack: List[str] = []
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total": time.perf_counter() - self.start,
+            "phases": [dict(p) for p in self.phases],
+        }
+
+
+PROFILE: contextvars.ContextVar[Optional[Profile]] = contextvars.ContextVar(
+    "tuxlava_profile", default=None
+)
+
+
+@contextlib.contextmanager
+def profiling(
+    callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Iterator[Profile]:
+    """Record the phases run in this context
+
+    The callback is called with the report when leaving the context, even
+    on errors.
+    """
+    profile = Profile()
+    token = PROFILE.set(profile)
+    try:
+        yield profile
+    finally:
+        PROFILE.reset(token)
+        if callback is not None:
+            callback(profile.report())
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase, when profiling. Also usable as a decorator"""
+    profile = PROFILE.get()
+    if profile is None:
+        yield
+        return
+
+    profile.stack.append(name)
+    entry = {"name": "/".join(profile.stack), "start": 0.0, "duration": 0.0}
+    profile.phases.append(entry)
+    start = time.perf_counter()
+    entry["start"] = start - profile.start
+    try:
+        yield
+    finally:
+        entry["duration"] = time.perf_counter() - start
+        profile.stack.pop()
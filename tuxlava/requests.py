@@ -6,15 +6,45 @@
 #
 # SPDX-License-Identifier: MIT
 
+import contextlib
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, NamedTuple, Optional
+
 import requests
 from requests.adapters import HTTPAdapter
 from requests.packages import urllib3  # type: ignore
 from requests.packages.urllib3.util.retry import Retry  # type: ignore
 
+from tuxlava.utils import atomic_path, cache_home
+
 timeout = 60
 
+# TuxBuild build directories, named after the build KSUID, never change
+# once the build has completed
+IMMUTABLE = re.compile(r"/builds/[0-9A-Za-z]{27}/")
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    text: str
+
+
+# Connections kept by host, for as many threads sharing a session
+POOL_SIZE = 16
+
+# Session shared by the requests of the process, to reuse the connections
+SESSION: Optional[requests.Session] = None
+SESSION_LOCK = threading.Lock()
 
-def get_session(*, retries):
+# Successful responses of cached_get() in this process, by URL
+RESPONSES: Dict[str, CachedResponse] = {}
+
+
+def get_session(*, retries, pool_size=POOL_SIZE):
     session = requests.Session()
     if urllib3.__version__ >= "1.26":
         allowed_methods = "allowed_methods"
@@ -26,12 +56,86 @@ def get_session(*, retries):
         backoff_factor=1,
         **{allowed_methods: ["HEAD", "OPTIONS", "GET", "POST"]},
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=pool_size)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
 
 
+def session() -> requests.Session:
+    global SESSION
+    with SESSION_LOCK:
+        if SESSION is None:
+            SESSION = get_session(retries=8)
+        return SESSION
+
+
+def reset_session():
+    # After a fork, the child must not share the connections of the parent
+    global SESSION, SESSION_LOCK
+    SESSION = None
+    SESSION_LOCK = threading.Lock()
+
+
+def reset():
+    # Forget the session and the responses
+    reset_session()
+    RESPONSES.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_session)
+
+
+def seed(responses: Dict[str, CachedResponse]) -> None:
+    """Answer cached_get() with responses fetched by another process"""
+    RESPONSES.update(responses)
+
+
 def requests_get(*args, **kwargs):
-    session = get_session(retries=8)
-    return session.get(*args, timeout=timeout, **kwargs)
+    return session().get(*args, timeout=timeout, **kwargs)
+
+
+def cached_get(url: str) -> CachedResponse:
+    """GET url, caching the successful responses on disk
+
+    Cached responses are revalidated with their ETag, except for the
+    immutable TuxBuild build directories. A URL is requested at most once
+    per process.
+    """
+    if url in RESPONSES:
+        return RESPONSES[url]
+
+    path = cache_home() / "http" / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+    entry = None
+    with contextlib.suppress(OSError, ValueError):
+        entry = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(entry, dict) or entry.get("url") != url:
+        entry = None
+
+    if entry is not None and IMMUTABLE.search(url):
+        response = CachedResponse(200, entry["text"])
+    else:
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        ret = requests_get(url, headers=headers)
+        if ret.status_code == 304 and entry is not None:
+            response = CachedResponse(200, entry["text"])
+        else:
+            response = CachedResponse(ret.status_code, ret.text)
+            if ret.status_code == 200:
+                etag = ret.headers.get("ETag")
+                entry = {
+                    "url": url,
+                    "etag": etag if isinstance(etag, str) else None,
+                    "text": ret.text,
+                }
+                with contextlib.suppress(OSError):
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    with atomic_path(path) as tmp:
+                        tmp.write_text(json.dumps(entry), encoding="utf-8")
+
+    if response.status_code == 200:
+        RESPONSES[url] = response
+    return response
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import contextlib
+import gzip
+import hashlib
+import io
+import lzma
+import shutil
+import subprocess
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+from urllib.parse import unquote, urlparse
+
+from tuxlava import requests
+from tuxlava.exceptions import InvalidArgument
+from tuxlava.utils import atomic_path, compression, use_entry
+
+# Multithreaded decompression programs, used when installed
+PROGRAMS = {
+    "gz": ["pigz", "-d", "-c"],
+    "xz": ["xz", "-d", "-T0", "-c"],
+    "zstd": ["zstd", "-d", "-T0", "-c"],
+}
+
+# Decompressed rootfs kept in the cache directory, in bytes
+MAX_SIZE = 16 * 1024 * 1024 * 1024
+
+BUFFER_SIZE = 1024 * 1024
+
+
+def version(url: str, headers: Optional[Dict[str, str]] = None) -> str:
+    """Validator of the content at url: ETag, else modification time and size"""
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        st = Path(unquote(parsed.path)).stat()
+        return f"{st.st_size}-{st.st_mtime_ns}"
+    ret = requests.session().head(
+        url, allow_redirects=True, timeout=requests.timeout, headers=headers or {}
+    )
+    if ret.status_code in [403, 405, 501]:
+        # HEAD not allowed, the content is identified by its URL
+        return ""
+    if ret.status_code != 200:
+        raise InvalidArgument(f"Unable to get rootfs {url}: {ret.status_code}")
+    return ret.headers.get("ETag") or "{}-{}".format(
+        ret.headers.get("Last-Modified", ""), ret.headers.get("Content-Length", "")
+    )
+
+
+def decompress_stream(src: BinaryIO, dst: BinaryIO, kind: str) -> None:
+    """Decompress src into dst, with a multithreaded program when available"""
+    program = shutil.which(PROGRAMS[kind][0])
+    if program:
+        # Local files are read by the program itself
+        local = isinstance(src, io.BufferedReader)
+        proc = subprocess.Popen(
+            [program, *PROGRAMS[kind][1:]],
+            stdin=src if local else subprocess.PIPE,
+            stdout=dst,
+        )
+        if not local:
+            with contextlib.suppress(BrokenPipeError):
+                shutil.copyfileobj(src, proc.stdin, BUFFER_SIZE)
+            with contextlib.suppress(BrokenPipeError):
+                proc.stdin.close()
+        if proc.wait():
+            raise InvalidArgument(f"Unable to decompress the rootfs: {program} failed")
+        return
+
+    if kind == "gz":
+        reader = gzip.GzipFile(fileobj=src)
+    elif kind == "xz":
+        reader = lzma.LZMAFile(src)
+    else:
+        try:
+            import zstandard
+        except ImportError:
+            raise InvalidArgument(
+                "Decompressing a zstd rootfs requires zstd or the zstandard module"
+            )
+        reader = zstandard.ZstdDecompressor().stream_reader(src)
+    try:
+        with reader:
+            shutil.copyfileobj(reader, dst, BUFFER_SIZE)
+    except (EOFError, OSError, lzma.LZMAError) as exc:
+        raise InvalidArgument(f"Unable to decompress the rootfs: {exc}")
+
+
+def decompress(
+    url: str,
+    cache_dir: Path,
+    headers: Optional[Dict[str, str]] = None,
+    max_size: int = MAX_SIZE,
+) -> str:
+    """file:// URL of the decompressed rootfs at url, cached in cache_dir
+
+    The decompressed rootfs is kept by URL and version of the content,
+    the ETag for HTTP servers, the least recently used ones being removed
+    when they grow over max_size bytes. Uncompressed rootfs are returned
+    as is. headers are sent with the HTTP requests (authentication).
+    """
+    kind = compression(url)[1]
+    if kind is None:
+        return url
+
+    key = hashlib.sha256(f"{url}\n{version(url, headers)}".encode("utf-8")).hexdigest()
+    directory = Path(cache_dir) / "rootfs" / key
+    name = Path(unquote(urlparse(url).path)).name
+    for suffix in [".gz", ".xz", ".zst"]:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    path = directory / name
+
+    if not path.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        with atomic_path(path) as tmp, open(tmp, "wb") as dst:
+            parsed = urlparse(url)
+            if parsed.scheme == "file":
+                with open(unquote(parsed.path), "rb") as src:
+                    decompress_stream(src, dst, kind)
+            else:
+                ret = requests.requests_get(url, stream=True, headers=headers or {})
+                if ret.status_code != 200:
+                    raise InvalidArgument(
+                        f"Unable to download rootfs {url}: {ret.status_code}"
+                    )
+                with ret:
+                    decompress_stream(ret.raw, dst, kind)
+    use_entry(directory, max_size)
+    return f"file://{path}"
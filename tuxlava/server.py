@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import logging
+import socketserver
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from tuxlava import devices, templates, tests
+from tuxlava.jobs import render_one
+
+LOG = logging.getLogger("tuxlava")
+
+
+def warmup():
+    # Import every device and test module and compile every template once
+    # so that requests only pay for rendering
+    devices.load()
+    tests.load()
+    for env in [templates.jobs(), templates.devices(), templates.tests()]:
+        for name in env.list_templates():
+            env.get_template(name)
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    """Render one job per line of JSON, answering one line of JSON each"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+                if not isinstance(spec, dict):
+                    raise ValueError("expecting a job spec")
+                result = self.render(spec)
+            except ValueError as exc:
+                result = {
+                    "spec": None,
+                    "definition": None,
+                    "error": f"Invalid request: {exc}",
+                }
+            self.wfile.write(json.dumps(result).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+    def render(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        if spec.get("tmpdir") is not None:
+            return render_one(spec)
+        # The files generated for the job are removed with the request
+        with tempfile.TemporaryDirectory(prefix="tuxlava-") as tmpdir:
+            return {**render_one({**spec, "tmpdir": tmpdir}), "spec": spec}
+
+
+class JobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        if self.path.is_socket():
+            self.path.unlink()
+        warmup()
+        super().__init__(str(self.path), JobHandler)
+
+    def server_close(self):
+        super().server_close()
+        if self.path.is_socket():
+            self.path.unlink()
+
+
+def serve(path: Path):
+    with JobServer(path) as server:
+        LOG.info("Listening on %s", path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# vim: set ts=4
+#
+# Copyright 2024-present Linaro Limited
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tuxlava.exceptions import InvalidArgument, MissingArgument
+from tuxlava.planner import expand
+from tuxlava.tests import Test
+
+# Runtimes of the testcases in seconds, by test name and in run order
+Runtimes = Dict[str, Dict[str, float]]
+
+
+def load_runtimes(path: Path) -> Runtimes:
+    """Load the testcase runtimes from a JSON file
+
+    The file maps each test name to the runtime in seconds of its
+    testcases, in run order: {"ltp-syscalls": {"abort01": 0.2, ...}}.
+    """
+    try:
+        runtimes = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise InvalidArgument(f"Invalid runtimes file '{path}': {exc}")
+    if not isinstance(runtimes, dict) or not all(
+        isinstance(testcases, dict)
+        and all(isinstance(s, (int, float)) for s in testcases.values())
+        for testcases in runtimes.values()
+    ):
+        raise InvalidArgument(
+            f"Invalid runtimes file '{path}': expecting seconds by testcase by test"
+        )
+    return runtimes
+
+
+def split(seconds: List[float], count: int) -> List[float]:
+    """Runtime of each shard, the testcases being dealt round-robin
+
+    This is how the test runners split the testcases between
+    SHARD_NUMBER shards.
+    """
+    return [sum(seconds[index::count]) for index in range(count)]
+
+
+def shard_count(seconds: List[float], duration: int) -> int:
+    """Fewest shards lasting at most duration minutes each
+
+    A shard cannot be shorter than the longest testcase.
+    """
+    limit = max([duration * 60] + seconds)
+    count = 1
+    while max(split(seconds, count)) > limit:
+        count += 1
+    return count
+
+
+def shard(
+    shards: Optional[int] = None,
+    duration: Optional[int] = None,
+    runtimes: Optional[Runtimes] = None,
+    **kwargs,
+) -> List[Dict[str, Any]]:
+    """Split the shardable tests of a job into complete jobs
+
+    Either the number of shards or the target duration of a shard in
+    minutes is given. The shard count and the timeout of each shard are
+    computed from the testcase runtimes when available, and from the
+    test timeouts otherwise. Tests that cannot be sharded run in the
+    first shard. The arguments of each job are returned.
+    """
+    device = kwargs.get("device")
+    if not device:
+        raise MissingArgument("sharding jobs requires a device")
+    if not shards and not duration:
+        raise MissingArgument("sharding jobs requires a shard count or duration")
+    runtimes = runtimes or {}
+    timeouts = kwargs.get("timeouts", {})
+    names = expand(device, kwargs.get("tests", []))
+
+    suites = {}
+    for name in names:
+        test = Test.select(name)
+        if test.shardable:
+            seconds = list(runtimes.get(name, {}).values())
+            suites[name] = (test(timeouts.get(name)).timeout, seconds)
+
+    if not shards:
+        shards = 1
+        for timeout, seconds in suites.values():
+            if seconds:
+                shards = max(shards, shard_count(seconds, duration))
+            else:
+                shards = max(shards, math.ceil(timeout / duration))
+    if not suites or shards == 1:
+        return [{**kwargs, "tests": names}]
+
+    specs = []
+    for index in range(shards):
+        shard_timeouts = dict(timeouts)
+        for name, (timeout, seconds) in suites.items():
+            if seconds and sum(seconds):
+                ratio = split(seconds, shards)[index] / sum(seconds)
+            else:
+                ratio = 1 / shards
+            shard_timeouts[name] = max(math.ceil(timeout * ratio), 1)
+        parameters = dict(kwargs.get("parameters", {}))
+        parameters["SHARD_NUMBER"] = str(shards)
+        parameters["SHARD_INDEX"] = str(index + 1)
+        specs.append(
+            {
+                **kwargs,
+                "tests": [t for t in names if t in suites or index == 0],
+                "timeouts": shard_timeouts,
+                "parameters": parameters,
+            }
+        )
+    return specs
@@ -6,21 +6,43 @@
 #
 # SPDX-License-Identifier: MIT
 
+import contextlib
 from functools import lru_cache
 from pathlib import Path
 
 import jinja2
 
-from tuxlava.utils import compression
+from tuxlava import __version__
+from tuxlava.utils import cache_home, compression
 
 BASE = (Path(__file__) / "..").resolve()
 
 
+class BytecodeCache(jinja2.FileSystemBytecodeCache):
+    def dump_bytecode(self, bucket):
+        # The cache is an optimization: never fail because it is not writable
+        with contextlib.suppress(OSError):
+            super().dump_bytecode(bucket)
+
+
+@lru_cache(maxsize=None)
+def bytecode_cache():
+    # Compiled templates are stored per tuxlava version. Inside a version,
+    # jinja2 invalidates the entries when the template source changes.
+    directory = cache_home() / "templates" / __version__
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return BytecodeCache(str(directory))
+
+
 @lru_cache(maxsize=None)
 def jobs():
     env = jinja2.Environment(
         autoescape=False,
         trim_blocks=True,
+        bytecode_cache=bytecode_cache(),
         loader=jinja2.FileSystemLoader(str(BASE / "jobs")),
         undefined=jinja2.StrictUndefined,
     )
@@ -33,6 +55,7 @@ def devices():
     return jinja2.Environment(
         autoescape=False,
         trim_blocks=True,
+        bytecode_cache=bytecode_cache(),
         loader=jinja2.FileSystemLoader(str(BASE / "devices")),
     )
 
@@ -42,6 +65,7 @@ def tests():
     return jinja2.Environment(
         autoescape=False,
         trim_blocks=True,
+        bytecode_cache=bytecode_cache(),
         loader=jinja2.FileSystemLoader(str(BASE / "tests")),
         undefined=jinja2.StrictUndefined,
     )
@@ -7,17 +7,13 @@
 # SPDX-License-Identifier: MIT
 
 import fnmatch
-from typing import List
+import importlib
+from typing import Dict, List, Optional, Type
 
-from tuxlava import templates
+from tuxlava import index
 from tuxlava.devices import Device
 from tuxlava.exceptions import InvalidArgument
-
-
-def subclasses(cls):
-    return set(cls.__subclasses__()).union(
-        [s for c in cls.__subclasses__() for s in subclasses(c)]
-    )
+from tuxlava.profile import phase
 
 
 def device_matches_pattern(device, pattern: str) -> bool:
@@ -25,14 +21,39 @@ def device_matches_pattern(device, pattern: str) -> bool:
     return fnmatch.fnmatch(device.name, pattern)
 
 
-def is_test_supported(test, devices):
-    # checks if the given test is available/supported for any device in devices list
-    for d in devices:
-        for pat in test.devices:
-            if device_matches_pattern(d, pat):
-                return True
-
-    return False
+# Test classes by name, filled when the classes are defined
+TESTS: Dict[str, Type["Test"]] = {}
+
+# Sorted names of the tests supported by a device, computed on first use
+COMPATIBILITY: Dict[str, List[str]] = {}
+
+
+def load(name=None):
+    # Import the module defining the given test, or every test module
+    if name is None:
+        modules = sorted({module for module, _ in index.TESTS.values()})
+    elif name in index.TESTS and name not in TESTS:
+        modules = [index.TESTS[name][0]]
+    else:
+        modules = []
+    for module in modules:
+        importlib.import_module(f"tuxlava.tests.{module}")
+
+
+def compatible_tests(device: str) -> List[str]:
+    if device not in COMPATIBILITY:
+        matches = [
+            any(fnmatch.fnmatch(device, pat) for pat in patterns)
+            for patterns in index.PATTERNS
+        ]
+        names = {name for name, (_, i) in index.TESTS.items() if matches[i]}
+        names.update(
+            name
+            for name, test in TESTS.items()
+            if any(fnmatch.fnmatch(device, pat) for pat in test.devices)
+        )
+        COMPATIBILITY[device] = sorted(names)
+    return COMPATIBILITY[device]
 
 
 class Test:
@@ -40,36 +61,48 @@ class Test:
     name: str = ""
     timeout: int = 0
     need_test_definition: bool = False
+    shardable: bool = False
+    # Kernel modules the test loads, None when unknown (all of them)
+    modules: Optional[List[str]] = None
 
     def __init__(self, timeout):
         if timeout:
             self.timeout = timeout
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get("name"):
+            TESTS[cls.name] = cls
+            COMPATIBILITY.clear()
+
     @classmethod
     def select(cls, name):
-        for subclass in subclasses(cls):
-            if subclass.name == name:
-                return subclass
+        load(name)
+        subclass = TESTS.get(name)
+        if subclass is not None and issubclass(subclass, cls):
+            return subclass
         raise InvalidArgument(f"Unknown test {name}")
 
     @classmethod
     def list(cls, device=None, virtual_device=False):
         if virtual_device:
-            virtual_devices = Device.list(virtual_device=True)
-            return sorted(
-                t.name
-                for t in subclasses(cls)
-                if t.name and is_test_supported(t, virtual_devices)
+            names = sorted(
+                {
+                    name
+                    for d in Device.names(virtual_device=True)
+                    for name in compatible_tests(d)
+                }
             )
-        if device is None:
-            return sorted(s.name for s in subclasses(cls) if s.name)
-        device_obj = Device.select(device)()
-        return sorted(
-            t.name
-            for t in subclasses(cls)
-            if t.name
-            and any([device_matches_pattern(device_obj, pat) for pat in t.devices])
-        )
+        elif device is None:
+            names = sorted(set(index.TESTS).union(TESTS))
+        else:
+            if device not in Device.names():
+                Device.select(device)
+            names = compatible_tests(device)
+        if cls is Test:
+            return names
+        load()
+        return [name for name in names if issubclass(TESTS[name], cls)]
 
     def validate(self, device, **kwargs):
         if not any([device_matches_pattern(device, pat) for pat in self.devices]):
@@ -78,32 +111,7 @@ class Test:
             )
 
     def _render(self, filename, **kwargs):
-        return templates.tests().get_template(filename).render(**kwargs)
-
-
-import tuxlava.tests.commands  # noqa: E402
-import tuxlava.tests.hackingsession  # noqa: E402
-import tuxlava.tests.kselftest  # noqa: E402
-import tuxlava.tests.kunit  # noqa: E402
-import tuxlava.tests.kvmunittests  # noqa: E402
-import tuxlava.tests.libgpiod  # noqa: E402
-import tuxlava.tests.libhugetlbfs  # noqa: E402
-import tuxlava.tests.ltp  # noqa: E402
-import tuxlava.tests.mmtests  # noqa: E402,F401
-import tuxlava.tests.modules  # noqa: E402,F401
-import tuxlava.tests.morello  # noqa: E402,F401
-import tuxlava.tests.network  # noqa: E402,F401
-import tuxlava.tests.perf  # noqa: E402,F401
-import tuxlava.tests.peripherals  # noqa: E402,F401
-import tuxlava.tests.rcutorture  # noqa: E402,F401
-import tuxlava.tests.rttests  # noqa: E402,F401
-import tuxlava.tests.systemdanalyze  # noqa: E402,F401
-import tuxlava.tests.tcpreplay  # noqa: E402,F401
-import tuxlava.tests.tfatests  # noqa: E402,F401
-import tuxlava.tests.v4l2  # noqa: E402,F401
-import tuxlava.tests.vdso  # noqa: E402,F401
-import tuxlava.tests.xfstests  # noqa: E402,F401
-import tuxlava.tests.androidcts  # noqa: E402,F401
-import tuxlava.tests.androidvts  # noqa: E402,F401
-import tuxlava.tests.smoke  # noqa: E402,F401
-import tuxlava.tests.wifi  # noqa: E402,F401
+        from tuxlava import templates
+
+        with phase(f"test/{self.name}"):
+            return templates.tests().get_template(filename).render(**kwargs)
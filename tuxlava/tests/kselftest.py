@@ -20,6 +20,7 @@ class KSelfTest(Test):
     ]
     cmdfile: str = ""
     need_test_definition = True
+    shardable = True
 
     def render(self, **kwargs):
         kwargs["name"] = self.name
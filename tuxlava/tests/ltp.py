@@ -20,6 +20,7 @@ class LTPTest(Test):
     ]
     cmdfile: str = ""
     need_test_definition = True
+    shardable = True
 
     def render(self, **kwargs):
         kwargs["name"] = self.name
@@ -155,6 +156,8 @@ class LTPSmoke(LTPTest):
     name = "ltp-smoke"
     cmdfile = "smoketest"
     timeout = 5
+    # Loop devices and the filesystems tested by chdir01
+    modules = ["loop", "btrfs", "exfat", "ext4", "fuse", "vfat", "xfs"]
 
 
 class LTPSyscalls(LTPTest):
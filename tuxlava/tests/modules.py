@@ -21,6 +21,8 @@ class Modules(Test):
     name = "modules"
     timeout = 20
     need_test_definition = True
+    # The test definition splits the modules with SHARD_NUMBER and SHARD_INDEX
+    shardable = True
 
     def render(self, **kwargs):
         kwargs["name"] = self.name
@@ -21,6 +21,7 @@ class RCUTorture(Test):
     name = "rcutorture"
     timeout = 15
     need_test_definition = True
+    modules = ["rcutorture"]
 
     def render(self, **kwargs):
         kwargs["name"] = self.name
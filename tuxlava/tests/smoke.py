@@ -6,6 +6,8 @@
 #
 # SPDX-License-Identifier: MIT
 
+from typing import List
+
 from tuxlava.tests import Test
 
 
@@ -20,6 +22,7 @@ class SmokeTest(Test):
         "flasher-*",
     ]
     need_test_definition = True
+    modules: List[str] = []
 
     def render(self, **kwargs):
         kwargs["name"] = self.name
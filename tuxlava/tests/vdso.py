@@ -6,6 +6,8 @@
 #
 # SPDX-License-Identifier: MIT
 
+from typing import List
+
 from tuxlava.tests import Test
 
 
@@ -21,6 +23,7 @@ class VdsoTest(Test):
     name = "vdso"
     timeout = 15
     need_test_definition = True
+    modules: List[str] = []
 
     def render(self, **kwargs):
         kwargs["name"] = self.name
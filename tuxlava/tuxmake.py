@@ -8,9 +8,13 @@
 
 import contextlib
 import json
+import queue
+import threading
+import time
 from pathlib import Path
+from typing import Dict, Iterable, Tuple
 
-from tuxlava.requests import requests_get
+from tuxlava.requests import POOL_SIZE, cached_get
 
 
 class InvalidTuxBuild(Exception):
@@ -53,7 +57,7 @@ class TuxBuildBuild(TuxBuild):
         super().__init__()
 
         self.url = url
-        ret = requests_get(f"{url}/metadata.json")
+        ret = cached_get(f"{url}/metadata.json")
         if ret.status_code != 200:
             raise self.Invalid(f"{url}/metadata.json is missing")
 
@@ -75,3 +79,60 @@ class TuxMakeBuild(TuxBuild):
             )
 
         self.parse(f"file://{self.location}", metadata_file.read_text(encoding="utf-8"))
+
+
+def resolve(
+    urls: Iterable[str], deadline: float = 120, workers: int = 16
+) -> Tuple[Dict[str, TuxBuildBuild], Dict[str, str]]:
+    """Fetch the metadata of many TuxBuild builds concurrently
+
+    Returns the builds and the errors, by URL, known when all the builds
+    are resolved or when the deadline (in seconds) expires. The builds
+    still being fetched, or not started, are then reported as timed out.
+    The workers share one session, and are at most its pool size.
+    """
+    pending = list(dict.fromkeys(urls))
+    builds: Dict[str, TuxBuildBuild] = {}
+    errors: Dict[str, str] = {}
+    done = threading.Condition()
+    stop = threading.Event()
+    todo: "queue.Queue[str]" = queue.Queue()
+    for url in pending:
+        todo.put(url)
+
+    def worker():
+        # The builds not started at the deadline are never fetched
+        while not stop.is_set():
+            try:
+                url = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                build, error = TuxBuildBuild(url), None
+            except Exception as exc:
+                build, error = None, str(exc) or type(exc).__name__
+            with done:
+                if build is not None:
+                    builds[url] = build
+                else:
+                    errors[url] = error
+                done.notify()
+
+    # Daemon threads: a build stalled in retries must not delay the exit
+    for _ in range(min(workers, POOL_SIZE, len(pending))):
+        threading.Thread(target=worker, daemon=True).start()
+
+    end = time.monotonic() + deadline
+    with done:
+        while len(builds) + len(errors) < len(pending):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done.wait(remaining)
+        stop.set()
+        builds = dict(builds)
+        errors = dict(errors)
+    for url in pending:
+        if url not in builds and url not in errors:
+            errors[url] = f"{url}/metadata.json timed out after {deadline} seconds"
+    return builds, errors
@@ -7,37 +7,198 @@
 # SPDX-License-Identifier: MIT
 
 import argparse
+import contextlib
+import functools
+import lzma
+import os
 import re
+import shutil
+import tempfile
+import zlib
 from pathlib import Path
-from urllib.parse import urlparse
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+
+class Compression(NamedTuple):
+    format: Optional[str]
+    compression: Optional[str]
+
 
 COMPRESSIONS = {
-    ".tar.xz": ("tar", "xz"),
-    ".tar.gz": ("tar", "gz"),
-    ".tar": ("tar", None),
-    ".tgz": ("tar", "gz"),
-    ".tar.zst": ("tar", "zstd"),
-    ".cpio.xz": ("cpio.newc", "xz"),
-    ".cpio.gz": ("cpio.newc", "gz"),
-    ".cpio.zst": ("cpio.newc", "zstd"),
-    ".cpio": ("cpio.newc", None),
-    ".ext4.xz": ("ext4", "xz"),
-    ".ext4.gz": ("ext4", "gz"),
-    ".ext4.zst": ("ext4", "zstd"),
-    ".ext4": ("ext4", None),
-    ".gz": (None, "gz"),
-    ".xz": (None, "xz"),
-    ".zst": (None, "zstd"),
-    ".py": ("file", None),
-    ".sh": ("file", None),
+    ".tar.xz": Compression("tar", "xz"),
+    ".tar.gz": Compression("tar", "gz"),
+    ".tar": Compression("tar", None),
+    ".tgz": Compression("tar", "gz"),
+    ".tar.zst": Compression("tar", "zstd"),
+    ".cpio.xz": Compression("cpio.newc", "xz"),
+    ".cpio.gz": Compression("cpio.newc", "gz"),
+    ".cpio.zst": Compression("cpio.newc", "zstd"),
+    ".cpio": Compression("cpio.newc", None),
+    ".ext4.xz": Compression("ext4", "xz"),
+    ".ext4.gz": Compression("ext4", "gz"),
+    ".ext4.zst": Compression("ext4", "zstd"),
+    ".ext4": Compression("ext4", None),
+    ".gz": Compression(None, "gz"),
+    ".xz": Compression(None, "xz"),
+    ".zst": Compression(None, "zstd"),
+    ".py": Compression("file", None),
+    ".sh": Compression("file", None),
 }
+NONE = Compression(None, None)
+
+# Magic bytes of the compressed files, at the start of the file
+COMPRESSION_MAGICS = [
+    (b"\x1f\x8b", "gz"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+# Magic bytes of the formats, at the given offset
+FORMAT_MAGICS = [
+    (0, b"070701", "cpio.newc"),
+    (0, b"070702", "cpio.newc"),
+    (257, b"ustar", "tar"),
+    (1080, b"\x53\xef", "ext4"),
+]
+# Bytes read to detect the compression, and decompressed to detect the format
+HEAD_SIZE = 64 * 1024
+FORMAT_SIZE = 4096
+
+# Detected compression of the local files, by path and modification time
+DETECTED: Dict[Tuple[str, int, int], Compression] = {}
+
+
+@functools.lru_cache(maxsize=4096)
+def suffix_compression(path: str) -> Compression:
+    """Compression given by the longest known suffix of path"""
+    index = path.find(".")
+    while index != -1:
+        if path[index:] in COMPRESSIONS:
+            return COMPRESSIONS[path[index:]]
+        index = path.find(".", index + 1)
+    return NONE
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    for offset, magic, name in FORMAT_MAGICS:
+        if head[offset : offset + len(magic)] == magic:
+            return name
+    return None
+
+
+def sniff(head: bytes) -> Compression:
+    """Compression and format of a file from its first bytes
+
+    The format of gzip and xz files is detected on the start of their
+    decompressed content. It is unknown for zstd files, which would need
+    a third-party module.
+    """
+    for magic, name in COMPRESSION_MAGICS:
+        if not head.startswith(magic):
+            continue
+        content = b""
+        with contextlib.suppress(EOFError, lzma.LZMAError, zlib.error):
+            if name == "gz":
+                content = zlib.decompressobj(wbits=31).decompress(head, FORMAT_SIZE)
+            elif name == "xz":
+                content = lzma.LZMADecompressor().decompress(head, FORMAT_SIZE)
+        return Compression(sniff_format(content), name)
+    return Compression(sniff_format(head), None)
+
+
+def detect(path: Path) -> Optional[Compression]:
+    """Compression of a local file from its content, None when unreadable"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    if key not in DETECTED:
+        try:
+            with open(path, "rb") as f:
+                head = f.read(HEAD_SIZE)
+        except OSError:
+            return None
+        DETECTED[key] = sniff(head)
+    return DETECTED[key]
 
 
 def compression(path):
-    for ext, ret in COMPRESSIONS.items():
-        if path.endswith(ext):
-            return ret
-    return (None, None)
+    """Format and compression of the file at path, as (format, compression)
+
+    Local files (file:// URLs) are identified by their magic bytes, the
+    suffix of path giving the format of compressed content that cannot be
+    identified. The other paths only have their suffix.
+    """
+    ret = suffix_compression(path)
+    if not path.startswith("file://"):
+        return ret
+    detected = detect(Path(unquote(urlparse(path).path)))
+    if detected is None or detected == NONE:
+        return ret
+    if detected.compression is None:
+        return detected
+    return Compression(detected.format or ret.format, detected.compression)
+
+
+def cache_home() -> Path:
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "tuxlava"
+
+
+# Read once: os.umask() can only be read by setting it, for every thread
+UMASK = os.umask(0o022)
+os.umask(UMASK)
+
+
+@contextlib.contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    """Path of a new temporary file, renamed to path on success
+
+    The temporary file is unique, in the directory of path, so that
+    threads and processes writing the same path concurrently never share
+    it, and readers only see complete files. It is removed on failure.
+    """
+    path = Path(path)
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    tmp = Path(name)
+    try:
+        # Like a file created by open(), not mkstemp() private mode
+        os.fchmod(fd, 0o666 & ~UMASK)
+        os.close(fd)
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp.unlink()
+
+
+def use_entry(entry: Path, max_size: int) -> None:
+    """Mark the entry directory of a cache as recently used
+
+    The least recently used entries next to it are then removed until
+    they all fit in max_size bytes.
+    """
+    os.utime(entry)
+    evict_directories(entry.parent, max_size)
+
+
+def evict_directories(directory: Path, max_size: int) -> None:
+    """Remove the least recently used (oldest mtime) entries of directory
+
+    Each entry is a directory of files, removed as a whole until the
+    entries fit in max_size bytes. The most recently used entry is kept.
+    """
+    entries = []
+    for entry in Path(directory).glob("*"):
+        with contextlib.suppress(FileNotFoundError, NotADirectoryError):
+            size = sum(p.stat().st_size for p in entry.iterdir())
+            entries.append((entry.stat().st_mtime, size, entry))
+    size = sum(e[1] for e in entries)
+    for _, entry_size, entry in sorted(entries)[:-1]:
+        if size <= max_size:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        size -= entry_size
 
 
 def pathurlnone(string):
@@ -55,6 +216,13 @@ def pathurlnone(string):
     return f"file://{path.expanduser().resolve()}"
 
 
+def yaml_load(data):
+    # Imported here to keep yaml out of the listing commands
+    import yaml
+
+    return yaml.load(data, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
 def notnone(value, fallback):
     if value is None:
         return fallback